@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.contrib import admin
+
+from .models import AgentRun, DailyTokenUsage
+from .telemetry import percentile
+
+PERCENTILES = (50, 90, 99)
+
+# Runs sampled for the percentile table (newest first)
+PERCENTILE_SAMPLE = 5000
+
+PERCENTILE_FIELDS = (
+    ("Total ms", "total_ms"),
+    ("Model ms", "model_ms"),
+    ("Tools ms", "tools_ms"),
+    ("Rate limit wait ms", "rate_limit_ms"),
+    ("Iterations", "iterations"),
+    ("Input tokens", "input_tokens"),
+    ("Output tokens", "output_tokens"),
+    ("Cache read tokens", "cache_read_tokens"),
+    ("Tool result tokens", "tool_result_tokens"),
+)
+
+
+def run_percentiles(queryset) -> dict:
+    """p50/p90/p99 of run timings, token counts, and per-tool durations."""
+    rows = list(
+        queryset.order_by("-created_at").values(
+            *(name for _, name in PERCENTILE_FIELDS), "tool_timings"
+        )[:PERCENTILE_SAMPLE]
+    )
+
+    fields = [
+        (label, [percentile([row[name] for row in rows], p) for p in PERCENTILES])
+        for label, name in PERCENTILE_FIELDS
+    ]
+
+    durations = defaultdict(list)
+    for row in rows:
+        for name, ms in row["tool_timings"]:
+            durations[name].append(ms)
+    tools = [
+        (name, len(values), [percentile(values, p) for p in PERCENTILES])
+        for name, values in sorted(durations.items())
+    ]
+
+    return {"runs": len(rows), "percentiles": PERCENTILES, "fields": fields, "tools": tools}
+
+
+@admin.register(AgentRun)
+class AgentRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at", "user", "outcome", "total_ms", "model_ms", "tools_ms", "rate_limit_ms",
+        "iterations", "input_tokens", "output_tokens", "cache_read_tokens", "tool_result_tokens",
+    )
+    list_filter = ("outcome", "created_at")
+    search_fields = ("user__email",)
+    raw_id_fields = ("user", "message")
+    date_hierarchy = "created_at"
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        # Percentiles follow the list's filters and search
+        changelist = getattr(response, "context_data", {}).get("cl")
+        if changelist is not None:
+            response.context_data["run_stats"] = run_percentiles(changelist.queryset)
+        return response
+
+
+@admin.register(DailyTokenUsage)
+class DailyTokenUsageAdmin(admin.ModelAdmin):
+    list_display = (
+        "date", "user", "total_tokens", "input_tokens", "output_tokens",
+        "cache_read_tokens", "cache_creation_tokens",
+    )
+    list_filter = ("date",)
+    search_fields = ("user__email",)
+    raw_id_fields = ("user",)
+    date_hierarchy = "date"
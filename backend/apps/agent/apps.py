@@ -5,3 +5,8 @@ class AgentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.agent"
     verbose_name = "Agent"
+
+    def ready(self):
+        from .snapshot import connect_signals
+
+        connect_signals()
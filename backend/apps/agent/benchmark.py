@@ -0,0 +1,252 @@
+"""
+Offline agent benchmark.
+
+Drives realistic chat turns through the agent with a ScriptedChatModel in
+place of Claude, so graph overhead, tool DB cost and consumer throughput
+can be measured without network access:
+
+- "graph" mode calls agent.invoke directly, one turn at a time
+- "consumer" mode talks to ChatConsumer over an in-memory WebSocket, so
+  routing, memory, checkpoints and telemetry are all included
+
+Each scenario reports p50/p99 turn latency, DB queries per turn and turns
+per second. Run it with `manage.py benchmark_agent`.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.users.models import User
+
+from .fakes import ScriptedChatModel
+from .telemetry import percentile
+
+BENCHMARK_EMAIL = "benchmark-{}@wuwei.invalid"
+
+
+def _call(name: str, args: dict, call_id: str = "call_1") -> dict:
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    message: str
+    # What the model says on each call of the turn, in order
+    responses: tuple
+
+
+SCENARIOS = [
+    Scenario(
+        "chat",
+        "How should I start my mornings so I feel less rushed?",
+        (AIMessage(content="Begin with one unhurried breath before you reach for your phone."),),
+    ),
+    Scenario(
+        "log_meditation",
+        "I meditated for 15 minutes this morning and it felt calm",
+        (AIMessage(content="", tool_calls=[_call("log_meditation", {"duration_minutes": 15})]),),
+    ),
+    Scenario(
+        "fast_path",
+        "meditated 10 min",
+        (AIMessage(content="", tool_calls=[_call("log_meditation", {"duration_minutes": 10})]),),
+    ),
+    Scenario(
+        "plan_day",
+        "I need to buy milk, call mom and book the dentist",
+        (AIMessage(content="", tool_calls=[_call("create_todos", {"tasks": [
+            {"task": "Buy milk"}, {"task": "Call mom"}, {"task": "Book the dentist"},
+        ]})]),),
+    ),
+    Scenario(
+        "review_day",
+        "What's still on my plate, and how am I doing today?",
+        (
+            AIMessage(content="", tool_calls=[
+                _call("get_todos", {}, "call_1"),
+                _call("get_todays_status", {}, "call_2"),
+            ]),
+            AIMessage(content="You have a few things open, and you've already meditated today."),
+        ),
+    ),
+    Scenario(
+        "journal",
+        "Journal: work was loud today but I kept coming back to my breath. "
+        "I noticed I get tense before meetings and softer after walks.",
+        (
+            AIMessage(content="", tool_calls=[
+                _call("save_journal_entry", {"content": "Work was loud today..."}, "call_1"),
+                _call("get_recent_entries", {"days": 7}, "call_2"),
+            ]),
+            AIMessage(
+                content="Returning to the breath is the practice. Walks seem to loosen "
+                "what meetings tighten; maybe a short one before your next meeting?"
+            ),
+        ),
+    ),
+]
+
+
+class QueryCounter:
+    """Counts SQL queries on every connection opened while active.
+
+    Connections are per thread, and the consumer's ORM calls run in
+    asgiref's sync thread, so the counter hooks each new connection (and
+    install() adds the calling thread's existing one).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._wrapped = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        connection = connection or connections[DEFAULT_DB_ALIAS]
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+            self._wrapped.append(connection)
+
+    def __enter__(self):
+        connection_created.connect(self.install)
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        connection_created.disconnect(self.install)
+        for wrapped in self._wrapped:
+            if self in wrapped.execute_wrappers:
+                wrapped.execute_wrappers.remove(self)
+
+
+@dataclass
+class BenchmarkResult:
+    scenario: str
+    mode: str
+    latencies_ms: list = field(default_factory=list)
+    queries: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def turns(self) -> int:
+        return len(self.latencies_ms)
+
+    def as_dict(self) -> dict:
+        return {
+            "scenario": self.scenario,
+            "mode": self.mode,
+            "turns": self.turns,
+            "p50_ms": round(percentile(self.latencies_ms, 50), 1),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 1),
+            "queries_per_turn": round(self.queries / self.turns, 1),
+            "turns_per_second": round(self.turns / self.elapsed, 1),
+        }
+
+
+def benchmark_users(count: int) -> list[User]:
+    """Fresh throwaway users for a run."""
+    delete_benchmark_users()
+    return [
+        User.objects.create_user(email=BENCHMARK_EMAIL.format(i), password=None)
+        for i in range(count)
+    ]
+
+
+def delete_benchmark_users() -> None:
+    User.objects.filter(email__endswith="@wuwei.invalid", email__startswith="benchmark-").delete()
+
+
+def run_graph(scenario: Scenario, turns: int, latency: float) -> BenchmarkResult:
+    """Time agent.invoke on the scenario, one turn after another."""
+    from .graph import agent
+
+    (user,) = benchmark_users(1)
+    result = BenchmarkResult(scenario.name, "graph")
+    with QueryCounter() as queries:
+        started = time.perf_counter()
+        for _ in range(turns):
+            model = ScriptedChatModel(messages=iter(scenario.responses), latency=latency)
+            config = {"configurable": {"user": user, "chat_model": model}}
+            turn_started = time.perf_counter()
+            agent.invoke({"messages": [HumanMessage(content=scenario.message)]}, config)
+            result.latencies_ms.append((time.perf_counter() - turn_started) * 1000)
+        result.elapsed = time.perf_counter() - started
+    result.queries = queries.count
+    delete_benchmark_users()
+    return result
+
+
+def _consumer_class(scenario: Scenario, latency: float):
+    from apps.chat.consumers import ChatConsumer
+
+    class BenchmarkConsumer(ChatConsumer):
+        def _agent_config(self, summary: str = "") -> dict:
+            config = super()._agent_config(summary)
+            config["configurable"]["chat_model"] = ScriptedChatModel(
+                messages=iter(scenario.responses), latency=latency
+            )
+            return config
+
+    return BenchmarkConsumer
+
+
+async def _consumer_worker(app, user: User, message: str, turns: int, latencies: list) -> None:
+    communicator = WebsocketCommunicator(app, "/ws/chat/")
+    communicator.scope["user"] = user
+    connected, _ = await communicator.connect()
+    if not connected:
+        raise RuntimeError("Benchmark consumer refused the connection")
+
+    for _ in range(turns):
+        started = time.perf_counter()
+        await communicator.send_json_to({"type": "message", "content": message})
+        while (await communicator.receive_json_from(timeout=60))["type"] != "complete":
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    await communicator.disconnect()
+
+
+async def _run_consumer(scenario, turns, latency, concurrency, users) -> BenchmarkResult:
+    app = _consumer_class(scenario, latency).as_asgi()
+    result = BenchmarkResult(scenario.name, "consumer")
+    per_worker = max(turns // concurrency, 1)
+
+    with QueryCounter() as queries:
+        # The consumer's ORM calls run in asgiref's sync thread
+        await sync_to_async(queries.install)()
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _consumer_worker(app, user, scenario.message, per_worker, result.latencies_ms)
+            for user in users
+        ))
+        result.elapsed = time.perf_counter() - started
+    result.queries = queries.count
+    return result
+
+
+def run_consumer(scenario: Scenario, turns: int, latency: float, concurrency: int) -> BenchmarkResult:
+    """Time full chat turns through ChatConsumer, `concurrency` at a time.
+
+    Each concurrent connection gets its own user. Summary updates aren't
+    queued, so no Celery broker is needed.
+    """
+    users = benchmark_users(concurrency)
+    with override_settings(AGENT_MEMORY_SUMMARY_BATCH=10**9):
+        result = asyncio.run(_run_consumer(scenario, turns, latency, concurrency, users))
+    delete_benchmark_users()
+    return result
@@ -0,0 +1,86 @@
+"""
+Turn deadline and loop budget.
+
+The consumer puts two values in the run's configurable:
+
+- "deadline": a time.monotonic() timestamp the turn must finish by
+- "max_iterations": the most model calls one turn may make
+
+Model calls get the remaining time as their timeout (async calls are
+cancelled outright), and the graph stops looping once either budget is
+spent. Instead of an error the user gets the best partial answer: what
+the tools already did, or the model's last words, or an apology.
+"""
+
+import time
+from typing import Optional
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from .replies import render_reply
+from .streaming import message_text
+
+OUT_OF_TIME_MESSAGE = (
+    "Sorry, I ran out of time working on that. Please try again."
+)
+
+
+def budget_config(seconds: float, max_iterations: int) -> dict:
+    """Configurable entries that bound a turn."""
+    return {"deadline": time.monotonic() + seconds, "max_iterations": max_iterations}
+
+
+def remaining_seconds(config) -> Optional[float]:
+    """Seconds left before the deadline, or None if the run has none."""
+    deadline = config.get("configurable", {}).get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def _this_turn(messages: list) -> list:
+    """Messages after the user's latest message."""
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            return messages[i + 1:]
+    return messages
+
+
+def iterations(messages: list) -> int:
+    """Model calls made so far this turn."""
+    return sum(isinstance(m, AIMessage) for m in _this_turn(messages))
+
+
+def out_of_time(config) -> bool:
+    remaining = remaining_seconds(config)
+    return remaining is not None and remaining <= 0
+
+
+def exhausted(messages: list, config) -> bool:
+    """True when the turn may not call the model again."""
+    max_iterations = config.get("configurable", {}).get("max_iterations")
+    if max_iterations is not None and iterations(messages) >= max_iterations:
+        return True
+    return out_of_time(config)
+
+
+def partial_answer(messages: list, fallback: str = OUT_OF_TIME_MESSAGE) -> str:
+    """The best reply available from what this turn has done so far."""
+    turn = _this_turn(messages)
+
+    confirmations = [
+        render_reply(m.name, m.artifact or {})
+        for m in turn
+        if isinstance(m, ToolMessage)
+    ]
+    # Repeated reads render the same text; say it once
+    confirmations = list(dict.fromkeys(text for text in confirmations if text))
+    if confirmations:
+        return "\n\n".join(confirmations)
+
+    for message in reversed(turn):
+        if isinstance(message, AIMessage):
+            text = message_text(message.content).strip()
+            if text:
+                return text
+    return fallback
@@ -0,0 +1,271 @@
+"""
+Durable LangGraph checkpoints stored in Postgres through the Django ORM.
+
+Each agent turn runs on its own thread ("user-<id>:msg-<message id>"), and
+LangGraph saves a checkpoint after every node. If a turn dies part-way
+(worker restart, timeout), running the same thread again resumes after
+the last completed node instead of repeating model calls and tool writes.
+
+Payloads are msgpack (LangGraph's serializer), zlib-compressed when large.
+Finished turns are deleted by the consumer once their reply is saved, and
+prune_checkpoints clears abandoned ones after AGENT_CHECKPOINT_TTL_HOURS.
+"""
+
+import zlib
+from datetime import timedelta
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from channels.db import DatabaseSyncToAsync
+from django.db import transaction
+from django.utils import timezone
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+from .models import AgentCheckpoint, AgentCheckpointWrite
+
+# Payloads above this many bytes are compressed
+COMPRESS_MIN_BYTES = 1024
+ZLIB_SUFFIX = "+zlib"
+
+
+def _off_loop(func):
+    """Run func on a pool thread of its own. asgiref's shared sync thread
+    would queue every conversation's checkpoint reads and writes."""
+    return DatabaseSyncToAsync(func, thread_sensitive=False)
+
+
+def thread_id_for(user, message_id: int) -> str:
+    """The checkpoint thread for one user turn."""
+    return f"user-{user.id}:msg-{message_id}"
+
+
+class DjangoCheckpointSaver(BaseCheckpointSaver[int]):
+    """BaseCheckpointSaver backed by AgentCheckpoint/AgentCheckpointWrite."""
+
+    # --- Serialization ---
+
+    def _dump(self, value: Any) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(value)
+        if len(data) >= COMPRESS_MIN_BYTES:
+            return type_ + ZLIB_SUFFIX, zlib.compress(data)
+        return type_, data
+
+    def _load(self, type_: str, data: bytes) -> Any:
+        data = bytes(data)
+        if type_.endswith(ZLIB_SUFFIX):
+            type_, data = type_[: -len(ZLIB_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    def _to_tuple(self, row: AgentCheckpoint) -> CheckpointTuple:
+        writes = AgentCheckpointWrite.objects.filter(
+            thread_id=row.thread_id,
+            checkpoint_ns=row.checkpoint_ns,
+            checkpoint_id=row.checkpoint_id,
+        ).order_by("task_path", "task_id", "idx")
+
+        def config_for(checkpoint_id: str) -> RunnableConfig:
+            return {
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config_for(row.checkpoint_id),
+            checkpoint=self._load(row.type, row.checkpoint),
+            metadata=self._load(row.metadata_type, row.metadata),
+            parent_config=(
+                config_for(row.parent_checkpoint_id) if row.parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (w.task_id, w.channel, self._load(w.type, w.value)) for w in writes
+            ],
+        )
+
+    # --- Sync API ---
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        rows = AgentCheckpoint.objects.filter(
+            thread_id=configurable["thread_id"],
+            checkpoint_ns=configurable.get("checkpoint_ns", ""),
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            rows = rows.filter(checkpoint_id=checkpoint_id)
+        # Checkpoint ids are time-ordered, so the largest is the latest
+        row = rows.order_by("-checkpoint_id").first()
+        return self._to_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        rows = AgentCheckpoint.objects.order_by("-checkpoint_id")
+        if config:
+            configurable = config["configurable"]
+            rows = rows.filter(thread_id=configurable["thread_id"])
+            if "checkpoint_ns" in configurable:
+                rows = rows.filter(checkpoint_ns=configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                rows = rows.filter(checkpoint_id=checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            rows = rows.filter(checkpoint_id__lt=before_id)
+
+        for row in rows:
+            checkpoint_tuple = self._to_tuple(row)
+            if filter and not all(
+                checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()
+            ):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    return
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_data = self._dump(checkpoint)
+        # Metadata is stored as given. LangGraph's default would merge in
+        # configurable values, which include the user's API key.
+        metadata_type, metadata_data = self._dump(dict(metadata))
+
+        AgentCheckpoint.objects.update_or_create(
+            thread_id=thread_id,
+            checkpoint_ns=checkpoint_ns,
+            checkpoint_id=checkpoint["id"],
+            defaults={
+                "parent_checkpoint_id": configurable.get("checkpoint_id"),
+                "type": checkpoint_type,
+                "checkpoint": checkpoint_data,
+                "metadata_type": metadata_type,
+                "metadata": metadata_data,
+            },
+        )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        key = {
+            "thread_id": configurable["thread_id"],
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+            "checkpoint_id": configurable["checkpoint_id"],
+            "task_id": task_id,
+        }
+        with transaction.atomic():
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                value_type, value_data = self._dump(value)
+                fields = {
+                    "task_path": task_path,
+                    "channel": channel,
+                    "type": value_type,
+                    "value": value_data,
+                }
+                if idx >= 0:
+                    # Regular writes are recorded once per task
+                    AgentCheckpointWrite.objects.get_or_create(**key, idx=idx, defaults=fields)
+                else:
+                    # Special writes (errors, interrupts) keep the latest value
+                    AgentCheckpointWrite.objects.update_or_create(**key, idx=idx, defaults=fields)
+
+    def delete_thread(self, thread_id: str) -> None:
+        AgentCheckpoint.objects.filter(thread_id=thread_id).delete()
+        AgentCheckpointWrite.objects.filter(thread_id=thread_id).delete()
+
+    def get_next_version(self, current: Optional[int], channel: None = None) -> int:
+        return (current or 0) + 1
+
+    # --- Async API: the ORM calls run on pool threads ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await _off_loop(self.get_tuple)(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await _off_loop(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )()
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await _off_loop(self.put)(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await _off_loop(self.put_writes)(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await _off_loop(self.delete_thread)(thread_id)
+
+
+def prune_checkpoints(older_than_hours: int) -> int:
+    """Delete threads whose newest checkpoint is older than the cutoff.
+
+    Returns the number of threads removed.
+    """
+    cutoff = timezone.now() - timedelta(hours=older_than_hours)
+    recent = AgentCheckpoint.objects.filter(created_at__gte=cutoff).values("thread_id")
+    stale = set(
+        AgentCheckpoint.objects.filter(created_at__lt=cutoff)
+        .exclude(thread_id__in=recent)
+        .values_list("thread_id", flat=True)
+    )
+    AgentCheckpoint.objects.filter(thread_id__in=stale).delete()
+    AgentCheckpointWrite.objects.filter(thread_id__in=stale).delete()
+    return len(stale)
+
+
+checkpointer = DjangoCheckpointSaver()
@@ -0,0 +1,215 @@
+"""
+Scripted stand-ins for Claude, for tests and offline benchmarks.
+
+ScriptedChatModel replays a fixed list of AIMessages (text and/or tool
+calls) in order, optionally sleeping to simulate API latency. It accepts
+bind_tools() like ChatAnthropic and streams text word by word with tool
+calls in a final chunk, so the graph and streaming code run unchanged.
+Pass one as configurable["chat_model"] to use it for a single run.
+
+FakeAnthropicServer is a local HTTP endpoint speaking the Messages API,
+for exercising the real ChatAnthropic client: point ANTHROPIC_BASE_URL
+at it and script slow replies and errors such as 529 overloaded.
+"""
+
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+
+def _chunks(message: AIMessage):
+    for token in re.split(r"(\s)", message.content or ""):
+        if token:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+    yield ChatGenerationChunk(message=AIMessageChunk(
+        content="",
+        tool_call_chunks=[
+            {
+                "name": call["name"],
+                "args": json.dumps(call["args"]),
+                "id": call["id"],
+                "index": i,
+            }
+            for i, call in enumerate(message.tool_calls)
+        ],
+        usage_metadata=message.usage_metadata,
+    ))
+
+
+class ScriptedChatModel(GenericFakeChatModel):
+    """Replays scripted AIMessages, each after `latency` seconds."""
+
+    latency: float = 0.0
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_message(self, messages) -> AIMessage:
+        return super()._generate(messages).generations[0].message
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return super()._generate(messages, stop, None, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        for chunk in _chunks(self._next_message(messages)):
+            if run_manager and chunk.message.content:
+                run_manager.on_llm_new_token(chunk.message.content)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        for chunk in _chunks(self._next_message(messages)):
+            if run_manager and chunk.message.content:
+                await run_manager.on_llm_new_token(chunk.message.content)
+            yield chunk
+
+
+@dataclass
+class FakeReply:
+    """One scripted Messages API response."""
+
+    text: str = "OK"
+    status: int = 200
+    delay: float = 0.0  # seconds before responding
+    fail_after: int | None = None  # when streaming, words sent before an overloaded error event
+
+
+ERROR_TYPES = {
+    400: "invalid_request_error",
+    429: "rate_limit_error",
+    500: "api_error",
+    529: "overloaded_error",
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeAnthropicServer"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        reply = self.server.next_reply(body)
+        time.sleep(reply.delay)
+
+        if reply.status != 200:
+            error = {"type": ERROR_TYPES.get(reply.status, "api_error"), "message": reply.text}
+            self._send(reply.status, "application/json", json.dumps({"type": "error", "error": error}))
+        elif body.get("stream"):
+            self._send(200, "text/event-stream", _sse(body["model"], reply.text, reply.fail_after))
+        else:
+            self._send(200, "application/json", json.dumps(_message(body["model"], reply.text)))
+
+    def _send(self, status: int, content_type: str, payload: str) -> None:
+        data = payload.encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (e.g. a cancelled hedge)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _message(model: str, text: str) -> dict:
+    return {
+        "id": "msg_fake",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": len(text.split())},
+    }
+
+
+def _sse(model: str, text: str, fail_after: int | None = None) -> str:
+    start = _message(model, "")
+    start["content"] = []
+    tokens = [token for token in re.split(r"(?<=\s)", text) if token]
+    events = [
+        ("message_start", {"type": "message_start", "message": start}),
+        ("content_block_start", {
+            "type": "content_block_start", "index": 0,
+            "content_block": {"type": "text", "text": ""},
+        }),
+        *(
+            ("content_block_delta", {
+                "type": "content_block_delta", "index": 0,
+                "delta": {"type": "text_delta", "text": token},
+            })
+            for token in tokens[:fail_after]
+        ),
+    ]
+    if fail_after is not None:
+        # The API reports failures after the 200 as an error event
+        error = {"type": "overloaded_error", "message": "Overloaded"}
+        events.append(("error", {"type": "error", "error": error}))
+        return "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
+    events += [
+        ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        ("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(text.split())},
+        }),
+        ("message_stop", {"type": "message_stop"}),
+    ]
+    return "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events)
+
+
+class FakeAnthropicServer(ThreadingHTTPServer):
+    """Serves scripted replies in request order ("OK" once the script runs out).
+
+        with FakeAnthropicServer() as server:
+            server.script(FakeReply(status=529), FakeReply("Hello"))
+            ...  # ANTHROPIC_BASE_URL=server.url
+            server.models  # model of each request received
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self._replies: deque[FakeReply] = deque()
+        self._lock = threading.Lock()
+        self.models: list[str] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def script(self, *replies: FakeReply) -> None:
+        with self._lock:
+            self._replies.extend(replies)
+
+    def next_reply(self, body: dict) -> FakeReply:
+        with self._lock:
+            self.models.append(body["model"])
+            return self._replies.popleft() if self._replies else FakeReply()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
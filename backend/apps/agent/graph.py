@@ -5,22 +5,50 @@ The graph orchestrates the conversation flow:
 1. Receive user message
 2. Call Claude with tool definitions
 3. Execute any tool calls
-4. Return response (with streaming support)
+4. Return response (with streaming support) — after write-only tool
+   calls, a templated confirmation instead of a second Claude call
+5. Stop at the turn's deadline or iteration budget with the best
+   partial answer
+6. Move to the fast tier past the user's soft daily token budget, and
+   stop calling Claude past the hard one
 """
 
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated, Any
 
-from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+import anthropic
+from asgiref.sync import sync_to_async
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 
+from . import resilience
 from . import tools as agent_tools
+from .budget import exhausted, out_of_time, partial_answer, remaining_seconds
+from .checkpoints import checkpointer
+from .llm import get_chat_model, log_usage, system_message
 from .prompts import SYSTEM_PROMPT
+from .recording import recorder_of
+from .replies import render_reply
+from .resilience import UNAVAILABLE_MESSAGE, ModelUnavailable
+from .results import serialize_result
+from .snapshot import ainvalidate_snapshot, invalidate_snapshot
+from .telemetry import ms_since, telemetry_of
+from .tool_cache import WRITE_INVALIDATES, ToolCache
+from .tiering import DEEP, FAST, classify, tier_settings
+from .usage import HARD, OVER_BUDGET_MESSAGE, SOFT, record_usage, user_budget_status
+
+logger = logging.getLogger(__name__)
 
 
 # --- LangChain tool wrappers ---
@@ -29,22 +57,28 @@ from .prompts import SYSTEM_PROMPT
 
 
 @tool
-def log_meditation(duration_minutes: int | None = None) -> dict:
+def log_meditation(
+    duration_minutes: int | None = None, follow_up: bool = False
+) -> dict:
     """Log that the user completed their meditation.
 
     Args:
         duration_minutes: Optional duration in minutes
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
     """
     # User is injected at runtime via config
     raise NotImplementedError("Must be called via graph with user config")
 
 
 @tool
-def save_gratitude_list(items: list[str]) -> dict:
+def save_gratitude_list(items: list[str], follow_up: bool = False) -> dict:
     """Save the user's gratitude list for today.
 
     Args:
         items: List of things the user is grateful for
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
     """
     raise NotImplementedError
 
@@ -60,22 +94,62 @@ def save_journal_entry(content: str) -> dict:
 
 
 @tool
-def create_todo(task: str, due_date: str | None = None) -> dict:
+def create_todo(
+    task: str, due_date: str | None = None, follow_up: bool = False
+) -> dict:
     """Create a new todo item.
 
     Args:
         task: The task description
-        due_date: Optional due date (YYYY-MM-DD format, or "today", "tomorrow")
+        due_date: Optional due date as the user said it ("friday",
+            "in 3 days", "march 5") or YYYY-MM-DD; it is resolved for you
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
+    """
+    raise NotImplementedError
+
+
+class TodoItem(TypedDict):
+    """A todo to create."""
+
+    task: str
+    due_date: NotRequired[str | None]
+
+
+@tool
+def create_todos(tasks: list[TodoItem], follow_up: bool = False) -> dict:
+    """Create several todo items at once. Prefer this over repeated
+    create_todo calls when the user mentions more than one task.
+
+    Args:
+        tasks: The todos, each with a task and optional due_date
+            (as the user said it, e.g. "friday", or YYYY-MM-DD)
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
     """
     raise NotImplementedError
 
 
 @tool
-def complete_todo(search: str) -> dict:
+def complete_todo(search: str, follow_up: bool = False) -> dict:
     """Mark a todo as complete by searching for it.
 
     Args:
         search: Text to search for in todo tasks
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
+    """
+    raise NotImplementedError
+
+
+@tool
+def complete_todos(searches: list[str], follow_up: bool = False) -> dict:
+    """Mark several todos complete at once, one search text per todo.
+
+    Args:
+        searches: Text to search for in todo tasks, one entry per todo
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
     """
     raise NotImplementedError
 
@@ -91,11 +165,15 @@ def get_todos(include_completed: bool = False) -> dict:
 
 
 @tool
-def get_recent_entries(days: int = 7) -> dict:
-    """Get recent journal entries.
+def get_recent_entries(days: int = 7, offset: int = 0) -> dict:
+    """Get recent journal entries, newest first.
+
+    Long results are trimmed; if the result has a "more" marker, call
+    again with its next_offset to page further back.
 
     Args:
         days: Number of days to look back
+        offset: Number of newest entries to skip
     """
     raise NotImplementedError
 
@@ -107,11 +185,13 @@ def get_mantras() -> dict:
 
 
 @tool
-def add_mantra(content: str) -> dict:
+def add_mantra(content: str, follow_up: bool = False) -> dict:
     """Add a new mantra.
 
     Args:
         content: The mantra text
+        follow_up: Set true to reply yourself after seeing the result;
+            otherwise a short confirmation is sent for you
     """
     raise NotImplementedError
 
@@ -127,7 +207,9 @@ TOOLS = [
     save_gratitude_list,
     save_journal_entry,
     create_todo,
+    create_todos,
     complete_todo,
+    complete_todos,
     get_todos,
     get_recent_entries,
     get_mantras,
@@ -141,7 +223,9 @@ TOOL_FUNCTIONS = {
     "save_gratitude_list": agent_tools.save_gratitude_list,
     "save_journal_entry": agent_tools.save_journal_entry,
     "create_todo": agent_tools.create_todo,
+    "create_todos": agent_tools.create_todos,
     "complete_todo": agent_tools.complete_todo,
+    "complete_todos": agent_tools.complete_todos,
     "get_todos": agent_tools.get_todos,
     "get_recent_entries": agent_tools.get_recent_entries,
     "get_mantras": agent_tools.get_mantras,
@@ -149,6 +233,47 @@ TOOL_FUNCTIONS = {
     "get_todays_status": agent_tools.get_todays_status,
 }
 
+# The async ORM runs every query on asgiref's one shared thread, so tool
+# calls awaited together would still take turns. The async graph runs the
+# sync tool bodies on this bounded pool instead, each thread with its own
+# connection, so independent calls really overlap.
+_tool_executor = ThreadPoolExecutor(
+    max_workers=settings.AGENT_TOOL_THREADS, thread_name_prefix="agent-tool"
+)
+
+
+def _in_tool_thread(name: str):
+    """Async callable running TOOL_FUNCTIONS[name] on the tool pool."""
+    async def call(**kwargs) -> dict:
+        run = DatabaseSyncToAsync(TOOL_FUNCTIONS[name], thread_sensitive=False, executor=_tool_executor)
+        return await run(**kwargs)
+    return call
+
+
+ASYNC_TOOL_FUNCTIONS = {name: _in_tool_thread(name) for name in TOOL_FUNCTIONS}
+
+
+# Simple writes whose result can be confirmed from a template. A turn whose
+# tool calls are all terminal-eligible ends with a rendered confirmation
+# instead of a second model call, unless the model passes follow_up=True.
+TERMINAL_TOOLS = {
+    "log_meditation",
+    "save_gratitude_list",
+    "create_todo",
+    "create_todos",
+    "complete_todo",
+    "complete_todos",
+    "add_mantra",
+}
+
+# Tools that read-modify-write the same row. Calls sharing a key run one at
+# a time within a turn; everything else runs concurrently. Check-in writes
+# are single upserts and need no lock, but save_journal_entry appends to
+# today's entry, so two concurrent calls would lose one of the appends.
+TOOL_LOCKS = {
+    "save_journal_entry": "journal",
+}
+
 
 # --- Graph state ---
 
@@ -160,79 +285,426 @@ class AgentState(TypedDict):
 # --- Graph nodes ---
 
 
-def call_model(state: AgentState, config: RunnableConfig) -> dict:
-    """Call Claude with the current conversation and tool definitions."""
-    model_name = config.get("configurable", {}).get(
-        "model", "claude-sonnet-4-20250514"
+def _model_choice(state: AgentState, config: RunnableConfig, budget: str = "") -> tuple[str, str, int]:
+    """Pick (tier, model name, max_tokens) for this model call.
+
+    An explicit "model" in the config wins; otherwise the tiering
+    classifier decides between the fast and deep tiers. Past the soft
+    token budget it is always the fast tier.
+    """
+    configurable = config.get("configurable", {})
+    if configurable.get("model"):
+        return "override", configurable["model"], tier_settings(DEEP)["max_tokens"]
+
+    if budget == SOFT:
+        tier = FAST
+    elif settings.AGENT_TIERING:
+        tier = classify(state["messages"])
+    else:
+        tier = DEEP
+    tier_config = tier_settings(tier)
+    logger.info("Agent tier=%s model=%s", tier, tier_config["model"])
+    return tier, tier_config["model"], tier_config["max_tokens"]
+
+
+def _bound_model(config: RunnableConfig, model_name: str, max_tokens: int):
+    """Get the tool-bound chat model for this run's config.
+
+    A "chat_model" in the config replaces Claude for the run (used by the
+    offline benchmark, see fakes.py).
+    """
+    configurable = config.get("configurable", {})
+    if configurable.get("chat_model") is not None:
+        return configurable["chat_model"]
+    api_key = configurable.get("anthropic_api_key")
+
+    return get_chat_model(model_name, api_key, max_tokens=max_tokens, tools=TOOLS)
+
+
+def _model_messages(state: AgentState, config: RunnableConfig) -> list:
+    """System prompt plus the run's per-user blocks, then the conversation."""
+    configurable = config.get("configurable", {})
+    summary = configurable.get("conversation_summary")
+    extra = (
+        f"## Earlier Conversation\n{summary}" if summary else "",
+        configurable.get("user_context", ""),
     )
-    api_key = config.get("configurable", {}).get("anthropic_api_key")
+    return [system_message(SYSTEM_PROMPT, extra)] + state["messages"]
+
 
-    model = ChatAnthropic(
-        model=model_name,
-        anthropic_api_key=api_key,
-        max_tokens=1024,
+def _tool_kwargs(tool_call: dict, config: RunnableConfig) -> dict:
+    """Tool call arguments with the user injected from config."""
+    kwargs = tool_call["args"].copy()
+    kwargs.pop("follow_up", None)  # graph routing flag, not a tool argument
+    kwargs["user"] = config.get("configurable", {}).get("user")
+    return kwargs
+
+
+def _record_model(config: RunnableConfig, started: float, response, usage: dict) -> None:
+    ms = ms_since(started)
+    telemetry = telemetry_of(config)
+    if telemetry is not None:
+        telemetry.record_model(ms, usage)
+    recorder = recorder_of(config)
+    if recorder is not None:
+        recorder.record_model(response, ms)
+
+
+def _budget(config: RunnableConfig) -> str:
+    """The run user's daily token budget status."""
+    user = config.get("configurable", {}).get("user")
+    return user_budget_status(user.pk) if user is not None else ""
+
+
+def _record_usage(config: RunnableConfig, usage: dict) -> None:
+    user = config.get("configurable", {}).get("user")
+    if user is not None:
+        record_usage(user.pk, usage)
+
+
+def _record_tool(config: RunnableConfig, tool_call: dict, started: float, message: ToolMessage) -> None:
+    ms = ms_since(started)
+    telemetry = telemetry_of(config)
+    if telemetry is not None:
+        telemetry.record_tool(tool_call["name"], ms, message.response_metadata.get("result_tokens", 0))
+    recorder = recorder_of(config)
+    if recorder is not None:
+        recorder.record_tool(tool_call, message.content, ms)
+
+
+def _record_tools(config: RunnableConfig, started: float) -> None:
+    telemetry = telemetry_of(config)
+    if telemetry is not None:
+        telemetry.record_tools(ms_since(started))
+
+
+def _tool_cache(config: RunnableConfig) -> ToolCache | None:
+    return config.get("configurable", {}).get("tool_cache")
+
+
+def _run_tool(func, tool_call: dict, config: RunnableConfig) -> dict:
+    """Call a tool, serving repeated reads from the run's ToolCache."""
+    kwargs = _tool_kwargs(tool_call, config)
+    cache = _tool_cache(config)
+    if cache is None:
+        return func(**kwargs)
+
+    args = {k: v for k, v in kwargs.items() if k != "user"}
+    hit, result, token = cache.lookup(tool_call["name"], args)
+    if hit:
+        return result
+    result = func(**kwargs)
+    cache.store(tool_call["name"], args, result, token)
+    cache.invalidate(tool_call["name"])
+    return result
+
+
+async def _arun_tool(func, tool_call: dict, config: RunnableConfig) -> dict:
+    """Async _run_tool."""
+    kwargs = _tool_kwargs(tool_call, config)
+    cache = _tool_cache(config)
+    if cache is None:
+        return await func(**kwargs)
+
+    args = {k: v for k, v in kwargs.items() if k != "user"}
+    hit, result, token = cache.lookup(tool_call["name"], args)
+    if hit:
+        return result
+    result = await func(**kwargs)
+    cache.store(tool_call["name"], args, result, token)
+    cache.invalidate(tool_call["name"])
+    return result
+
+
+def _tool_message(tool_call: dict, result: dict) -> ToolMessage:
+    # The model sees compact, budgeted JSON; the raw result rides along as
+    # the artifact for the confirm node
+    content, tokens = serialize_result(tool_call["name"], result, tool_call["args"])
+    return ToolMessage(
+        content=content,
+        artifact=result,
+        tool_call_id=tool_call["id"],
+        name=tool_call["name"],
+        response_metadata={"result_tokens": tokens},
     )
-    model_with_tools = model.bind_tools(TOOLS)
 
-    messages = [SystemMessage(content=SYSTEM_PROMPT)] + state["messages"]
-    response = model_with_tools.invoke(messages)
+
+def _model_names(config: RunnableConfig, model_name: str) -> list[str]:
+    """The chosen model, then the fallback model if there is a different one."""
+    fallback = settings.AGENT_FALLBACK_MODEL
+    if config.get("configurable", {}).get("chat_model") is not None:
+        return [model_name]
+    return [model_name] + ([fallback] if fallback and fallback != model_name else [])
+
+
+def call_model(state: AgentState, config: RunnableConfig) -> dict:
+    """Call Claude with the current conversation and tool definitions.
+
+    The call goes through resilience.invoke (retries, hedging, fallback
+    model, circuit breaker). Its timeout is the time left before the
+    turn's deadline; if that runs out, or no model can answer, the turn
+    ends with the best partial answer.
+    """
+    if out_of_time(config):
+        return finish(state)
+    budget = _budget(config)
+    if budget == HARD:
+        return over_budget(state)
+    _, model_name, max_tokens = _model_choice(state, config, budget)
+    started = time.perf_counter()
+    try:
+        model_name, response = resilience.invoke(
+            _model_names(config, model_name),
+            lambda name: _bound_model(config, name, max_tokens),
+            _model_messages(state, config),
+            config,
+        )
+    except anthropic.APITimeoutError:
+        logger.warning("Model call cut off by the turn deadline")
+        return finish(state)
+    except ModelUnavailable as e:
+        logger.error("No model available (%s)", e)
+        return finish(state) if out_of_time(config) else unavailable(state)
+    usage = log_usage(model_name, response)
+    _record_model(config, started, response, usage)
+    _record_usage(config, usage)
+
+    return {"messages": [response]}
+
+
+async def acall_model(state: AgentState, config: RunnableConfig) -> dict:
+    """Async call_model: awaits Claude without holding a thread.
+
+    The in-flight call (retries included) is cancelled when the turn's
+    deadline passes.
+    """
+    if out_of_time(config):
+        return await afinish(state, config)
+    budget = await sync_to_async(_budget)(config)
+    if budget == HARD:
+        return await aover_budget(state, config)
+    _, model_name, max_tokens = _model_choice(state, config, budget)
+    started = time.perf_counter()
+    try:
+        model_name, response = await asyncio.wait_for(
+            resilience.ainvoke(
+                _model_names(config, model_name),
+                lambda name: _bound_model(config, name, max_tokens),
+                _model_messages(state, config),
+                config,
+            ),
+            timeout=remaining_seconds(config),
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Model call cut off by the turn deadline")
+        return await afinish(state, config)
+    except ModelUnavailable as e:
+        logger.error("No model available (%s)", e)
+        return await aunavailable(state, config)
+    usage = log_usage(model_name, response)
+    _record_model(config, started, response, usage)
+    await sync_to_async(_record_usage)(config, usage)
 
     return {"messages": [response]}
 
 
 def execute_tools(state: AgentState, config: RunnableConfig) -> dict:
     """Execute tool calls from the model's response."""
-    user = config.get("configurable", {}).get("user")
     last_message = state["messages"][-1]
+    node_started = time.perf_counter()
 
     results = []
     for tool_call in last_message.tool_calls:
         func = TOOL_FUNCTIONS[tool_call["name"]]
-        # Inject user into the tool call
-        kwargs = tool_call["args"].copy()
-        kwargs["user"] = user
-        result = func(**kwargs)
-
-        from langchain_core.messages import ToolMessage
-
-        results.append(
-            ToolMessage(
-                content=str(result),
-                tool_call_id=tool_call["id"],
-                name=tool_call["name"],
-            )
-        )
-
+        started = time.perf_counter()
+        message = _tool_message(tool_call, _run_tool(func, tool_call, config))
+        _record_tool(config, tool_call, started, message)
+        if tool_call["name"] in WRITE_INVALIDATES:
+            # Bulk writes don't send the signals snapshot.py listens to
+            invalidate_snapshot(config["configurable"]["user"].pk)
+        results.append(message)
+
+    _record_tools(config, node_started)
     return {"messages": results}
 
 
-def should_continue(state: AgentState) -> str:
-    """Route based on whether the model wants to call tools."""
+async def aexecute_tools(state: AgentState, config: RunnableConfig) -> dict:
+    """Async execute_tools, running the tools on the tool pool.
+
+    Independent tool calls in one turn run concurrently; results keep the
+    order of the model's tool calls. Calls that share a row (see
+    TOOL_LOCKS) are serialized so they can't race each other.
+    """
     last_message = state["messages"][-1]
+    locks = {key: asyncio.Lock() for key in set(TOOL_LOCKS.values())}
+
+    async def run(tool_call: dict) -> ToolMessage:
+        # Progress events for streaming clients (see streaming.py)
+        event = {"name": tool_call["name"], "id": tool_call["id"]}
+        await adispatch_custom_event("tool_start", event, config=config)
+
+        func = ASYNC_TOOL_FUNCTIONS[tool_call["name"]]
+        lock = locks.get(TOOL_LOCKS.get(tool_call["name"]))
+        started = time.perf_counter()
+        if lock is None:
+            result = await _arun_tool(func, tool_call, config)
+        else:
+            async with lock:
+                result = await _arun_tool(func, tool_call, config)
+        message = _tool_message(tool_call, result)
+        _record_tool(config, tool_call, started, message)
+        if tool_call["name"] in WRITE_INVALIDATES:
+            await ainvalidate_snapshot(config["configurable"]["user"].pk)
+
+        await adispatch_custom_event("tool_end", event, config=config)
+        return message
+
+    node_started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run(tool_call) for tool_call in last_message.tool_calls)
+    )
+    _record_tools(config, node_started)
+    return {"messages": list(results)}
+
+
+def _trailing_tool_messages(state: AgentState) -> list[ToolMessage]:
+    messages = []
+    for message in reversed(state["messages"]):
+        if not isinstance(message, ToolMessage):
+            break
+        messages.append(message)
+    return list(reversed(messages))
+
+
+def _confirmation(state: AgentState) -> str | None:
+    """Reply rendered from this turn's tool results, if every call allows it."""
+    tool_messages = _trailing_tool_messages(state)
+    tool_calls = state["messages"][-len(tool_messages) - 1].tool_calls
+    if any(
+        call["name"] not in TERMINAL_TOOLS or call["args"].get("follow_up")
+        for call in tool_calls
+    ):
+        return None
+
+    replies = [render_reply(m.name, m.artifact or {}) for m in tool_messages]
+    if not replies or None in replies:
+        return None
+    return "\n\n".join(replies)
+
+
+def should_continue(state: AgentState, config: RunnableConfig) -> str:
+    """Route after the model and after tools.
+
+    After the model: run tools if it asked for any, otherwise finish.
+    After tools: finish with a rendered confirmation when every call was a
+    terminal-eligible write, otherwise go back to the model.
+    Once the turn's deadline or iteration budget is spent, end with the
+    best partial answer instead.
+    """
+    last_message = state["messages"][-1]
+    if isinstance(last_message, ToolMessage):
+        terminal = config.get("configurable", {}).get(
+            "terminal_tools", settings.AGENT_TERMINAL_TOOLS
+        )
+        if terminal and _confirmation(state) is not None:
+            return "confirm"
+        if exhausted(state["messages"], config):
+            return "finish"
+        return "model"
     if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+        if out_of_time(config):
+            return "finish"
         return "tools"
     return END
 
 
+def confirm(state: AgentState) -> dict:
+    """End a write-only turn with a templated confirmation."""
+    return {"messages": [AIMessage(content=_confirmation(state))]}
+
+
+async def aconfirm(state: AgentState, config: RunnableConfig) -> dict:
+    """Async confirm; streams the confirmation like model output."""
+    text = _confirmation(state)
+    await adispatch_custom_event("delta", {"content": text}, config=config)
+    return {"messages": [AIMessage(content=text)]}
+
+
+def finish(state: AgentState) -> dict:
+    """End a turn whose budget ran out with the best partial answer."""
+    return {"messages": [AIMessage(content=partial_answer(state["messages"]))]}
+
+
+async def afinish(state: AgentState, config: RunnableConfig) -> dict:
+    """Async finish; streams the partial answer like model output."""
+    text = partial_answer(state["messages"])
+    await adispatch_custom_event("delta", {"content": text}, config=config)
+    return {"messages": [AIMessage(content=text)]}
+
+
+def unavailable(state: AgentState) -> dict:
+    """End a turn no model could answer with what the tools did, or an apology."""
+    return {"messages": [AIMessage(content=partial_answer(state["messages"], UNAVAILABLE_MESSAGE))]}
+
+
+async def aunavailable(state: AgentState, config: RunnableConfig) -> dict:
+    """Async unavailable; streams the reply like model output."""
+    text = partial_answer(state["messages"], UNAVAILABLE_MESSAGE)
+    await adispatch_custom_event("delta", {"content": text}, config=config)
+    return {"messages": [AIMessage(content=text)]}
+
+
+def over_budget(state: AgentState) -> dict:
+    """End a turn past the user's hard token budget without calling Claude."""
+    return {"messages": [AIMessage(content=partial_answer(state["messages"], OVER_BUDGET_MESSAGE))]}
+
+
+async def aover_budget(state: AgentState, config: RunnableConfig) -> dict:
+    """Async over_budget; streams the reply like model output."""
+    text = partial_answer(state["messages"], OVER_BUDGET_MESSAGE)
+    await adispatch_custom_event("delta", {"content": text}, config=config)
+    return {"messages": [AIMessage(content=text)]}
+
+
 # --- Build the graph ---
 
 
-def build_graph() -> StateGraph:
-    """Build and compile the LangGraph agent."""
+def build_graph(async_mode: bool = False, checkpointer=None) -> StateGraph:
+    """Build and compile the LangGraph agent.
+
+    With async_mode the nodes are coroutines, so the compiled graph must be
+    run with ainvoke/astream. With a checkpointer, state is saved after
+    every node and runs need a thread_id in their configurable.
+    """
     graph = StateGraph(AgentState)
 
-    graph.add_node("model", call_model)
-    graph.add_node("tools", execute_tools)
+    graph.add_node("model", acall_model if async_mode else call_model)
+    graph.add_node("tools", aexecute_tools if async_mode else execute_tools)
+    graph.add_node("confirm", aconfirm if async_mode else confirm)
+    graph.add_node("finish", afinish if async_mode else finish)
 
     graph.set_entry_point("model")
     graph.add_conditional_edges("model", should_continue, {
         "tools": "tools",
+        "finish": "finish",
         END: END,
     })
-    graph.add_edge("tools", "model")
+    graph.add_conditional_edges("tools", should_continue, {
+        "model": "model",
+        "confirm": "confirm",
+        "finish": "finish",
+    })
+    graph.add_edge("confirm", END)
+    graph.add_edge("finish", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
-# Singleton compiled graph
+# Singleton compiled graphs
 agent = build_graph()
+async_agent = build_graph(async_mode=True)
+
+# Resumable variant used by the chat consumer when AGENT_CHECKPOINTS is on.
+# Only the async graph checkpoints: the sync graph saves from LangGraph's
+# worker threads, each of which would open its own database connection.
+async_checkpointed_agent = build_graph(async_mode=True, checkpointer=checkpointer)
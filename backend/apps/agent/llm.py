@@ -0,0 +1,162 @@
+"""
+Process-wide registry of tool-bound chat models.
+
+Building a ChatAnthropic and calling bind_tools() re-serializes every tool
+schema and creates a fresh HTTP client with no warm connections. The
+registry builds each (model, API key, max_tokens) combination once and
+hands the same bound model to every later call, so per-user keys reuse
+their keep-alive connections and precomputed tool schemas across turns.
+
+Entries are evicted least-recently-used beyond AGENT_MODEL_CACHE_SIZE and
+dropped after AGENT_MODEL_IDLE_SECONDS without use, so keys of users who
+have gone away don't pin clients forever.
+
+With AGENT_PROMPT_CACHING the tool definitions and system prompt are marked
+as Anthropic prompt-cache breakpoints. They're identical for every user and
+turn, so after the first call they're read from cache instead of being
+processed again.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from langchain_anthropic import ChatAnthropic
+from langchain_anthropic.chat_models import convert_to_anthropic_tool
+from langchain_core.messages import SystemMessage
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cacheable_tools(tools: list) -> list[dict]:
+    """Anthropic tool schemas with a cache breakpoint after the last one."""
+    schemas = [dict(convert_to_anthropic_tool(t)) for t in tools]
+    if schemas:
+        schemas[-1]["cache_control"] = CACHE_CONTROL
+    return schemas
+
+
+def system_message(prompt: str, extra: tuple[str, ...] = ()) -> SystemMessage:
+    """The system prompt as a message, cacheable when caching is on.
+
+    extra holds per-user text (e.g. the conversation summary). It goes
+    after the cache breakpoint so it doesn't invalidate the shared prefix.
+    """
+    extra = [text for text in extra if text]
+    if not settings.AGENT_PROMPT_CACHING:
+        return SystemMessage(content="\n\n".join([prompt, *extra]))
+    return SystemMessage(content=[
+        {"type": "text", "text": prompt, "cache_control": CACHE_CONTROL},
+        *({"type": "text", "text": text} for text in extra),
+    ])
+
+
+def api_key_id(api_key: str | None) -> str:
+    """A short, stable id for an API key, safe to use in cache keys and logs."""
+    return hashlib.sha256((api_key or "").encode()).hexdigest()[:16]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgets."""
+    return len(text) // 4 + 1
+
+
+def usage_of(response) -> dict:
+    """Token usage of a model response, including prompt-cache reads/writes."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return {
+        "input": usage.get("input_tokens", 0),
+        "output": usage.get("output_tokens", 0),
+        "cache_read": details.get("cache_read") or 0,
+        "cache_creation": details.get("cache_creation") or 0,
+    }
+
+
+def log_usage(model_name: str, response) -> dict:
+    """Log a model call's token usage and prompt-cache hit/miss counts."""
+    usage = usage_of(response)
+    logger.info(
+        "Model call %s: input=%s output=%s cache_read=%s cache_creation=%s",
+        model_name,
+        usage["input"],
+        usage["output"],
+        usage["cache_read"],
+        usage["cache_creation"],
+    )
+    return usage
+
+
+class ModelRegistry:
+    """LRU cache of bound models with idle expiry."""
+
+    def __init__(self, max_size: int, idle_seconds: float):
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict = OrderedDict()  # key -> (model, last_used)
+        self._lock = threading.Lock()
+
+    def get(self, model_name: str, api_key: str | None, max_tokens: int, tools: list):
+        """Return the bound model for this combination, building it if needed.
+
+        The agent binds one fixed tool list, so tools aren't part of the key.
+        """
+        key = (model_name, api_key, max_tokens)
+        now = time.monotonic()
+
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        # Build outside the lock; a rare duplicate build is harmless.
+        if settings.AGENT_PROMPT_CACHING:
+            tools = cacheable_tools(tools)
+        model = ChatAnthropic(
+            model=model_name,
+            anthropic_api_key=api_key,
+            max_tokens=max_tokens,
+            max_retries=0,  # resilience.py retries with backoff and fallback
+        ).bind_tools(tools)
+
+        with self._lock:
+            self._entries[key] = (model, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return model
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            key
+            for key, (_, last_used) in self._entries.items()
+            if now - last_used > self.idle_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+
+
+registry = ModelRegistry(
+    max_size=settings.AGENT_MODEL_CACHE_SIZE,
+    idle_seconds=settings.AGENT_MODEL_IDLE_SECONDS,
+)
+
+
+def get_chat_model(model_name: str, api_key: str | None, max_tokens: int, tools: list):
+    """Shortcut for registry.get()."""
+    return registry.get(model_name, api_key, max_tokens, tools)
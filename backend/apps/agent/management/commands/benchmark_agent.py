@@ -0,0 +1,73 @@
+"""
+Benchmark the agent offline with a scripted model in place of Claude.
+
+    python manage.py benchmark_agent
+    python manage.py benchmark_agent --mode consumer --concurrency 8 --latency-ms 300
+    python manage.py benchmark_agent --scenario journal --turns 200 --json
+
+Creates throwaway benchmark-N@wuwei.invalid users and deletes them after.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.agent.benchmark import SCENARIOS, run_consumer, run_graph
+
+
+class Command(BaseCommand):
+    help = "Measure agent latency, DB queries per turn and throughput without Anthropic."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode", choices=["graph", "consumer", "both"], default="both",
+            help="Drive agent.invoke directly, ChatConsumer over a WebSocket, or both.",
+        )
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios",
+            help="Scenario to run (repeatable). Default: all.",
+        )
+        parser.add_argument("--turns", type=int, default=50, help="Turns per scenario.")
+        parser.add_argument(
+            "--latency-ms", type=float, default=0,
+            help="Simulated model latency per call.",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="Concurrent WebSocket connections in consumer mode.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        by_name = {s.name: s for s in SCENARIOS}
+        names = options["scenarios"] or list(by_name)
+        unknown = set(names) - set(by_name)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        modes = ["graph", "consumer"] if options["mode"] == "both" else [options["mode"]]
+        latency = options["latency_ms"] / 1000
+        turns = options["turns"]
+
+        results = []
+        for name in names:
+            scenario = by_name[name]
+            for mode in modes:
+                if mode == "graph":
+                    result = run_graph(scenario, turns, latency)
+                else:
+                    result = run_consumer(scenario, turns, latency, options["concurrency"])
+                results.append(result.as_dict())
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        header = f"{'scenario':<16}{'mode':<10}{'turns':>7}{'p50 ms':>10}{'p99 ms':>10}{'queries':>9}{'turns/s':>10}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for r in results:
+            self.stdout.write(
+                f"{r['scenario']:<16}{r['mode']:<10}{r['turns']:>7}{r['p50_ms']:>10}"
+                f"{r['p99_ms']:>10}{r['queries_per_turn']:>9}{r['turns_per_second']:>10}"
+            )
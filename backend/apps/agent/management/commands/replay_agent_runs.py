@@ -0,0 +1,96 @@
+"""
+Replay recorded agent runs offline and diff them against the recording.
+
+    python manage.py replay_agent_runs
+    python manage.py replay_agent_runs path/to/run.json --json
+    python manage.py replay_agent_runs --save-baseline
+
+Runs are recorded when AGENT_RECORD_RATE > 0 (see apps/agent/recording.py).
+The recording holds no DB query count and its timings come from
+production hardware, so after a known-good change save a baseline and
+later replays diff against that instead.
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.agent.recording import diff, load_recording, recorded_stats, recording_paths, replay
+
+
+def _signed(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value:+g}"
+
+
+def _cell(value, delta) -> str:
+    """A replayed number with its change from the recording."""
+    return f"{value} ({_signed(delta)})"
+
+
+class Command(BaseCommand):
+    help = "Replay recorded agent runs against the current code and report regressions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "paths", nargs="*",
+            help="Recording files. Default: every recording in AGENT_RECORDINGS_DIR.",
+        )
+        parser.add_argument("--dir", help="Recordings directory to replay instead.")
+        parser.add_argument(
+            "--save-baseline", action="store_true",
+            help="Store this replay's numbers in each recording as its baseline.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+
+    def handle(self, *args, **options):
+        paths = [Path(p) for p in options["paths"]] or recording_paths(options["dir"])
+        if not paths:
+            raise CommandError("No recordings found.")
+
+        rows = []
+        for path in paths:
+            try:
+                recording = load_recording(path)
+            except (OSError, ValueError) as e:
+                raise CommandError(str(e))
+            result = replay(recording, name=path.name)
+            recorded = recorded_stats(recording)
+            replayed = result.stats()
+            rows.append({
+                "recording": path.name,
+                "error": result.error,
+                "recorded": recorded,
+                "replayed": replayed,
+                "diff": diff(recorded, replayed),
+                "mismatched_results": result.mismatched,
+            })
+            if options["save_baseline"] and not result.error:
+                recording["baseline"] = replayed
+                path.write_text(json.dumps(recording, default=str))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+
+        header = f"{'recording':<34}{'tools':>8}{'model':>8}{'queries':>10}{'ms excl. model':>16}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            replayed, delta = row["replayed"], row["diff"]
+            tools = sum(replayed["tool_calls"].values())
+            self.stdout.write(
+                f"{row['recording']:<34}"
+                f"{_cell(tools, sum(delta['tool_calls'].values())):>8}"
+                f"{_cell(replayed['model_calls'], delta['model_calls']):>8}"
+                f"{_cell(replayed['queries'], delta['queries']):>10}"
+                f"{_cell(replayed['elapsed_ms'], delta['elapsed_ms']):>16}"
+            )
+            for name, change in delta["tool_calls"].items():
+                self.stdout.write(f"    {name}: {_signed(change)} calls")
+            for name in row["mismatched_results"]:
+                self.stdout.write(self.style.WARNING(f"    {name}: result differs from the recording"))
+            if row["error"]:
+                self.stdout.write(self.style.ERROR(f"    diverged: {row['error']}"))
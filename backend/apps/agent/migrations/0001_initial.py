@@ -0,0 +1,81 @@
+# Generated by Django 5.2.10 on 2026-10-17 17:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="AgentCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("thread_id", models.CharField(max_length=100)),
+                (
+                    "checkpoint_ns",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("checkpoint_id", models.CharField(max_length=64)),
+                (
+                    "parent_checkpoint_id",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                ("type", models.CharField(max_length=32)),
+                ("checkpoint", models.BinaryField()),
+                ("metadata_type", models.CharField(max_length=32)),
+                ("metadata", models.BinaryField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="agent_agent_created_5d4703_idx"
+                    )
+                ],
+                "unique_together": {("thread_id", "checkpoint_ns", "checkpoint_id")},
+            },
+        ),
+        migrations.CreateModel(
+            name="AgentCheckpointWrite",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("thread_id", models.CharField(max_length=100)),
+                (
+                    "checkpoint_ns",
+                    models.CharField(blank=True, default="", max_length=255),
+                ),
+                ("checkpoint_id", models.CharField(max_length=64)),
+                ("task_id", models.CharField(max_length=64)),
+                ("task_path", models.CharField(blank=True, default="", max_length=255)),
+                ("idx", models.IntegerField()),
+                ("channel", models.CharField(max_length=255)),
+                ("type", models.CharField(max_length=32)),
+                ("value", models.BinaryField()),
+            ],
+            options={
+                "unique_together": {
+                    ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.10 on 2026-10-17 17:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("agent", "0001_initial"),
+        ("chat", "0002_conversation_summary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AgentRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("total_ms", models.PositiveIntegerField()),
+                ("model_ms", models.PositiveIntegerField()),
+                ("tools_ms", models.PositiveIntegerField()),
+                ("iterations", models.PositiveSmallIntegerField()),
+                ("input_tokens", models.PositiveIntegerField(default=0)),
+                ("output_tokens", models.PositiveIntegerField(default=0)),
+                ("cache_read_tokens", models.PositiveIntegerField(default=0)),
+                ("cache_creation_tokens", models.PositiveIntegerField(default=0)),
+                ("tool_timings", models.JSONField(blank=True, default=list)),
+                ("tool_cache_hits", models.PositiveSmallIntegerField(default=0)),
+                ("tool_cache_misses", models.PositiveSmallIntegerField(default=0)),
+                (
+                    "message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="chat.chatmessage",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="agent_agent_created_a1deda_idx"
+                    )
+                ],
+            },
+        ),
+    ]
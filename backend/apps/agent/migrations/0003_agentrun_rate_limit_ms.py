@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 18:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("agent", "0002_agentrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agentrun",
+            name="rate_limit_ms",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("agent", "0004_dailytokenusage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agentrun",
+            name="outcome",
+            field=models.CharField(
+                choices=[("ok", "ok"), ("timeout", "timeout"), ("error", "error")],
+                default="ok",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-17 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("agent", "0005_agentrun_outcome"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agentrun",
+            name="tool_result_tokens",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.db import models
+
+from .telemetry import OK, OUTCOMES
+
+
+class AgentCheckpoint(models.Model):
+    """A serialized LangGraph checkpoint (graph state after a step)."""
+
+    thread_id = models.CharField(max_length=100)
+    checkpoint_ns = models.CharField(max_length=255, blank=True, default="")
+    checkpoint_id = models.CharField(max_length=64)
+    parent_checkpoint_id = models.CharField(max_length=64, null=True, blank=True)
+    type = models.CharField(max_length=32)
+    checkpoint = models.BinaryField()
+    metadata_type = models.CharField(max_length=32)
+    metadata = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ["thread_id", "checkpoint_ns", "checkpoint_id"]
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self) -> str:
+        return f"Checkpoint {self.thread_id}/{self.checkpoint_id}"
+
+
+class AgentCheckpointWrite(models.Model):
+    """A pending write recorded by a node for a checkpoint's next step."""
+
+    thread_id = models.CharField(max_length=100)
+    checkpoint_ns = models.CharField(max_length=255, blank=True, default="")
+    checkpoint_id = models.CharField(max_length=64)
+    task_id = models.CharField(max_length=64)
+    task_path = models.CharField(max_length=255, blank=True, default="")
+    idx = models.IntegerField()
+    channel = models.CharField(max_length=255)
+    type = models.CharField(max_length=32)
+    value = models.BinaryField()
+
+    class Meta:
+        unique_together = ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]
+
+    def __str__(self) -> str:
+        return f"Write {self.thread_id}/{self.checkpoint_id} {self.channel}"
+
+
+class AgentRun(models.Model):
+    """Timings and token usage of one agent run (see telemetry.py)."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    # The user message this run answered
+    message = models.ForeignKey(
+        "chat.ChatMessage", on_delete=models.SET_NULL, null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    total_ms = models.PositiveIntegerField()
+    model_ms = models.PositiveIntegerField()
+    tools_ms = models.PositiveIntegerField()
+    # Time model calls waited for the API key's rate limit
+    rate_limit_ms = models.PositiveIntegerField(default=0)
+    iterations = models.PositiveSmallIntegerField()
+
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    cache_read_tokens = models.PositiveIntegerField(default=0)
+    cache_creation_tokens = models.PositiveIntegerField(default=0)
+    # Size of the tool results sent back to the model (see results.py)
+    tool_result_tokens = models.PositiveIntegerField(default=0)
+
+    tool_timings = models.JSONField(default=list, blank=True)  # [[name, ms], ...]
+    tool_cache_hits = models.PositiveSmallIntegerField(default=0)
+    tool_cache_misses = models.PositiveSmallIntegerField(default=0)
+
+    outcome = models.CharField(
+        max_length=10, choices=[(o, o) for o in OUTCOMES], default=OK
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self) -> str:
+        return f"Run {self.created_at:%Y-%m-%d %H:%M} ({self.user}) {self.total_ms}ms"
+
+
+class DailyTokenUsage(models.Model):
+    """One user's token usage for one day, rolled up from the counters in usage.py."""
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    date = models.DateField()
+
+    input_tokens = models.PositiveBigIntegerField(default=0)
+    output_tokens = models.PositiveBigIntegerField(default=0)
+    cache_read_tokens = models.PositiveBigIntegerField(default=0)
+    cache_creation_tokens = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        unique_together = ["user", "date"]
+        verbose_name_plural = "daily token usage"
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def __str__(self) -> str:
+        return f"{self.user} {self.date}: {self.total_tokens} tokens"
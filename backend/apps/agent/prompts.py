@@ -57,9 +57,10 @@ When the user mentions multiple tasks or items in a single rambling message, par
 into individual structured items:
 
 - **Todos**: If the user says "I need to call the doctor and pick up groceries and text \
-Krystle", call create_todo THREE separate times — once for each task. Clean up the language \
+Krystle", call create_todos ONCE with THREE tasks — one for each. Clean up the language \
 into concise actionable items (e.g. "Call the doctor", "Pick up groceries", "Text Krystle"). \
-Do not combine multiple tasks into a single todo.
+Do not combine multiple tasks into a single todo. Likewise, when the user finishes several \
+todos at once, call complete_todos once with one search per todo.
 
 - **Gratitude**: If the user rambles "grateful for good sleep, my caregivers, coffee, and \
 that the sun was out today", parse these into clean individual strings: \
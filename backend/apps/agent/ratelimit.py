@@ -0,0 +1,261 @@
+"""
+Distributed rate limiter for Anthropic calls.
+
+Anthropic limits requests and tokens per minute per API key, and chat
+turns, summary jobs and any later background work all spend the same
+key. Every model call first takes from two token buckets for its key:
+one request from the requests bucket (AGENT_RATE_LIMIT_RPM) and its
+estimated tokens from the tokens bucket (AGENT_RATE_LIMIT_TPM). Both
+refill continuously and hold at most a minute's worth. After the call
+settle() charges the difference between the estimate and the real usage.
+
+Interactive chat has priority: background jobs may not take a bucket
+below AGENT_RATE_LIMIT_BACKGROUND_RESERVE of its capacity, so there is
+always headroom for the user who is waiting.
+
+Buckets live in Redis (AGENT_RATE_LIMIT_URL, updated atomically by a Lua
+script) so web consumers and Celery workers share them; "memory://" keeps
+them in-process for single-process setups. If Redis is unreachable calls
+go through unlimited rather than failing.
+
+Time spent waiting is returned to the caller, recorded in the run's
+telemetry (AgentRun.rate_limit_ms) and logged.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+import redis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .llm import api_key_id, estimate_tokens
+from .streaming import message_text
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+# Buckets untouched this long are dropped from Redis
+BUCKET_TTL_SECONDS = 3600
+
+# KEYS: requests bucket, tokens bucket
+# ARGV: request capacity, request refill/s, token capacity, token refill/s,
+#       tokens wanted, reserve fraction, bucket TTL in seconds
+# Returns "0" after taking from both buckets, else the seconds to wait
+TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+
+local function level(key, capacity, rate)
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local current = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, current + (now - ts) * rate)
+end
+
+local function wait_for(current, wanted, capacity, rate, reserve)
+    if capacity <= 0 then return 0 end
+    local short = capacity * reserve + wanted - current
+    if short <= 0 then return 0 end
+    return short / rate
+end
+
+local request_capacity, request_rate = tonumber(ARGV[1]), tonumber(ARGV[2])
+local token_capacity, token_rate = tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens, reserve = tonumber(ARGV[5]), tonumber(ARGV[6])
+
+local requests = level(KEYS[1], request_capacity, request_rate)
+local available = level(KEYS[2], token_capacity, token_rate)
+local wait = math.max(
+    wait_for(requests, 1, request_capacity, request_rate, reserve),
+    wait_for(available, tokens, token_capacity, token_rate, reserve)
+)
+if wait > 0 then
+    return tostring(wait)
+end
+
+for i, pair in ipairs({{KEYS[1], requests - 1}, {KEYS[2], available - tokens}}) do
+    redis.call('HSET', pair[1], 'level', pair[2], 'ts', now)
+    redis.call('EXPIRE', pair[1], tonumber(ARGV[7]))
+end
+return "0"
+"""
+
+
+class RateLimited(Exception):
+    """The wait for capacity would exceed the caller's limit."""
+
+
+def _limits() -> tuple[float, float, float, float]:
+    """(request capacity, requests/s, token capacity, tokens/s)."""
+    rpm, tpm = settings.AGENT_RATE_LIMIT_RPM, settings.AGENT_RATE_LIMIT_TPM
+    return rpm, rpm / 60, tpm, tpm / 60
+
+
+def _reserve(priority: str) -> float:
+    return settings.AGENT_RATE_LIMIT_BACKGROUND_RESERVE if priority == BACKGROUND else 0.0
+
+
+def _wanted(tokens: int, reserve: float) -> int:
+    """Tokens to take, so one huge call can't wait forever."""
+    capacity = settings.AGENT_RATE_LIMIT_TPM
+    return min(tokens, int(capacity * (1 - reserve))) if capacity else tokens
+
+
+class RedisBuckets:
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._take = self._client.register_script(TAKE_SCRIPT)
+
+    def take(self, key: str, tokens: int, reserve: float) -> float:
+        wait = self._take(
+            keys=[f"{key}:requests", f"{key}:tokens"],
+            args=[*_limits(), tokens, reserve, BUCKET_TTL_SECONDS],
+        )
+        return float(wait)
+
+    def charge(self, key: str, tokens: int) -> None:
+        self._client.hincrbyfloat(f"{key}:tokens", "level", -tokens)
+
+
+class MemoryBuckets:
+    """The same buckets in-process, for single-process setups and tests."""
+
+    def __init__(self):
+        self._levels: dict[str, tuple[float, float]] = {}  # key -> (level, at)
+        self._lock = threading.Lock()
+
+    def _level(self, key: str, capacity: float, rate: float, now: float) -> float:
+        current, at = self._levels.get(key, (capacity, now))
+        return min(capacity, current + (now - at) * rate)
+
+    @staticmethod
+    def _wait(current: float, wanted: float, capacity: float, rate: float, reserve: float) -> float:
+        if capacity <= 0:
+            return 0.0
+        short = capacity * reserve + wanted - current
+        return max(short, 0) / rate
+
+    def take(self, key: str, tokens: int, reserve: float) -> float:
+        request_capacity, request_rate, token_capacity, token_rate = _limits()
+        now = time.monotonic()
+        with self._lock:
+            requests = self._level(f"{key}:requests", request_capacity, request_rate, now)
+            available = self._level(f"{key}:tokens", token_capacity, token_rate, now)
+            wait = max(
+                self._wait(requests, 1, request_capacity, request_rate, reserve),
+                self._wait(available, tokens, token_capacity, token_rate, reserve),
+            )
+            if wait > 0:
+                return wait
+            self._levels[f"{key}:requests"] = (requests - 1, now)
+            self._levels[f"{key}:tokens"] = (available - tokens, now)
+            return 0.0
+
+    def charge(self, key: str, tokens: int) -> None:
+        with self._lock:
+            current, at = self._levels.get(f"{key}:tokens", (settings.AGENT_RATE_LIMIT_TPM, time.monotonic()))
+            self._levels[f"{key}:tokens"] = (current - tokens, at)
+
+
+_buckets: dict[str, object] = {}
+_buckets_lock = threading.Lock()
+
+
+def buckets():
+    """The bucket store for AGENT_RATE_LIMIT_URL."""
+    url = settings.AGENT_RATE_LIMIT_URL
+    with _buckets_lock:
+        if url not in _buckets:
+            _buckets[url] = MemoryBuckets() if url.startswith("memory://") else RedisBuckets(url)
+        return _buckets[url]
+
+
+def enabled() -> bool:
+    return bool(settings.AGENT_RATE_LIMIT_RPM or settings.AGENT_RATE_LIMIT_TPM)
+
+
+def estimate(messages: list, max_tokens: int = 0) -> int:
+    """Tokens a call will likely use: its prompt plus max_tokens of output."""
+    return sum(estimate_tokens(message_text(m.content)) for m in messages) + max_tokens
+
+
+def _key(api_key: str | None) -> str:
+    return f"agent:ratelimit:{api_key_id(api_key)}"
+
+
+def _take(api_key: str | None, tokens: int, priority: str) -> float:
+    reserve = _reserve(priority)
+    try:
+        return buckets().take(_key(api_key), _wanted(tokens, reserve), reserve)
+    except redis.RedisError as e:
+        logger.warning("Rate limiter unavailable, not limiting: %s", e)
+        return 0.0
+
+
+def acquire(api_key: str | None, tokens: int, priority: str = INTERACTIVE, max_wait: float | None = None) -> float:
+    """Wait until the key has capacity for one call of tokens, then take it.
+
+    Returns the seconds waited. Raises RateLimited instead of waiting
+    past max_wait.
+    """
+    if not enabled():
+        return 0.0
+    started = time.monotonic()
+    waited = 0.0
+    while (wait := _take(api_key, tokens, priority)) > 0:
+        _check_wait(waited + wait, max_wait, priority)
+        time.sleep(wait)
+        waited = time.monotonic() - started
+    return _log_wait(waited, priority)
+
+
+async def aacquire(
+    api_key: str | None, tokens: int, priority: str = INTERACTIVE, max_wait: float | None = None
+) -> float:
+    """Async acquire; waits without holding a thread."""
+    if not enabled():
+        return 0.0
+    started = time.monotonic()
+    waited = 0.0
+    while (wait := await sync_to_async(_take, thread_sensitive=False)(api_key, tokens, priority)) > 0:
+        _check_wait(waited + wait, max_wait, priority)
+        await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+    return _log_wait(waited, priority)
+
+
+def _check_wait(total: float, max_wait: float | None, priority: str) -> None:
+    if max_wait is not None and total > max_wait:
+        raise RateLimited(f"{priority} call would wait {total:.1f}s")
+
+
+def _log_wait(waited: float, priority: str) -> float:
+    if waited:
+        logger.info("Rate limiter held a %s call for %.0fms", priority, waited * 1000)
+    return waited
+
+
+def release(api_key: str | None, tokens: int) -> None:
+    """Give back the tokens taken for a call that was cancelled unanswered."""
+    if not enabled() or not tokens:
+        return
+    try:
+        buckets().charge(_key(api_key), -tokens)
+    except redis.RedisError as e:
+        logger.warning("Rate limiter unavailable, not releasing tokens: %s", e)
+
+
+def settle(api_key: str | None, estimated: int, response) -> None:
+    """Charge the key for the call's real token usage beyond the estimate."""
+    usage = getattr(response, "usage_metadata", None)
+    if not enabled() or not usage:
+        return
+    try:
+        buckets().charge(_key(api_key), usage.get("total_tokens", 0) - estimated)
+    except redis.RedisError as e:
+        logger.warning("Rate limiter unavailable, not charging usage: %s", e)
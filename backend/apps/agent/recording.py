@@ -0,0 +1,329 @@
+"""
+Record-and-replay of agent runs, for performance regression testing.
+
+With AGENT_RECORD_RATE above zero, that share of chat turns carries a
+RunRecorder in its configurable (like the ToolCache and RunTelemetry).
+The graph nodes record every model response and tool call into it, and
+after the run the consumer writes it as one JSON file to
+AGENT_RECORDINGS_DIR: the input messages, the context snapshot and the
+user's data as the turn found it, each model response with its tool
+calls and timing, each tool result with its timing, and the total.
+
+replay() re-executes a recording on a fresh graph from build_graph(),
+with a ScriptedChatModel replaying the recorded model responses, so no
+network is needed. Tools run for real against the database, as a
+throwaway user seeded with the recorded data (dates kept relative to the
+recording day), and the replay is diffed against the recording: tool
+calls per tool, model calls, DB queries, time spent outside the model,
+and tool results that came out differently. Run it with
+`manage.py replay_agent_runs`.
+"""
+
+import json
+import logging
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone as django_timezone
+from langchain_core.messages import message_to_dict, messages_from_dict, messages_to_dict
+
+from .telemetry import OK, ms_since
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+
+# Days of entries and check-ins (and of completed todos) kept with a recording
+USER_DATA_DAYS = 30
+
+CHECKIN_FIELDS = ("meditation_completed", "meditation_duration", "gratitude_completed", "journal_completed")
+
+# Replayed rows get new ids and dates move with the replay day
+_ID = re.compile(r'"id":\d+')
+_DATE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+
+
+class ReplayDiverged(Exception):
+    """The replayed run asked for something the recording doesn't have."""
+
+
+@dataclass
+class RunRecorder:
+    inputs: list
+    conversation_summary: str = ""
+    user_context: str = ""
+    user_data: dict = field(default_factory=dict)  # see capture_user_data
+    started: float = field(default_factory=time.perf_counter)
+    model_calls: list = field(default_factory=list)  # [{"message": ..., "ms": ...}]
+    tool_calls: list = field(default_factory=list)  # [{"name", "args", "result", "ms"}]
+    outcome: str = OK  # see telemetry.OUTCOMES
+
+    def record_model(self, message, ms: float) -> None:
+        self.model_calls.append({"message": message_to_dict(message), "ms": round(ms, 1)})
+
+    def record_tool(self, tool_call: dict, result: str, ms: float) -> None:
+        self.tool_calls.append({
+            "name": tool_call["name"],
+            "args": tool_call["args"],
+            "result": result,
+            "ms": round(ms, 1),
+        })
+
+    def as_dict(self) -> dict:
+        return {
+            "version": RECORDING_VERSION,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "conversation_summary": self.conversation_summary,
+            "user_context": self.user_context,
+            "user_data": self.user_data,
+            "inputs": messages_to_dict(self.inputs),
+            "model_calls": self.model_calls,
+            "tool_calls": self.tool_calls,
+            "total_ms": round(ms_since(self.started), 1),
+            "outcome": self.outcome,
+        }
+
+
+def recorder_of(config) -> Optional[RunRecorder]:
+    return config.get("configurable", {}).get("recorder")
+
+
+def capture_user_data(user) -> dict:
+    """The rows the tools read, as of now: todos, mantras, and the last
+    USER_DATA_DAYS days of entries and check-ins. Dates are stored as days
+    from today."""
+    from apps.journal.models import DailyCheckin, GratitudeEntry, JournalEntry
+    from apps.mantras.models import Mantra
+    from apps.todos.models import Todo
+
+    today = date.today()
+    since = today - timedelta(days=USER_DATA_DAYS)
+
+    def day(value: Optional[date]) -> Optional[int]:
+        return None if value is None else (value - today).days
+
+    todos = Todo.objects.filter(user=user).filter(
+        Q(completed=False) | Q(completed_at__date__gte=since)
+    ).order_by("created_at")
+    recent = {"user": user, "date__gte": since}
+    return {
+        "today": str(today),
+        "todos": [
+            {"task": t.task, "due_date": day(t.due_date), "completed": t.completed} for t in todos
+        ],
+        "mantras": [
+            {"content": m.content, "order": m.order}
+            for m in Mantra.objects.filter(user=user).order_by("created_at")
+        ],
+        "journal": [
+            {"date": day(e.date), "content": e.content, "reflection": e.reflection}
+            for e in JournalEntry.objects.filter(**recent)
+        ],
+        "gratitude": [
+            {"date": day(g.date), "items": g.items} for g in GratitudeEntry.objects.filter(**recent)
+        ],
+        "checkins": [
+            {"date": day(c.date), **{name: getattr(c, name) for name in CHECKIN_FIELDS}}
+            for c in DailyCheckin.objects.filter(**recent)
+        ],
+    }
+
+
+def seed_user(user, data: dict) -> None:
+    """Recreate captured user data for user, moved to today."""
+    from apps.journal.models import DailyCheckin, GratitudeEntry, JournalEntry
+    from apps.mantras.models import Mantra
+    from apps.todos.models import Todo
+
+    today = date.today()
+    now = django_timezone.now()
+
+    def day(offset: Optional[int]) -> Optional[date]:
+        return None if offset is None else today + timedelta(days=offset)
+
+    # One at a time, oldest first, so created_at keeps the recorded order
+    for todo in data.get("todos", []):
+        Todo.objects.create(
+            user=user, task=todo["task"], due_date=day(todo["due_date"]),
+            completed=todo["completed"], completed_at=now if todo["completed"] else None,
+        )
+    for mantra in data.get("mantras", []):
+        Mantra.objects.create(user=user, **mantra)
+    JournalEntry.objects.bulk_create([
+        JournalEntry(user=user, date=day(e["date"]), content=e["content"], reflection=e["reflection"])
+        for e in data.get("journal", [])
+    ])
+    GratitudeEntry.objects.bulk_create([
+        GratitudeEntry(user=user, date=day(g["date"]), items=g["items"])
+        for g in data.get("gratitude", [])
+    ])
+    DailyCheckin.objects.bulk_create([
+        DailyCheckin(user=user, date=day(c["date"]), **{name: c[name] for name in CHECKIN_FIELDS})
+        for c in data.get("checkins", [])
+    ])
+
+
+def _comparable(result: str, today: date) -> str:
+    """A tool result with ids masked and dates made relative to today."""
+    def relative(match) -> str:
+        try:
+            return f"day{(date.fromisoformat(match.group()) - today).days:+d}"
+        except ValueError:
+            return match.group()
+
+    return _DATE.sub(relative, _ID.sub('"id":_', result))
+
+
+def mismatched_results(recorded: list, replayed: list, recorded_today: date) -> list[str]:
+    """Names of replayed tool calls whose result differs from the recorded one."""
+    return [
+        new["name"]
+        for old, new in zip(recorded, replayed)
+        if _comparable(old["result"], recorded_today) != _comparable(new["result"], date.today())
+    ]
+
+
+def save_recording(recorder: RunRecorder, directory: Optional[str] = None) -> Path:
+    """Write a finished run to its own JSON file."""
+    path = Path(directory or settings.AGENT_RECORDINGS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    target = path / f"{stamp}-{uuid.uuid4().hex[:8]}.json"
+    # Tool args can hold dates and the like
+    target.write_text(json.dumps(recorder.as_dict(), default=str))
+    logger.info("Recorded agent run to %s", target)
+    return target
+
+
+def load_recording(path) -> dict:
+    recording = json.loads(Path(path).read_text())
+    if recording.get("version") != RECORDING_VERSION:
+        raise ValueError(f"{path}: unsupported recording version {recording.get('version')}")
+    return recording
+
+
+def recording_paths(directory: Optional[str] = None) -> list[Path]:
+    return sorted(Path(directory or settings.AGENT_RECORDINGS_DIR).glob("*.json"))
+
+
+@dataclass
+class ReplayResult:
+    name: str
+    tool_calls: Counter = field(default_factory=Counter)
+    model_calls: int = 0
+    queries: int = 0
+    elapsed_ms: float = 0.0
+    error: str = ""
+    # Tool calls whose result differs from the recording's
+    mismatched: list = field(default_factory=list)
+
+    def stats(self) -> dict:
+        return {
+            "tool_calls": dict(self.tool_calls),
+            "model_calls": self.model_calls,
+            "queries": self.queries,
+            "elapsed_ms": round(self.elapsed_ms, 1),
+        }
+
+
+def recorded_stats(recording: dict) -> dict:
+    """What the recording says the run did.
+
+    elapsed_ms excludes model time, since the replay's model answers
+    instantly. Recordings don't count DB queries; a saved baseline does.
+    """
+    if "baseline" in recording:
+        return recording["baseline"]
+    model_ms = sum(call["ms"] for call in recording["model_calls"])
+    return {
+        "tool_calls": dict(Counter(call["name"] for call in recording["tool_calls"])),
+        "model_calls": len(recording["model_calls"]),
+        "queries": None,
+        "elapsed_ms": round(recording["total_ms"] - model_ms, 1),
+    }
+
+
+def _responses(recording: dict):
+    for call in recording["model_calls"]:
+        yield messages_from_dict([call["message"]])[0]
+    raise ReplayDiverged("the graph asked the model for more responses than were recorded")
+
+
+def replay(recording: dict, name: str = "") -> ReplayResult:
+    """Re-run a recording on a fresh graph and measure it."""
+    from .benchmark import QueryCounter, benchmark_users, delete_benchmark_users
+    from .fakes import ScriptedChatModel
+    from .graph import TOOL_FUNCTIONS, build_graph
+    from .telemetry import RunTelemetry
+    from .tool_cache import ToolCache
+
+    result = ReplayResult(name)
+    unknown = {call["name"] for call in recording["tool_calls"]} - TOOL_FUNCTIONS.keys()
+    if unknown:
+        result.error = f"unknown tools: {', '.join(sorted(unknown))}"
+        return result
+
+    graph = build_graph()
+    (user,) = benchmark_users(1)
+    user_data = recording.get("user_data")
+    telemetry = RunTelemetry()
+    inputs = {"messages": messages_from_dict(recording["inputs"])}
+    recorder = RunRecorder(inputs["messages"])
+    config = {"configurable": {
+        "user": user,
+        "chat_model": ScriptedChatModel(messages=_responses(recording)),
+        "conversation_summary": recording["conversation_summary"],
+        "user_context": recording.get("user_context", ""),
+        "tool_cache": ToolCache(),
+        "telemetry": telemetry,
+        "recorder": recorder,
+    }}
+
+    try:
+        if user_data:
+            seed_user(user, user_data)
+        with QueryCounter() as queries:
+            started = time.perf_counter()
+            try:
+                graph.invoke(inputs, config)
+            except ReplayDiverged as e:
+                result.error = str(e)
+            result.elapsed_ms = ms_since(started)
+        result.queries = queries.count
+    finally:
+        delete_benchmark_users()
+
+    result.tool_calls = Counter(name for name, _ in telemetry.tool_timings)
+    result.model_calls = telemetry.iterations
+    # Older recordings have no user data, so their results can't match
+    if user_data:
+        result.mismatched = mismatched_results(
+            recording["tool_calls"], recorder.tool_calls, date.fromisoformat(user_data["today"])
+        )
+    return result
+
+
+def diff(recorded: dict, replayed: dict) -> dict:
+    """Replayed minus recorded, per measure (None where unknown)."""
+    tools = set(recorded["tool_calls"]) | set(replayed["tool_calls"])
+    tool_diff = {
+        name: replayed["tool_calls"].get(name, 0) - recorded["tool_calls"].get(name, 0)
+        for name in sorted(tools)
+    }
+    return {
+        "tool_calls": {name: delta for name, delta in tool_diff.items() if delta},
+        "model_calls": replayed["model_calls"] - recorded["model_calls"],
+        "queries": (
+            None if recorded["queries"] is None
+            else replayed["queries"] - recorded["queries"]
+        ),
+        "elapsed_ms": round(replayed["elapsed_ms"] - recorded["elapsed_ms"], 1),
+    }
@@ -0,0 +1,104 @@
+"""
+Templated replies rendered from tool results.
+
+Used wherever a confirmation can be produced without asking Claude: the
+fast-path router, and the graph's confirm node after write-only tool turns.
+Each template returns None when the result isn't a clean success, which
+hands the turn (back) to the model.
+"""
+
+from typing import Callable, Optional
+
+
+def _meditation_reply(result: dict) -> Optional[str]:
+    if not result.get("logged"):
+        return None
+    if result.get("duration"):
+        return f"Logged your meditation — {result['duration']} minutes."
+    return "Logged your meditation."
+
+
+def _gratitude_reply(result: dict) -> Optional[str]:
+    if not result.get("saved"):
+        return None
+    items = result.get("items", [])
+    return "Saved your gratitude list:\n" + "\n".join(f"- {i}" for i in items)
+
+
+def _todos_reply(result: dict) -> Optional[str]:
+    todos = result.get("todos", [])
+    if not todos:
+        return "Your todo list is clear."
+    lines = []
+    for todo in todos:
+        due = f" (due {todo['due_date']})" if todo.get("due_date") else ""
+        lines.append(f"- {todo['task']}{due}")
+    return "Here's what's on your list:\n" + "\n".join(lines)
+
+
+def _mantras_reply(result: dict) -> Optional[str]:
+    mantras = result.get("mantras", [])
+    if not mantras:
+        return "You don't have any mantras yet."
+    return "Your mantras:\n" + "\n".join(f"- {m['content']}" for m in mantras)
+
+
+def _created_reply(result: dict) -> Optional[str]:
+    if not result.get("created"):
+        return None
+    return f"Added “{result['task']}” to your todos."
+
+
+def _created_many_reply(result: dict) -> Optional[str]:
+    todos = result.get("todos", [])
+    if not todos:
+        return None
+    lines = []
+    for todo in todos:
+        due = f" (due {todo['due_date']})" if todo.get("due_date") else ""
+        lines.append(f"- {todo['task']}{due}")
+    return "Added to your todos:\n" + "\n".join(lines)
+
+
+def _completed_reply(result: dict) -> Optional[str]:
+    if not result.get("completed"):
+        return None
+    return f"Marked “{result['task']}” complete."
+
+
+def _completed_many_reply(result: dict) -> Optional[str]:
+    # Misses and ambiguous searches need the model to follow up
+    if result.get("ambiguous") or result.get("not_found"):
+        return None
+    tasks = result.get("completed", [])
+    if not tasks:
+        return None
+    return "Marked complete:\n" + "\n".join(f"- {t}" for t in tasks)
+
+
+def _mantra_reply(result: dict) -> Optional[str]:
+    if not result.get("added"):
+        return None
+    return f"Added your mantra: “{result['content']}”"
+
+
+REPLIES: dict[str, Callable[[dict], Optional[str]]] = {
+    "log_meditation": _meditation_reply,
+    "save_gratitude_list": _gratitude_reply,
+    "get_todos": _todos_reply,
+    "get_mantras": _mantras_reply,
+    "create_todo": _created_reply,
+    "create_todos": _created_many_reply,
+    "complete_todo": _completed_reply,
+    "complete_todos": _completed_many_reply,
+    "add_mantra": _mantra_reply,
+}
+
+
+def render_reply(tool_name: str, result: dict) -> Optional[str]:
+    """Confirmation text for one tool result, or None if there's no template
+    or the result needs the model's judgement."""
+    template = REPLIES.get(tool_name)
+    if template is None:
+        return None
+    return template(result)
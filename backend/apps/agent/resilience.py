@@ -0,0 +1,435 @@
+"""
+Resilient model calls.
+
+When Anthropic is slow or overloaded, a bare model call hangs until the
+turn's deadline and then fails. Every model call in the graph goes
+through here instead:
+
+- retryable errors (429, 5xx including 529 overloaded, connection
+  errors) are retried AGENT_MODEL_RETRIES times with full-jitter
+  exponential backoff
+- an attempt with no answer (or, when streaming, no first token) after
+  AGENT_HEDGE_SECONDS gets a hedged twin request; whichever answers first
+  wins and the other is cancelled
+- when the chosen model stays unavailable, AGENT_FALLBACK_MODEL answers
+- a circuit breaker per (API key, model) opens after
+  AGENT_BREAKER_FAILURES failures within AGENT_BREAKER_WINDOW_SECONDS.
+  While open, calls to that model fail fast; after
+  AGENT_BREAKER_COOLDOWN_SECONDS one trial call is let through
+- every attempt, hedged twins included, first takes capacity from the
+  API key's rate-limit buckets (see ratelimit.py); a twin is only sent
+  when there is capacity to spare. Both calls of a hedged pair are
+  settled: the loser against its own usage if it answers anyway, or by
+  handing its tokens back if it is cancelled first.
+- an async attempt that fails after streaming part of its reply sends a
+  "reset" event so the client and the saved reply drop that text; later
+  attempts in the call don't stream and send their text as one delta.
+
+If no model can answer, ModelUnavailable is raised and the graph replies
+with a friendly message instead of an error. Breaker state lives in
+Django's cache (Redis), so all workers share it. The SDK's own retries
+are off (see llm.py) so only this layer retries.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextvars import Context, copy_context
+from typing import Callable
+
+import anthropic
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.runnables.config import ensure_config
+
+from . import ratelimit
+from .budget import out_of_time, remaining_seconds
+from .llm import api_key_id
+from .streaming import message_text
+from .telemetry import telemetry_of
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SECONDS = 8.0
+
+UNAVAILABLE_MESSAGE = (
+    "I can't reach my thoughts right now — the AI service is overloaded. "
+    "Please try again in a minute."
+)
+
+# Sync hedged requests run here so the caller can wait on both at once
+_hedge_pool = ThreadPoolExecutor(
+    max_workers=settings.AGENT_MAX_WORKERS, thread_name_prefix="agent-hedge"
+)
+
+
+class ModelUnavailable(Exception):
+    """No candidate model could answer: all failed or their breakers are open."""
+
+
+# Errors the API can report as an event partway through a 200 stream
+RETRYABLE_STREAM_ERRORS = {"overloaded_error", "api_error", "rate_limit_error"}
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Errors worth another try: overload, rate limits, server and network errors."""
+    if isinstance(exc, anthropic.APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(exc, anthropic.APIStatusError):
+        if exc.status_code == 200:
+            error = exc.body.get("error") if isinstance(exc.body, dict) else None
+            return isinstance(error, dict) and error.get("type") in RETRYABLE_STREAM_ERRORS
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Full jitter: uniform over [0, base * 2**attempt], capped."""
+    ceiling = min(settings.AGENT_RETRY_BASE_SECONDS * 2 ** attempt, MAX_BACKOFF_SECONDS)
+    return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Failure count and open/half-open state for one API key and model.
+
+    Cache errors never block a call: without shared state the breaker
+    simply stays closed.
+    """
+
+    def __init__(self, api_key: str | None, model_name: str):
+        self.model_name = model_name
+        self._prefix = f"agent:breaker:{api_key_id(api_key)}:{model_name}"
+
+    def _key(self, part: str) -> str:
+        return f"{self._prefix}:{part}"
+
+    def allow(self) -> bool:
+        """False while open; once the cooldown ends, one trial call at a time."""
+        try:
+            if cache.get(self._key("open")):
+                return False
+            if cache.get(self._key("tripped")):
+                return cache.add(self._key("trial"), 1, settings.AGENT_BREAKER_COOLDOWN_SECONDS)
+            return True
+        except Exception as e:
+            logger.warning("Circuit breaker state unavailable, allowing call: %s", e)
+            return True
+
+    def record_success(self) -> None:
+        try:
+            cache.delete_many([self._key("failures"), self._key("tripped"), self._key("trial")])
+        except Exception as e:
+            logger.warning("Could not reset circuit breaker: %s", e)
+
+    def record_failure(self) -> bool:
+        """Count a failure; True if the breaker is now open."""
+        try:
+            if cache.get(self._key("tripped")):
+                # The trial call after a cooldown failed
+                self._open()
+                return True
+            cache.add(self._key("failures"), 0, settings.AGENT_BREAKER_WINDOW_SECONDS)
+            if cache.incr(self._key("failures")) >= settings.AGENT_BREAKER_FAILURES:
+                self._open()
+                return True
+        except Exception as e:
+            logger.warning("Could not record circuit breaker failure: %s", e)
+        return False
+
+    def _open(self) -> None:
+        cooldown = settings.AGENT_BREAKER_COOLDOWN_SECONDS
+        logger.warning("Circuit breaker open for %s for %ss", self.model_name, cooldown)
+        cache.set(self._key("open"), True, cooldown)
+        # Outlives the cooldown so the next call is a single trial
+        cache.set(self._key("tripped"), True, cooldown + settings.AGENT_BREAKER_WINDOW_SECONDS)
+        cache.delete_many([self._key("failures"), self._key("trial")])
+
+
+def _api_key(config) -> str | None:
+    return config.get("configurable", {}).get("anthropic_api_key")
+
+
+def _limited(config) -> bool:
+    """Injected chat models (benchmarks, replays) don't spend API capacity."""
+    return config.get("configurable", {}).get("chat_model") is None
+
+
+def _record_wait(config, waited: float) -> None:
+    telemetry = telemetry_of(config)
+    if telemetry is not None:
+        telemetry.record_rate_limit(waited * 1000)
+
+
+def _settle(config, estimated: int, response) -> None:
+    if _limited(config):
+        ratelimit.settle(_api_key(config), estimated, response)
+
+
+def _release(config, estimated: int) -> None:
+    if _limited(config):
+        ratelimit.release(_api_key(config), estimated)
+
+
+def _settle_loser(config, estimated: int, call) -> None:
+    """Settle the dropped call of a hedged pair (a finished future or task)."""
+    if call.cancelled():
+        _release(config, estimated)
+    elif call.exception() is None:
+        _settle(config, estimated, call.result())
+
+
+def _unavailable(model_names: list[str], e: ratelimit.RateLimited) -> ModelUnavailable:
+    logger.warning("Rate limited until the deadline: %s", e)
+    return ModelUnavailable(f"{', '.join(model_names)} (rate limited)")
+
+
+# --- Sync ---
+
+
+def _acquire(config, messages: list) -> int:
+    """Wait for rate-limit capacity for one call; returns the estimated tokens."""
+    if not _limited(config):
+        return 0
+    tokens = ratelimit.estimate(messages)
+    waited = ratelimit.acquire(_api_key(config), tokens, max_wait=remaining_seconds(config))
+    _record_wait(config, waited)
+    return tokens
+
+
+def _spare_capacity(config, messages: list) -> bool:
+    """Take capacity for a hedged twin only if it is there right now."""
+    if not _limited(config):
+        return True
+    try:
+        ratelimit.acquire(_api_key(config), ratelimit.estimate(messages), max_wait=0)
+    except ratelimit.RateLimited:
+        return False
+    return True
+
+
+def _hedged(model, messages: list, timeout: float | None, config, estimated: int):
+    """model.invoke, with a twin request if the first is slower than the SLO.
+
+    Both calls reserve estimated tokens, so the caller settles the winner
+    against its own reservation and the loser is settled here.
+    """
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    hedge = settings.AGENT_HEDGE_SECONDS
+    if not hedge or (timeout is not None and timeout <= hedge):
+        return model.invoke(messages, **kwargs)
+
+    first = _hedge_pool.submit(copy_context().run, model.invoke, messages, **kwargs)
+    try:
+        return first.result(timeout=hedge)
+    except FutureTimeoutError:
+        pass
+    if not _spare_capacity(config, messages):
+        return first.result()
+    logger.info("Model call slower than %ss, sending a hedged request", hedge)
+    if timeout is not None:
+        kwargs["timeout"] = timeout - hedge
+    second = _hedge_pool.submit(copy_context().run, model.invoke, messages, **kwargs)
+
+    pending = {first, second}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                # A running loser can't be stopped; its answer is dropped,
+                # and its usage settled once it is in
+                loser = second if future is first else first
+                loser.cancel()
+                loser.add_done_callback(lambda call: _settle_loser(config, estimated, call))
+                return future.result()
+    raise first.exception()
+
+
+def invoke(model_names: list[str], get_model: Callable, messages: list, config) -> tuple[str, object]:
+    """Call the first available model, retrying and falling back.
+
+    Returns (model name, response). A timeout that the turn's deadline
+    imposed is re-raised as is, since retrying can't beat the deadline.
+    """
+    for model_name in model_names:
+        breaker = CircuitBreaker(_api_key(config), model_name)
+        if not breaker.allow():
+            logger.warning("Skipping %s: circuit breaker open", model_name)
+            continue
+        model = get_model(model_name)
+
+        for attempt in range(settings.AGENT_MODEL_RETRIES + 1):
+            try:
+                estimated = _acquire(config, messages)
+            except ratelimit.RateLimited as e:
+                raise _unavailable(model_names, e) from e
+            timeout = remaining_seconds(config)
+            try:
+                response = _hedged(model, messages, timeout, config, estimated)
+            except Exception as e:
+                if isinstance(e, anthropic.APITimeoutError) and timeout is not None:
+                    raise
+                if not is_retryable(e):
+                    raise
+                logger.warning("Model call to %s failed (attempt %s): %s", model_name, attempt + 1, e)
+                if breaker.record_failure() or out_of_time(config):
+                    break
+                if attempt < settings.AGENT_MODEL_RETRIES:
+                    delay = backoff_seconds(attempt)
+                    remaining = remaining_seconds(config)
+                    time.sleep(delay if remaining is None else min(delay, remaining))
+                continue
+            breaker.record_success()
+            _settle(config, estimated, response)
+            return model_name, response
+
+        if out_of_time(config):
+            break
+    raise ModelUnavailable(", ".join(model_names))
+
+
+# --- Async ---
+
+
+async def _aacquire(config, messages: list) -> int:
+    if not _limited(config):
+        return 0
+    tokens = ratelimit.estimate(messages)
+    waited = await ratelimit.aacquire(_api_key(config), tokens, max_wait=remaining_seconds(config))
+    _record_wait(config, waited)
+    return tokens
+
+
+async def _aspare_capacity(config, messages: list) -> bool:
+    return await sync_to_async(_spare_capacity, thread_sensitive=False)(config, messages)
+
+
+class _FirstToken(AsyncCallbackHandler):
+    """Notices when a streaming call produces its first token."""
+
+    def __init__(self):
+        self.seen = asyncio.Event()
+
+    async def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.seen.set()
+
+
+def _with_handler(handler):
+    """The current run's callbacks plus handler."""
+    callbacks = ensure_config().get("callbacks")
+    if callbacks is None:
+        return [handler]
+    if isinstance(callbacks, list):
+        return [*callbacks, handler]
+    manager = callbacks.copy()
+    manager.add_handler(handler, inherit=False)
+    return manager
+
+
+async def _send_whole(response, config) -> None:
+    """Send a response that didn't stream as one delta."""
+    text = message_text(response.content)
+    if text:
+        await adispatch_custom_event("delta", {"content": text}, config=config)
+
+
+async def _aquiet(model, messages: list, config):
+    """model.ainvoke outside the run's callbacks, so nothing streams."""
+    # An empty context: no inherited callbacks
+    response = await asyncio.create_task(model.ainvoke(messages), context=Context())
+    await _send_whole(response, config)
+    return response
+
+
+async def _ahedged(model, messages: list, config, streaming: _FirstToken, estimated: int):
+    """model.ainvoke, with a twin request if no token arrives within the SLO.
+
+    The twin runs outside the run's callbacks so it can't stream over
+    the first call's text; if it wins, its text is sent as one delta. Once the first
+    call has streamed a token it is kept and the twin is dropped.
+    streaming is set once the first call streams a token.
+    Both calls reserve estimated tokens; the caller settles the winner
+    and the cancelled loser's tokens are handed back here.
+    """
+    first = asyncio.ensure_future(
+        model.ainvoke(messages, config={"callbacks": _with_handler(streaming)})
+    )
+    hedge = settings.AGENT_HEDGE_SECONDS
+    if not hedge:
+        return await first
+
+    token = asyncio.ensure_future(streaming.seen.wait())
+    twin = winner = None
+    try:
+        done, _ = await asyncio.wait({first, token}, timeout=hedge, return_when=FIRST_COMPLETED)
+        if done or not await _aspare_capacity(config, messages):
+            return await first
+
+        logger.info("No model output after %ss, sending a hedged request", hedge)
+        # An empty context: no inherited callbacks, so nothing streams
+        twin = asyncio.create_task(model.ainvoke(messages), context=Context())
+        pending = {first, twin, token}
+        while first in pending or twin in pending:
+            done, pending = await asyncio.wait(pending, return_when=FIRST_COMPLETED)
+            if token in done or (first in done and first.exception() is None):
+                winner = first
+                return await first
+            if twin in done and twin.exception() is None:
+                winner = twin
+                response = twin.result()
+                await _send_whole(response, config)
+                return response
+        raise first.exception()
+    finally:
+        for task in (first, token, twin):
+            if task is not None and not task.done():
+                task.cancel()
+        if winner is not None and twin is not None:
+            loser = twin if winner is first else first
+            await asyncio.wait({loser})
+            await sync_to_async(_settle_loser, thread_sensitive=False)(config, estimated, loser)
+
+
+async def ainvoke(model_names: list[str], get_model: Callable, messages: list, config) -> tuple[str, object]:
+    """Async invoke; the caller bounds it with the turn's deadline."""
+    partial = False
+    for model_name in model_names:
+        breaker = CircuitBreaker(_api_key(config), model_name)
+        if not await sync_to_async(breaker.allow, thread_sensitive=False)():
+            logger.warning("Skipping %s: circuit breaker open", model_name)
+            continue
+        model = get_model(model_name)
+
+        for attempt in range(settings.AGENT_MODEL_RETRIES + 1):
+            try:
+                estimated = await _aacquire(config, messages)
+            except ratelimit.RateLimited as e:
+                raise _unavailable(model_names, e) from e
+            streaming = _FirstToken()
+            try:
+                if partial:
+                    response = await _aquiet(model, messages, config)
+                else:
+                    response = await _ahedged(model, messages, config, streaming, estimated)
+            except Exception as e:
+                if streaming.seen.is_set():
+                    # Part of this attempt's text already reached the client
+                    partial = True
+                    await adispatch_custom_event("reset", {}, config=config)
+                if not is_retryable(e):
+                    raise
+                logger.warning("Model call to %s failed (attempt %s): %s", model_name, attempt + 1, e)
+                if await sync_to_async(breaker.record_failure, thread_sensitive=False)():
+                    break
+                if attempt < settings.AGENT_MODEL_RETRIES:
+                    await asyncio.sleep(backoff_seconds(attempt))
+                continue
+            await sync_to_async(breaker.record_success, thread_sensitive=False)()
+            await sync_to_async(_settle, thread_sensitive=False)(config, estimated, response)
+            return model_name, response
+    raise ModelUnavailable(", ".join(model_names))
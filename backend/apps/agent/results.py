@@ -0,0 +1,72 @@
+"""
+Compact, token-budgeted tool results.
+
+Tool results go back to the model as compact JSON instead of a Python
+repr, with long text fields elided to AGENT_TOOL_FIELD_CHARS. A result
+still over its tool's token budget loses trailing items from its largest
+list, and gains a marker so the model knows there is more:
+
+    "more": {"omitted": 12, "next_offset": 5}
+
+next_offset is only given for tools that accept an offset argument.
+"""
+
+import json
+import logging
+from typing import Any, Optional
+
+from django.conf import settings
+
+from .llm import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-tool token budgets; other tools use AGENT_TOOL_RESULT_TOKENS
+TOOL_TOKEN_BUDGETS = {
+    "get_recent_entries": 1500,
+}
+
+# Tools that can page through their results with an offset argument
+PAGED_TOOLS = {"get_recent_entries"}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _elide(value: Any, max_chars: int) -> Any:
+    """Copy of value with strings longer than max_chars cut short."""
+    if isinstance(value, str) and len(value) > max_chars:
+        return f"{value[:max_chars]}… [+{len(value) - max_chars} chars]"
+    if isinstance(value, dict):
+        return {k: _elide(v, max_chars) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_elide(v, max_chars) for v in value]
+    return value
+
+
+def _largest_list(result: dict) -> Optional[str]:
+    lists = [k for k, v in result.items() if isinstance(v, list) and v]
+    return max(lists, key=lambda k: len(_dumps(result[k])), default=None)
+
+
+def serialize_result(tool_name: str, result: Any, args: Optional[dict] = None) -> tuple[str, int]:
+    """The model-facing text of a tool result, and its size in tokens."""
+    budget = TOOL_TOKEN_BUDGETS.get(tool_name, settings.AGENT_TOOL_RESULT_TOKENS)
+    compact = _elide(result, settings.AGENT_TOOL_FIELD_CHARS)
+    text = _dumps(compact)
+
+    key = _largest_list(compact) if isinstance(compact, dict) else None
+    if key is not None and estimate_tokens(text) > budget:
+        items = compact[key]
+        total = len(items)
+        while items and estimate_tokens(text) > budget:
+            items = items[:-1]
+            more = {"omitted": total - len(items)}
+            if tool_name in PAGED_TOOLS:
+                more["next_offset"] = (args or {}).get("offset", 0) + len(items)
+            text = _dumps({**compact, key: items, "more": more})
+
+    tokens = estimate_tokens(text)
+    logger.info("Tool result %s: %s tokens", tool_name, tokens)
+    return text, tokens
@@ -0,0 +1,132 @@
+"""
+Deterministic fast path for simple commands.
+
+Messages like "meditated 20 min", "done with groceries" or "show my todos"
+map to exactly one tool call. Sending them through the graph costs two
+model calls to produce a one-line confirmation, so the router matches them
+locally with anchored patterns, calls the tool directly, and answers from
+a template.
+
+The router only answers when it is sure: the whole message must match a
+pattern, and a tool result that reports failure (e.g. no todo matched)
+falls through to the agent, which can ask a clarifying question.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .replies import render_reply
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Intent:
+    tool: str
+    args: dict
+
+
+_END = r"\s*[.!]*\s*$"
+_MINUTES = r"(?:\s+(?:for\s+)?(?P<minutes>\d{1,3})\s*(?:minutes?|mins?|m))?"
+_ARTICLE = re.compile(r"^(?:the|my)\s+", re.IGNORECASE)
+
+# Words that signal a compound message the agent should parse instead
+_COMPOUND = re.compile(r"\band\b|,|;|\bthen\b", re.IGNORECASE)
+
+
+# (pattern, tool name, args builder). The first full match wins, so more
+# specific patterns come first.
+_PATTERNS: list[tuple[re.Pattern, str, Callable[[re.Match], dict]]] = [
+    (
+        re.compile(
+            r"^(?:i\s+)?(?:just\s+)?(?:meditated|did\s+(?:my\s+)?meditation"
+            r"|finished\s+(?:my\s+)?meditation)" + _MINUTES + _END,
+            re.IGNORECASE,
+        ),
+        "log_meditation",
+        lambda m: {"duration_minutes": _int_or_none(m.group("minutes"))},
+    ),
+    (
+        re.compile(
+            r"^(?P<minutes>\d{1,3})\s*(?:minutes?|mins?|m)\s+(?:of\s+)?meditation" + _END,
+            re.IGNORECASE,
+        ),
+        "log_meditation",
+        lambda m: {"duration_minutes": int(m.group("minutes"))},
+    ),
+    (
+        re.compile(
+            r"^(?:show|list|what\s+are|what's\s+on)\s+(?:me\s+)?my\s+"
+            r"(?:todos?|to-dos?|tasks|todo\s+list|to-do\s+list)\s*[?.!]*\s*$",
+            re.IGNORECASE,
+        ),
+        "get_todos",
+        lambda m: {},
+    ),
+    (
+        re.compile(
+            r"^(?:show|list|what\s+are)\s+(?:me\s+)?my\s+mantras\s*[?.!]*\s*$",
+            re.IGNORECASE,
+        ),
+        "get_mantras",
+        lambda m: {},
+    ),
+    (
+        re.compile(
+            r"^(?:add\s+(?:a\s+)?)?(?:todo|to-do)\s*:\s*(?P<task>.+?)" + _END,
+            re.IGNORECASE,
+        ),
+        "create_todo",
+        lambda m: {"task": m.group("task").strip()},
+    ),
+    (
+        re.compile(
+            r"^(?:i'm\s+|i\s+am\s+)?(?:done\s+with|finished|completed|check\s+off)"
+            r"\s+(?P<search>.+?)" + _END,
+            re.IGNORECASE,
+        ),
+        "complete_todo",
+        lambda m: {"search": _ARTICLE.sub("", m.group("search").strip())},
+    ),
+]
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+def match_intent(text: str) -> Optional[Intent]:
+    """Return the single tool call a message unambiguously asks for."""
+    text = text.strip()
+    for pattern, tool_name, build_args in _PATTERNS:
+        match = pattern.match(text)
+        if match is None:
+            continue
+        args = build_args(match)
+        if any(isinstance(v, str) and _COMPOUND.search(v) for v in args.values()):
+            return None
+        return Intent(tool=tool_name, args=args)
+    return None
+
+
+async def aroute(user, text: str) -> Optional[str]:
+    """Handle a simple command without the LLM.
+
+    Returns the reply text, or None if the message should go to the agent.
+    """
+    from .graph import ASYNC_TOOL_FUNCTIONS
+
+    intent = match_intent(text)
+    if intent is None:
+        return None
+
+    result = await ASYNC_TOOL_FUNCTIONS[intent.tool](user=user, **intent.args)
+    reply = render_reply(intent.tool, result)
+    if reply is None:
+        logger.info("Fast path fell through: %s %s", intent.tool, result)
+        return None
+
+    logger.info("Fast path handled %s for %s", intent.tool, user.email)
+    return reply
@@ -0,0 +1,129 @@
+"""
+Per-user context snapshot for the system prompt.
+
+Many turns used to open with get_todays_status, get_todos or get_mantras
+just so the model could orient itself, a whole extra model round trip.
+Instead each run's system prompt carries a compact snapshot of today's
+check-in, open todos, mantras and the last journal date, capped at
+AGENT_SNAPSHOT_TOKENS, so status questions are answered in one call.
+
+Snapshots live in Django's cache for AGENT_SNAPSHOT_TTL_SECONDS. The chat
+consumer warms the cache on connect, and any write drops the entry: model
+saves and deletes through signals, the agent's bulk writes from the graph.
+The TTL bounds staleness from writes made by other processes.
+"""
+
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from apps.journal.models import DailyCheckin, JournalEntry
+from apps.mantras.models import Mantra
+from apps.todos.models import Todo
+
+from .llm import estimate_tokens
+
+HEADER = (
+    "## Right Now\n"
+    "The user's data as of the start of this turn. Answer questions about it "
+    "from here rather than calling get_todays_status, get_todos or get_mantras."
+)
+
+
+def _key(user_id: int) -> str:
+    return f"agent:snapshot:{user_id}:{date.today()}"
+
+
+def _checkin_line(checkin) -> str:
+    def done(flag: bool) -> str:
+        return "done" if flag else "not yet"
+
+    if checkin is None:
+        return f"Today ({date.today()}): meditation not yet, gratitude not yet, journal not yet"
+    meditation = done(checkin.meditation_completed)
+    if checkin.meditation_completed and checkin.meditation_duration:
+        meditation += f" ({checkin.meditation_duration} min)"
+    return (
+        f"Today ({checkin.date}): meditation {meditation}, "
+        f"gratitude {done(checkin.gratitude_completed)}, "
+        f"journal {done(checkin.journal_completed)}"
+    )
+
+
+def _list_line(label: str, items: list[str], budget: int) -> str:
+    """'label: a; b; +3 more', keeping as many items as fit in budget tokens."""
+    kept = []
+    for item in items:
+        if estimate_tokens(f"{label}: {'; '.join(kept + [item])}; +99 more") > budget:
+            break
+        kept.append(item)
+    if len(kept) < len(items):
+        kept.append(f"+{len(items) - len(kept)} more")
+    return f"{label}: {'; '.join(kept) or 'none'}"
+
+
+def _todo_text(todo) -> str:
+    return f"{todo.task} (due {todo.due_date})" if todo.due_date else todo.task
+
+
+def render_snapshot(checkin, todos: list, mantras: list, last_journal) -> str:
+    """The snapshot text, capped at AGENT_SNAPSHOT_TOKENS.
+
+    The check-in and journal lines always fit; todos get most of what is
+    left and mantras the rest.
+    """
+    today = _checkin_line(checkin)
+    journal = f"Last journal entry: {last_journal or 'never'}"
+    remaining = settings.AGENT_SNAPSHOT_TOKENS - sum(
+        estimate_tokens(line) for line in (HEADER, today, journal)
+    )
+    todo_line = _list_line(
+        f"Open todos ({len(todos)})", [_todo_text(t) for t in todos], remaining * 2 // 3
+    )
+    mantra_line = _list_line(
+        "Mantras", [m.content for m in mantras], remaining - estimate_tokens(todo_line)
+    )
+    return "\n".join([HEADER, today, todo_line, mantra_line, journal])
+
+
+def build_snapshot(user) -> str:
+    """Read the user's current state (four queries) and render it."""
+    checkin = DailyCheckin.objects.filter(user=user, date=date.today()).first()
+    todos = list(Todo.objects.filter(user=user, completed=False))
+    mantras = list(Mantra.objects.filter(user=user))
+    last_journal = (
+        JournalEntry.objects.filter(user=user).order_by("-date")
+        .values_list("date", flat=True).first()
+    )
+    return render_snapshot(checkin, todos, mantras, last_journal)
+
+
+def get_snapshot(user) -> str:
+    """The user's snapshot, from the cache when fresh."""
+    key = _key(user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot(user)
+        cache.set(key, snapshot, settings.AGENT_SNAPSHOT_TTL_SECONDS)
+    return snapshot
+
+
+def invalidate_snapshot(user_id: int) -> None:
+    cache.delete(_key(user_id))
+
+
+async def ainvalidate_snapshot(user_id: int) -> None:
+    await cache.adelete(_key(user_id))
+
+
+def _on_change(sender, instance, **kwargs):
+    invalidate_snapshot(instance.user_id)
+
+
+def connect_signals() -> None:
+    """Drop a user's snapshot whenever a row it is built from changes."""
+    for model in (DailyCheckin, Todo, Mantra, JournalEntry):
+        post_save.connect(_on_change, sender=model, dispatch_uid=f"agent-snapshot-save-{model.__name__}")
+        post_delete.connect(_on_change, sender=model, dispatch_uid=f"agent-snapshot-delete-{model.__name__}")
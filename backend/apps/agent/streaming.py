@@ -0,0 +1,104 @@
+"""
+Streaming of agent runs as WebSocket frames.
+
+Turns LangGraph's event stream into the frames the chat client renders
+while the agent works:
+
+- {"type": "delta", "content": "..."}         a chunk of model text
+- {"type": "tool_start", "name": "...", ...}  a tool call began
+- {"type": "tool_end", "name": "...", ...}    a tool call finished
+- {"type": "reset"}                           drop the text streamed since
+                                              the last tool call (a model
+                                              call failed partway)
+
+The reply that gets persisted is assembled from the same deltas, so the
+saved ChatMessage matches what the user watched arrive.
+"""
+
+from typing import Any, AsyncIterator
+
+# Custom events dispatched by graph nodes that are forwarded as frames:
+# tool progress, text that doesn't come from a model (confirmations), and
+# resets after a model call that failed partway through streaming
+CUSTOM_FRAMES = ("tool_start", "tool_end", "delta", "reset")
+
+
+def message_text(content: Any) -> str:
+    """Extract plain text from message content.
+
+    Anthropic messages may carry a list of content blocks (text mixed with
+    tool_use) instead of a plain string.
+    """
+    if isinstance(content, str):
+        return content
+    parts = []
+    for block in content or []:
+        if isinstance(block, str):
+            parts.append(block)
+        elif block.get("type") == "text":
+            parts.append(block.get("text", ""))
+    return "".join(parts)
+
+
+class StreamedReply:
+    """Accumulates streamed deltas into the final reply text.
+
+    Text from each model call is a separate segment; a tool call closes the
+    current segment, so a preamble like "Let me check." and the answer after
+    the tool runs end up as separate paragraphs.
+    """
+
+    def __init__(self):
+        self._segments: list[str] = []
+        self._current: list[str] = []
+        self.final_state: dict | None = None
+
+    def feed(self, frame: dict) -> None:
+        if frame["type"] == "delta":
+            self._current.append(frame["content"])
+        elif frame["type"] == "tool_start":
+            self._close_segment()
+        elif frame["type"] == "reset":
+            self._current = []
+
+    @property
+    def text(self) -> str:
+        self._close_segment()
+        if self._segments:
+            return "\n\n".join(self._segments)
+        # Nothing streamed (e.g. a model without streaming support)
+        if self.final_state and self.final_state.get("messages"):
+            return message_text(self.final_state["messages"][-1].content)
+        return ""
+
+    def _close_segment(self) -> None:
+        segment = "".join(self._current).strip()
+        if segment:
+            self._segments.append(segment)
+        self._current = []
+
+
+async def stream_frames(
+    graph, inputs: dict, config: dict, reply: StreamedReply
+) -> AsyncIterator[dict]:
+    """Run the graph and yield client frames as events arrive.
+
+    Every frame is also fed to reply, which holds the assembled text (and
+    the graph's final state) once the stream is exhausted.
+    """
+    async for event in graph.astream_events(inputs, config=config, version="v2"):
+        kind = event["event"]
+        frame = None
+
+        if kind == "on_chat_model_stream":
+            text = message_text(event["data"]["chunk"].content)
+            if text:
+                frame = {"type": "delta", "content": text}
+        elif kind == "on_custom_event" and event["name"] in CUSTOM_FRAMES:
+            frame = {"type": event["name"], **event["data"]}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            reply.final_state = event["data"].get("output")
+
+        if frame is not None:
+            reply.feed(frame)
+            yield frame
@@ -0,0 +1,31 @@
+"""
+Celery tasks for the agent app.
+
+Scheduled via Celery Beat:
+- prune_agent_checkpoints: runs hourly
+- rollup_token_usage: runs every 15 minutes
+"""
+
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from .checkpoints import prune_checkpoints
+from .usage import rollup_recent
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def prune_agent_checkpoints():
+    """Delete checkpoint threads of turns that were never finished."""
+    removed = prune_checkpoints(settings.AGENT_CHECKPOINT_TTL_HOURS)
+    logger.info("Pruned %s abandoned agent threads", removed)
+
+
+@shared_task
+def rollup_token_usage():
+    """Copy today's and yesterday's token counters into DailyTokenUsage."""
+    updated = rollup_recent()
+    logger.info("Rolled up token usage for %s user-days", updated)
@@ -0,0 +1,114 @@
+"""
+Per-run agent telemetry.
+
+A RunTelemetry rides in the run's configurable (like the ToolCache) and
+the graph nodes record into it: wall time of every model and tools node,
+token usage including prompt-cache reads/writes, each tool's duration,
+the tokens of tool results sent back to the model, the number of model
+calls (loop iterations) and time spent waiting on the API key's rate
+limit. When the run ends, however it ends, the consumer saves it as an
+AgentRun row linked to the user's ChatMessage, with its outcome: ok,
+timeout (cut off by the consumer's backstop) or error.
+
+Total time minus model and tools time is graph/streaming overhead.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# How a run ended (AgentRun.outcome)
+OK = "ok"
+TIMEOUT = "timeout"
+ERROR = "error"
+OUTCOMES = (OK, TIMEOUT, ERROR)
+
+
+@dataclass
+class RunTelemetry:
+    started: float = field(default_factory=time.perf_counter)
+    model_ms: float = 0.0
+    tools_ms: float = 0.0
+    rate_limit_ms: float = 0.0
+    iterations: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    tool_result_tokens: int = 0
+    tool_timings: list = field(default_factory=list)  # [[name, ms], ...]
+
+    def record_model(self, ms: float, usage: dict) -> None:
+        self.iterations += 1
+        self.model_ms += ms
+        self.input_tokens += usage["input"]
+        self.output_tokens += usage["output"]
+        self.cache_read_tokens += usage["cache_read"]
+        self.cache_creation_tokens += usage["cache_creation"]
+
+    def record_rate_limit(self, ms: float) -> None:
+        self.rate_limit_ms += ms
+
+    def record_tools(self, ms: float) -> None:
+        self.tools_ms += ms
+
+    def record_tool(self, name: str, ms: float, result_tokens: int = 0) -> None:
+        self.tool_timings.append([name, round(ms, 1)])
+        self.tool_result_tokens += result_tokens
+
+    def elapsed_ms(self) -> float:
+        return ms_since(self.started)
+
+
+def telemetry_of(config) -> Optional[RunTelemetry]:
+    return config.get("configurable", {}).get("telemetry")
+
+
+def ms_since(started: float) -> float:
+    """Milliseconds elapsed since a time.perf_counter() reading."""
+    return (time.perf_counter() - started) * 1000
+
+
+def save_run(user, message_id: Optional[int], telemetry: RunTelemetry, tool_cache=None, outcome: str = OK):
+    """Persist a run, finished or not, as an AgentRun row."""
+    from .models import AgentRun
+
+    cache_stats = tool_cache.stats() if tool_cache is not None else {"hits": 0, "misses": 0}
+    run = AgentRun.objects.create(
+        user=user,
+        message_id=message_id,
+        total_ms=round(telemetry.elapsed_ms()),
+        model_ms=round(telemetry.model_ms),
+        tools_ms=round(telemetry.tools_ms),
+        rate_limit_ms=round(telemetry.rate_limit_ms),
+        iterations=telemetry.iterations,
+        input_tokens=telemetry.input_tokens,
+        output_tokens=telemetry.output_tokens,
+        cache_read_tokens=telemetry.cache_read_tokens,
+        cache_creation_tokens=telemetry.cache_creation_tokens,
+        tool_result_tokens=telemetry.tool_result_tokens,
+        tool_timings=telemetry.tool_timings,
+        tool_cache_hits=cache_stats["hits"],
+        tool_cache_misses=cache_stats["misses"],
+        outcome=outcome,
+    )
+    logger.info(
+        "Agent run for %s (%s): total=%sms model=%sms tools=%sms iterations=%s "
+        "tool cache hits=%s misses=%s",
+        user.email, outcome, run.total_ms, run.model_ms, run.tools_ms, run.iterations,
+        run.tool_cache_hits, run.tool_cache_misses,
+    )
+    return run
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
@@ -0,0 +1,91 @@
+"""
+Model tiering: a fast model for routine turns, a deep model for reflection.
+
+Logging a checkbox and responding to a long journal entry don't need the
+same model. A cheap local classifier picks a tier for every model call:
+
+- "fast": short commands, and confirmations after write-only tool calls
+- "deep": journal entries, emotional content, pattern questions, and
+  anything the classifier isn't sure about
+
+Tiers map to a model and max_tokens in settings.AGENT_MODEL_TIERS.
+"""
+
+import re
+
+from django.conf import settings
+from langchain_core.messages import HumanMessage, ToolMessage
+
+FAST = "fast"
+DEEP = "deep"
+
+# Tool results the model only needs to confirm
+CONFIRM_TOOLS = {
+    "log_meditation",
+    "save_gratitude_list",
+    "create_todo",
+    "create_todos",
+    "complete_todo",
+    "complete_todos",
+    "add_mantra",
+    "get_todos",
+    "get_mantras",
+    "get_todays_status",
+}
+
+FAST_MAX_CHARS = 160
+
+_REFLECTIVE = re.compile(
+    r"\b(?:feel|feeling|felt|anxious|anxiety|sad|angry|afraid|scared|lonely|"
+    r"stress(?:ed)?|overwhelm(?:ed)?|struggl\w*|hard|hurt|journal|"
+    r"why|pattern|patterns|lately|recently|this week|this month|"
+    r"reflect\w*|remember|notice\w*|grief|depress\w*|worr\w*)\b",
+    re.IGNORECASE,
+)
+
+_COMMAND = re.compile(
+    r"^\s*(?:i\s+|i'm\s+)?(?:add|create|log|logged|mark|done|finished|"
+    r"completed|meditated|did|show|list|what(?:'s| is| are) (?:on )?my|remind|todo|to-do|"
+    r"need to|gotta|have to|grateful for)\b",
+    re.IGNORECASE,
+)
+
+
+def _last_human_text(messages: list) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            return content if isinstance(content, str) else str(content)
+    return ""
+
+
+def _trailing_tool_names(messages: list) -> list[str]:
+    names = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        names.append(message.name)
+    return names
+
+
+def classify(messages: list) -> str:
+    """Pick the tier for the next model call in this conversation."""
+    tool_names = _trailing_tool_names(messages)
+    if tool_names:
+        # Follow-up after tools: confirming writes is a fast job; journal
+        # entries and history lookups need the reflective model.
+        return FAST if all(n in CONFIRM_TOOLS for n in tool_names) else DEEP
+
+    text = _last_human_text(messages).strip()
+    if not text or len(text) > FAST_MAX_CHARS:
+        return DEEP
+    if _REFLECTIVE.search(text):
+        return DEEP
+    if _COMMAND.search(text):
+        return FAST
+    return DEEP
+
+
+def tier_settings(tier: str) -> dict:
+    """The model and max_tokens configured for a tier."""
+    return settings.AGENT_MODEL_TIERS[tier]
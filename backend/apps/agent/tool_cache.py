@@ -0,0 +1,92 @@
+"""
+Per-run memoization of read tools.
+
+Within one turn the model often reads the same thing twice (get_todos,
+then get_todos again after thinking), or reads right after its own write.
+A ToolCache lives in the run's configurable, so it is scoped to a single
+graph invocation: reads with the same arguments are served from memory,
+and each write invalidates only the reads it can change.
+
+Each read belongs to a group; a write bumps the generation of the groups
+it touches. A read that started before a write finished doesn't store its
+(possibly stale) result.
+"""
+
+import json
+import threading
+from typing import Any, Optional
+
+# Read tool -> the data group its result depends on
+READ_TOOLS = {
+    "get_todos": "todos",
+    "get_todays_status": "checkin",
+    "get_mantras": "mantras",
+    "get_recent_entries": "journal",
+}
+
+# Write tool -> the groups it changes
+WRITE_INVALIDATES = {
+    "create_todo": {"todos"},
+    "create_todos": {"todos"},
+    "complete_todo": {"todos"},
+    "complete_todos": {"todos"},
+    "log_meditation": {"checkin"},
+    "save_gratitude_list": {"checkin"},
+    "save_journal_entry": {"checkin", "journal"},
+    "add_mantra": {"mantras"},
+}
+
+
+def _key(tool_name: str, args: dict) -> tuple[str, str]:
+    return tool_name, json.dumps(args, sort_keys=True, default=str)
+
+
+class ToolCache:
+    """Read-tool results for one agent run, with hit/miss counts."""
+
+    def __init__(self):
+        self._results: dict[tuple[str, str], Any] = {}
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, tool_name: str, args: dict) -> tuple[bool, Any, Optional[int]]:
+        """(hit, result, token). Pass token to store() after a miss."""
+        group = READ_TOOLS.get(tool_name)
+        if group is None:
+            return False, None, None
+        key = _key(tool_name, args)
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                return True, self._results[key], None
+            self.misses += 1
+            return False, None, self._generations.get(group, 0)
+
+    def store(self, tool_name: str, args: dict, result: Any, token: Optional[int]) -> None:
+        if token is None:
+            return
+        group = READ_TOOLS[tool_name]
+        with self._lock:
+            # A write landed while this read ran; its result may be stale
+            if self._generations.get(group, 0) != token:
+                return
+            self._results[_key(tool_name, args)] = result
+
+    def invalidate(self, tool_name: str) -> None:
+        """Drop cached reads that a call to this write tool may change."""
+        groups = WRITE_INVALIDATES.get(tool_name)
+        if not groups:
+            return
+        with self._lock:
+            for group in groups:
+                self._generations[group] = self._generations.get(group, 0) + 1
+            self._results = {
+                key: result
+                for key, result in self._results.items()
+                if READ_TOOLS[key[0]] not in groups
+            }
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -13,7 +13,9 @@ from django.utils import timezone
 
 from apps.journal.models import DailyCheckin, GratitudeEntry, JournalEntry
 from apps.mantras.models import Mantra
+from apps.todos.dates import resolve_date
 from apps.todos.models import Todo
+from apps.todos.search import best_match
 
 
 def _get_or_create_checkin(user) -> DailyCheckin:
@@ -28,11 +30,12 @@ def log_meditation(
     user, duration_minutes: Optional[int] = None
 ) -> dict:
     """Log that the user completed their meditation."""
-    checkin = _get_or_create_checkin(user)
-    checkin.meditation_completed = True
-    checkin.meditation_duration = duration_minutes
-    checkin.meditation_completed_at = timezone.now()
-    checkin.save()
+    DailyCheckin.objects.upsert(
+        user, date.today(),
+        meditation_completed=True,
+        meditation_duration=duration_minutes,
+        meditation_completed_at=timezone.now(),
+    )
 
     return {
         "logged": True,
@@ -49,10 +52,9 @@ def save_gratitude_list(user, items: list[str]) -> dict:
         defaults={"items": items},
     )
 
-    checkin = _get_or_create_checkin(user)
-    checkin.gratitude_completed = True
-    checkin.gratitude_completed_at = timezone.now()
-    checkin.save()
+    DailyCheckin.objects.upsert(
+        user, date.today(), gratitude_completed=True, gratitude_completed_at=timezone.now()
+    )
 
     return {
         "saved": True,
@@ -72,10 +74,9 @@ def save_journal_entry(user, content: str) -> dict:
             user=user, date=date.today(), content=content
         )
 
-    checkin = _get_or_create_checkin(user)
-    checkin.journal_completed = True
-    checkin.journal_completed_at = timezone.now()
-    checkin.save()
+    DailyCheckin.objects.upsert(
+        user, date.today(), journal_completed=True, journal_completed_at=timezone.now()
+    )
 
     return {
         "saved": True,
@@ -84,23 +85,29 @@ def save_journal_entry(user, content: str) -> dict:
     }
 
 
-def _parse_due_date(due_date: Optional[str]) -> Optional[date]:
-    """Parse a due date string into a date object."""
+def _parse_due_date(user, due_date: Optional[str]) -> Optional[date]:
+    """Resolve a due date ("friday", "in 3 days", ISO...) in the user's timezone."""
     if due_date is None:
         return None
-    due_date_lower = due_date.strip().lower()
-    if due_date_lower == "today":
-        return date.today()
-    if due_date_lower == "tomorrow":
-        return date.today() + timedelta(days=1)
-    return date.fromisoformat(due_date)
+    return resolve_date(due_date, user.timezone)
+
+
+def _bad_due_date(due_date: str) -> dict:
+    return {
+        "created": False,
+        "message": f"Couldn't understand the due date {due_date!r}; "
+        "ask the user or pass YYYY-MM-DD",
+    }
 
 
 def create_todo(
     user, task: str, due_date: Optional[str] = None
 ) -> dict:
     """Create a new todo item."""
-    parsed_date = _parse_due_date(due_date)
+    try:
+        parsed_date = _parse_due_date(user, due_date)
+    except ValueError:
+        return _bad_due_date(due_date)
     todo = Todo.objects.create(
         user=user, task=task, due_date=parsed_date
     )
@@ -111,48 +118,111 @@ def create_todo(
     }
 
 
-def complete_todo(user, search: str) -> dict:
-    """Mark a todo as complete by searching for it."""
-    search_lower = search.lower()
-    todos = Todo.objects.filter(user=user, completed=False)
-
-    # Try exact match first
-    exact = todos.filter(task__iexact=search)
-    if exact.count() == 1:
-        todo = exact.first()
-        todo.completed = True
-        todo.completed_at = timezone.now()
-        todo.save()
-        return {"completed": True, "task": todo.task}
-
-    # Try partial match — check if all search words appear in the task
-    search_words = search_lower.split()
-    matches = []
-    for todo in todos:
-        task_lower = todo.task.lower()
-        if all(word in task_lower for word in search_words):
-            matches.append(todo)
-
-    if len(matches) == 1:
-        todo = matches[0]
-        todo.completed = True
-        todo.completed_at = timezone.now()
-        todo.save()
-        return {"completed": True, "task": todo.task}
-
-    if len(matches) > 1:
+def _complete_result(best, matches) -> dict:
+    if best is not None:
+        return {"completed": True, "task": best.task}
+    if matches:
         return {
             "completed": False,
             "message": "Multiple matches found",
             "matches": [{"id": t.pk, "task": t.task} for t in matches],
         }
-
     return {
         "completed": False,
         "message": "Todo not found",
     }
 
 
+def complete_todo(user, search: str) -> dict:
+    """Mark a todo as complete by searching for it.
+
+    One ranked fuzzy query (see apps.todos.search): the best match is
+    completed when it is clearly ahead, otherwise the closest few are
+    returned to choose from.
+    """
+    best, matches = best_match(Todo.objects.filter(user=user, completed=False), search)
+    if best is not None:
+        best.completed = True
+        best.completed_at = timezone.now()
+        best.save()
+    return _complete_result(best, matches)
+
+
+def _todo_from_item(user, item: dict) -> Todo:
+    return Todo(
+        user=user,
+        task=item["task"],
+        due_date=_parse_due_date(user, item.get("due_date")),
+    )
+
+
+def _created_todos_result(todos: list[Todo]) -> dict:
+    return {
+        "created": len(todos),
+        "todos": [
+            {
+                "task": t.task,
+                "due_date": str(t.due_date) if t.due_date else None,
+            }
+            for t in todos
+        ],
+    }
+
+
+def create_todos(user, tasks: list[dict]) -> dict:
+    """Create several todo items with a single INSERT."""
+    try:
+        todos = [_todo_from_item(user, item) for item in tasks]
+    except ValueError as e:
+        return {"created": 0, "message": f"{e}; ask the user or pass YYYY-MM-DD"}
+    todos = Todo.objects.bulk_create(todos)
+    return _created_todos_result(todos)
+
+
+def _add_match(resolved, search: str, best, matches) -> None:
+    """File one search's best_match result under completed, ambiguous or not found."""
+    to_complete, ambiguous, not_found = resolved
+    if best is not None:
+        to_complete[best.pk] = best
+    elif matches:
+        ambiguous.append({
+            "search": search,
+            "matches": [{"id": t.pk, "task": t.task} for t in matches],
+        })
+    else:
+        not_found.append(search)
+
+
+def _resolve_searches(queryset, searches: list[str]):
+    """Split searches into clear matches, ambiguous ones, and misses, as complete_todo does."""
+    resolved = ({}, [], [])
+    for search in searches:
+        _add_match(resolved, search, *best_match(queryset, search))
+    return resolved
+
+
+def _completed_todos_result(to_complete, ambiguous, not_found) -> dict:
+    result = {"completed": [t.task for t in to_complete.values()]}
+    if ambiguous:
+        result["ambiguous"] = ambiguous
+    if not_found:
+        result["not_found"] = not_found
+    return result
+
+
+def complete_todos(user, searches: list[str]) -> dict:
+    """Mark several todos complete: one ranked search each, then one UPDATE ... WHERE id IN."""
+    to_complete, ambiguous, not_found = _resolve_searches(
+        Todo.objects.filter(user=user, completed=False), searches
+    )
+
+    if to_complete:
+        Todo.objects.filter(pk__in=list(to_complete)).update(
+            completed=True, completed_at=timezone.now()
+        )
+    return _completed_todos_result(to_complete, ambiguous, not_found)
+
+
 def get_todos(user, include_completed: bool = False) -> dict:
     """Get the user's todo list."""
     qs = Todo.objects.filter(user=user)
@@ -171,12 +241,12 @@ def get_todos(user, include_completed: bool = False) -> dict:
     return {"todos": todos}
 
 
-def get_recent_entries(user, days: int = 7) -> dict:
-    """Get recent journal entries."""
+def get_recent_entries(user, days: int = 7, offset: int = 0) -> dict:
+    """Get recent journal entries, newest first, skipping the first offset."""
     cutoff = date.today() - timedelta(days=days)
     entries = JournalEntry.objects.filter(
         user=user, date__gte=cutoff
-    )
+    ).order_by("-date")[offset:]
     return {
         "entries": [
             {
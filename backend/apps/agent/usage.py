@@ -0,0 +1,181 @@
+"""
+Per-user daily token accounting and budgets.
+
+Every model response's usage (input, output, prompt-cache reads and
+writes) is added to the user's counters for the day. The counters are
+atomic increments in Django's cache (Redis), so concurrent turns and
+Celery jobs never lose an update and the hot path makes no DB writes.
+The rollup_token_usage task copies them into DailyTokenUsage rows, which
+keep the history and reseed the counters if the cache loses them.
+
+Budgets apply to a day's total tokens (input, which includes cached
+tokens, plus output):
+
+- past AGENT_DAILY_TOKEN_SOFT_BUDGET every call uses the fast tier
+- past AGENT_DAILY_TOKEN_HARD_BUDGET no model is called; the turn ends
+  with OVER_BUDGET_MESSAGE
+
+0 disables a budget. Days are server-local dates, like check-ins.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+SOFT = "soft"
+HARD = "hard"
+
+OVER_BUDGET_MESSAGE = (
+    "We've talked a lot today, and I've reached my limit for the day. "
+    "Let's pick this up again tomorrow."
+)
+
+# DailyTokenUsage field for each usage_of() key
+FIELDS = {
+    "input": "input_tokens",
+    "output": "output_tokens",
+    "cache_read": "cache_read_tokens",
+    "cache_creation": "cache_creation_tokens",
+}
+
+# Counters outlive their day so the next morning's rollup can read them
+COUNTER_TTL_SECONDS = 2 * 24 * 3600
+
+
+def _key(user_id: int, day: date, name: str) -> str:
+    return f"agent:usage:{user_id}:{day}:{name}"
+
+
+def _keys(user_id: int, day: date) -> dict[str, str]:
+    return {name: _key(user_id, day, name) for name in [*FIELDS, "total"]}
+
+
+def _seed(user_id: int, day: date) -> None:
+    """Start the day's counters, from the rollup row if there is one."""
+    from .models import DailyTokenUsage
+
+    row, _ = DailyTokenUsage.objects.get_or_create(user_id=user_id, date=day)
+    for name, key in _keys(user_id, day).items():
+        cache.add(key, row.total_tokens if name == "total" else getattr(row, FIELDS[name]), COUNTER_TTL_SECONDS)
+
+
+def _incr(user_id: int, day: date, name: str, amount: int) -> None:
+    key = _key(user_id, day, name)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # Evicted since the day started; reseed from the last rollup
+        _seed(user_id, day)
+        cache.incr(key, amount)
+
+
+def record_usage(user_id: int, usage: dict) -> None:
+    """Add one model call's usage (see llm.usage_of) to today's counters."""
+    if not any(usage.values()):
+        return
+    day = date.today()
+    try:
+        # The first call of the day (or after a cache flush) creates the row
+        if cache.add(_key(user_id, day, "seen"), True, COUNTER_TTL_SECONDS):
+            _seed(user_id, day)
+        for name in FIELDS:
+            if usage[name]:
+                _incr(user_id, day, name, usage[name])
+        _incr(user_id, day, "total", usage["input"] + usage["output"])
+    except Exception as e:
+        logger.warning("Could not record token usage for user %s: %s", user_id, e)
+
+
+def usage_for(user_id: int, day: date | None = None) -> dict:
+    """The user's token counts for a day (default today)."""
+    from .models import DailyTokenUsage
+
+    day = day or date.today()
+    keys = _keys(user_id, day)
+    try:
+        counters = cache.get_many(list(keys.values()))
+    except Exception as e:
+        logger.warning("Token counters unavailable: %s", e)
+        counters = {}
+    if len(counters) < len(keys):
+        row = DailyTokenUsage.objects.filter(user_id=user_id, date=day).first()
+        counters = {
+            keys[name]: getattr(row, FIELDS[name]) if row else 0 for name in FIELDS
+        }
+    usage = {field: counters.get(keys[name], 0) for name, field in FIELDS.items()}
+    usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+    return usage
+
+
+def budget_status(total_tokens: int) -> str:
+    """OK, SOFT or HARD for a day's total tokens."""
+    hard = settings.AGENT_DAILY_TOKEN_HARD_BUDGET
+    soft = settings.AGENT_DAILY_TOKEN_SOFT_BUDGET
+    if hard and total_tokens >= hard:
+        return HARD
+    if soft and total_tokens >= soft:
+        return SOFT
+    return OK
+
+
+def user_budget_status(user_id: int) -> str:
+    """The user's budget status from today's total (a single cache read)."""
+    if not (settings.AGENT_DAILY_TOKEN_SOFT_BUDGET or settings.AGENT_DAILY_TOKEN_HARD_BUDGET):
+        return OK
+    try:
+        total = cache.get(_key(user_id, date.today(), "total"))
+    except Exception as e:
+        logger.warning("Token counters unavailable, not enforcing budget: %s", e)
+        return OK
+    if total is None:
+        total = usage_for(user_id)["total_tokens"]
+    return budget_status(total)
+
+
+def usage_summary(user_id: int) -> dict:
+    """Today's usage with budgets, for the API."""
+    usage = usage_for(user_id)
+    return {
+        "date": date.today(),
+        **usage,
+        "soft_budget": settings.AGENT_DAILY_TOKEN_SOFT_BUDGET or None,
+        "hard_budget": settings.AGENT_DAILY_TOKEN_HARD_BUDGET or None,
+        "status": budget_status(usage["total_tokens"]),
+    }
+
+
+def rollup(day: date | None = None) -> int:
+    """Copy a day's counters into its DailyTokenUsage rows; returns rows updated.
+
+    Counters only grow, so a row never moves backwards if a counter was
+    lost and reseeded from it.
+    """
+    from .models import DailyTokenUsage
+
+    day = day or date.today()
+    rows = list(DailyTokenUsage.objects.filter(date=day))
+    keys = [_key(row.user_id, day, name) for row in rows for name in FIELDS]
+    counters = cache.get_many(keys)
+    changed = []
+    for row in rows:
+        updated = False
+        for name, field in FIELDS.items():
+            value = counters.get(_key(row.user_id, day, name), 0)
+            if value > getattr(row, field):
+                setattr(row, field, value)
+                updated = True
+        if updated:
+            changed.append(row)
+    DailyTokenUsage.objects.bulk_update(changed, list(FIELDS.values()))
+    return len(changed)
+
+
+def rollup_recent() -> int:
+    """Roll up today and yesterday, so the end of each day is kept."""
+    today = date.today()
+    return rollup(today - timedelta(days=1)) + rollup(today)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from .models import ChatMessage
+from .models import ChatMessage, ConversationSummary
 
 admin.site.register(ChatMessage)
+admin.site.register(ConversationSummary)
@@ -5,23 +5,30 @@ Handles:
 1. Authentication (reject anonymous connections)
 2. Receiving user messages
 3. Calling the LangGraph agent
-4. Sending responses back to the client
-5. Persisting chat history
+4. Streaming deltas and tool progress, then the complete response
+5. Persisting chat history, and feeding recent history back to the agent
 """
 
 import asyncio
 import logging
 import os
+import random
 import traceback
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 
+from .executor import AgentPoolSaturated, agent_pool, agent_slots
+from .memory import load_history, maybe_schedule_summary
 from .models import ChatMessage
 
 logger = logging.getLogger(__name__)
 
-AGENT_TIMEOUT = 120  # seconds
+AGENT_TIMEOUT = 120  # seconds; backstop, the graph stops itself at AGENT_TURN_SECONDS
+SATURATED_MESSAGE = (
+    "I'm with a lot of people right now. Give me a moment and try again."
+)
 
 
 class ChatConsumer(AsyncJsonWebsocketConsumer):
@@ -34,8 +41,13 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             await self.close()
             return
 
+        # The user message being answered; history loads stop before it
+        self.current_message_id = None
+
         logger.info("WS connected: user=%s", self.user.email)
         await self.accept()
+        if settings.AGENT_CONTEXT_SNAPSHOT:
+            await self.warm_snapshot()
 
     async def disconnect(self, close_code):
         logger.info("WS disconnected: code=%s", close_code)
@@ -51,8 +63,15 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
 
         logger.info("WS message from %s: %s", self.user.email, user_content[:100])
 
-        # Save user message
-        await self.save_message("user", user_content)
+        # Save user message (a resend with the same client_id reuses it)
+        client_id = str(content.get("client_id") or "")[:64]
+        message = await self.save_user_message(user_content, client_id)
+        self.current_message_id = message.id
+
+        # The turn was answered but the reply never reached the client
+        if client_id and (saved := await self.saved_reply(message)) is not None:
+            await self.send_json({"type": "complete", "content": saved})
+            return
 
         try:
             # Get agent response with timeout
@@ -63,6 +82,8 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
 
             # Save assistant message
             await self.save_message("assistant", response_text)
+            await self.drop_checkpoints()
+            await self.schedule_summary()
 
             logger.info("WS response to %s: %s", self.user.email, response_text[:100])
 
@@ -71,6 +92,12 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                 "type": "complete",
                 "content": response_text,
             })
+        except AgentPoolSaturated:
+            await self.send_json({
+                "type": "complete",
+                "content": SATURATED_MESSAGE,
+                "error": "saturated",
+            })
         except asyncio.TimeoutError:
             logger.error("Agent timed out after %ss for user %s", AGENT_TIMEOUT, self.user.email)
             await self.send_json({
@@ -88,42 +115,205 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         """Call the LangGraph agent and return the response text.
 
         This method is designed to be easily mocked in tests.
-        In production, it invokes the full agent graph.
+        In production, simple commands are answered by the fast-path router;
+        everything else invokes the full agent graph — awaited on the event
+        loop when AGENT_ASYNC is set, otherwise on the agent pool.
         """
-        result = await database_sync_to_async(self._run_agent)(user_message)
-        return result
+        if settings.AGENT_FAST_PATH:
+            from apps.agent.router import aroute
 
-    def _run_agent(self, user_message: str) -> str:
-        """Synchronous agent invocation (runs in thread via database_sync_to_async)."""
-        from langchain_core.messages import HumanMessage
+            reply = await aroute(self.user, user_message)
+            if reply is not None:
+                return reply
 
-        from apps.agent.graph import agent
+        if settings.AGENT_ASYNC:
+            async with agent_slots.slot():
+                return await self._arun_agent(user_message)
+        result = await agent_pool.run(self._run_agent, user_message)
+        return result
+
+    def _agent_config(self, summary: str = "") -> dict:
+        from apps.agent.budget import budget_config
+        from apps.agent.snapshot import get_snapshot
+        from apps.agent.telemetry import RunTelemetry
+        from apps.agent.tool_cache import ToolCache
 
         # Use user's API key if set, otherwise fall back to env var
         api_key = self.user.anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
 
-        config = {
+        logger.info("Invoking agent for %s (key=%s...)", self.user.email, api_key[:10] if api_key else "NONE")
+
+        return {
             "configurable": {
                 "user": self.user,
                 "anthropic_api_key": api_key,
+                "conversation_summary": summary,
+                "user_context": get_snapshot(self.user) if settings.AGENT_CONTEXT_SNAPSHOT else "",
+                "tool_cache": ToolCache(),
+                "telemetry": RunTelemetry(),
+                **budget_config(settings.AGENT_TURN_SECONDS, settings.AGENT_MAX_ITERATIONS),
             }
         }
 
-        logger.info("Invoking agent for %s (key=%s...)", self.user.email, api_key[:10] if api_key else "NONE")
+    def _record_run(self, config: dict, outcome: str) -> None:
+        """Save the run's telemetry as an AgentRun, and its recording if it
+        was sampled, whether it finished (ok) or not (timeout, error)."""
+        from apps.agent.recording import save_recording
+        from apps.agent.telemetry import save_run
 
-        result = agent.invoke(
-            {"messages": [HumanMessage(content=user_message)]},
-            config=config,
-        )
+        configurable = config["configurable"]
+        try:
+            save_run(
+                self.user,
+                self.current_message_id,
+                configurable["telemetry"],
+                configurable["tool_cache"],
+                outcome,
+            )
+            if configurable.get("recorder") is not None:
+                configurable["recorder"].outcome = outcome
+                save_recording(configurable["recorder"])
+        except Exception as e:
+            # Telemetry must never cost the user their reply
+            logger.warning("Could not save agent run for %s: %s", self.user.email, e)
+
+    def _agent_inputs(self, user_message: str) -> tuple[dict | None, dict]:
+        """Graph inputs (recent history + the new message) and config.
+
+        With AGENT_CHECKPOINTS (async runs only) the turn runs on its own
+        checkpoint thread.
+        If that thread already has state (timeout, worker restart), inputs
+        is None: a run that stopped part-way resumes after its last completed
+        node, and one that reached the end before its reply was saved is not
+        run again.
+        An AGENT_RECORD_RATE share of fresh turns is recorded for replay.
+        """
+        from langchain_core.messages import HumanMessage
+
+        from apps.agent.checkpoints import thread_id_for
+        from apps.agent.graph import async_checkpointed_agent
+        from apps.agent.recording import RunRecorder, capture_user_data
+
+        history, summary = load_history(self.user, before_id=self.current_message_id)
+        inputs = {"messages": history + [HumanMessage(content=user_message)]}
+        config = self._agent_config(summary)
+
+        if settings.AGENT_ASYNC and settings.AGENT_CHECKPOINTS:
+            thread_id = thread_id_for(self.user, self.current_message_id)
+            config["configurable"]["thread_id"] = thread_id
+            if async_checkpointed_agent.get_state(config).values:
+                logger.info("Resuming turn %s", thread_id)
+                inputs = None
+
+        if inputs is not None and random.random() < settings.AGENT_RECORD_RATE:
+            config["configurable"]["recorder"] = RunRecorder(
+                inputs["messages"],
+                summary,
+                config["configurable"]["user_context"],
+                capture_user_data(self.user),
+            )
+        return inputs, config
+
+    def _run_agent(self, user_message: str) -> str:
+        """Synchronous agent invocation (runs on the bounded agent pool)."""
+        from apps.agent.graph import agent
+
+        from apps.agent.telemetry import ERROR, OK
+
+        inputs, config = self._agent_inputs(user_message)
+        outcome = ERROR
+        try:
+            result = agent.invoke(inputs, config=config)
+            outcome = OK
+        finally:
+            self._record_run(config, outcome)
 
         # Extract the last AI message content
         last_message = result["messages"][-1]
         return last_message.content
 
+    async def _arun_agent(self, user_message: str) -> str:
+        """Async agent invocation — no thread is held during LLM calls.
+
+        Streams delta/tool_start/tool_end frames to the client as they
+        happen and returns the reply assembled from them.
+        """
+        from apps.agent.graph import async_agent, async_checkpointed_agent
+        from apps.agent.streaming import StreamedReply, stream_frames
+        from apps.agent.telemetry import ERROR, OK, TIMEOUT
+
+        inputs, config = await database_sync_to_async(self._agent_inputs)(user_message)
+        graph = async_checkpointed_agent if settings.AGENT_CHECKPOINTS else async_agent
+        if inputs is None:
+            state = await graph.aget_state(config)
+            if not state.next:
+                # The run already reached the end; only its reply was lost
+                return state.values["messages"][-1].content
+        reply = StreamedReply()
+        outcome = ERROR
+        try:
+            async for frame in stream_frames(graph, inputs, config, reply):
+                await self.send_json(frame)
+            outcome = OK
+        except asyncio.CancelledError:
+            # The AGENT_TIMEOUT backstop cancels the run
+            outcome = TIMEOUT
+            raise
+        finally:
+            # Shielded: a cancelled run still gets its telemetry saved
+            await asyncio.shield(database_sync_to_async(self._record_run)(config, outcome))
+
+        return reply.text
+
     @database_sync_to_async
-    def save_message(self, role: str, content: str):
-        ChatMessage.objects.create(
+    def save_message(self, role: str, content: str) -> ChatMessage:
+        return ChatMessage.objects.create(
             user=self.user,
             role=role,
             content=content,
         )
+
+    @database_sync_to_async
+    def save_user_message(self, content: str, client_id: str = "") -> ChatMessage:
+        """Save the user's message. A resend with the same client_id reuses
+        the saved one, so the turn resumes on its checkpoint thread."""
+        if client_id:
+            message, _ = ChatMessage.objects.get_or_create(
+                user=self.user,
+                client_id=client_id,
+                defaults={"role": "user", "content": content},
+            )
+            return message
+        return ChatMessage.objects.create(user=self.user, role="user", content=content)
+
+    @database_sync_to_async
+    def saved_reply(self, message: ChatMessage) -> str | None:
+        """The assistant reply saved right after message, if there is one."""
+        following = (
+            ChatMessage.objects.filter(user=self.user, id__gt=message.id).order_by("id").first()
+        )
+        if following is not None and following.role == "assistant":
+            return following.content
+        return None
+
+    async def drop_checkpoints(self) -> None:
+        """The reply is saved, so the turn's checkpoints are no longer needed."""
+        if settings.AGENT_ASYNC and settings.AGENT_CHECKPOINTS:
+            from apps.agent.checkpoints import checkpointer, thread_id_for
+
+            await checkpointer.adelete_thread(thread_id_for(self.user, self.current_message_id))
+
+    @database_sync_to_async
+    def schedule_summary(self) -> None:
+        maybe_schedule_summary(self.user)
+
+    @database_sync_to_async
+    def warm_snapshot(self) -> None:
+        """Build the user's context snapshot before their first message."""
+        from apps.agent.snapshot import get_snapshot
+
+        try:
+            get_snapshot(self.user)
+        except Exception as e:
+            # The first turn will try again
+            logger.warning("Could not build context snapshot for %s: %s", self.user.email, e)
@@ -0,0 +1,163 @@
+"""
+Bounded worker pool for agent runs.
+
+A single agent turn spends most of its time waiting on Anthropic. Running
+it through thread-sensitive database_sync_to_async would queue every
+conversation in the process behind one thread, so agent runs get their
+own pool instead:
+
+1. At most AGENT_MAX_WORKERS runs execute at once
+2. At most AGENT_MAX_QUEUE more wait for a free worker
+3. Anything beyond that is refused with AgentPoolSaturated, so the
+   consumer can tell the client to try again instead of hanging
+
+Async graph runs don't need a thread at all; they take a slot() on a
+separate, much larger pool so the same limits and metrics apply.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class AgentPoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class AgentPool:
+    """Thread pool with admission control and queue-depth metrics."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._lock = threading.Lock()
+        self._pending = 0  # submitted, not yet finished
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def stats(self) -> dict:
+        """Snapshot of the pool's load, for logging and health checks."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    async def run(self, func, *args):
+        """Run func(*args) on a pool thread and await its result.
+
+        Raises AgentPoolSaturated without queueing if the pool is full.
+        """
+        self._admit()
+        future = self._get_executor().submit(self._call, func, args)
+        # Release the slot when the thread finishes, not when the awaiting
+        # coroutine gives up — a timed-out run still occupies its worker.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Admission control for runs that stay on the event loop.
+
+        Async graph runs don't need a thread, but still count against the
+        pool's limits so one process can't take on unbounded work.
+        """
+        self._admit()
+        try:
+            async with self._get_semaphore():
+                with self._lock:
+                    self._running += 1
+                try:
+                    yield
+                finally:
+                    with self._lock:
+                        self._running -= 1
+                        self.completed += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                logger.warning("Agent pool saturated: %s", self._stats_unlocked())
+                raise AgentPoolSaturated()
+            self._pending += 1
+            waiting = self._pending - self.max_workers
+
+        if waiting > 0:
+            logger.info("Agent run queued (depth=%s)", waiting)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="agent",
+                )
+            return self._executor
+
+    def _call(self, func, args):
+        with self._lock:
+            self._running += 1
+        # Same connection hygiene as channels' database_sync_to_async
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+            # A run cancelled while still queued never reached a worker
+            if not future.cancelled():
+                self._running -= 1
+                self.completed += 1
+
+    def _stats_unlocked(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": self._pending - self._running,
+            "rejected": self.rejected,
+        }
+
+
+agent_pool = AgentPool(
+    max_workers=settings.AGENT_MAX_WORKERS,
+    max_queue=settings.AGENT_MAX_QUEUE,
+)
+
+agent_slots = AgentPool(
+    max_workers=settings.AGENT_MAX_ASYNC_RUNS,
+    max_queue=settings.AGENT_MAX_QUEUE,
+)
@@ -0,0 +1,122 @@
+"""
+Bounded conversation memory for the agent.
+
+Each turn the agent sees:
+
+- the last AGENT_MEMORY_TURNS turns of chat history, trimmed to fit
+  AGENT_MEMORY_TOKENS (newest turns win), and
+- the user's rolling ConversationSummary of everything older.
+
+Messages older than what the prompt includes, whether they left the
+window or were trimmed by the token budget, are folded into the summary by
+a Celery task once AGENT_MEMORY_SUMMARY_BATCH of them have piled up, so the
+prompt stays bounded however long the history grows and summarizing never
+adds latency to a reply. One summary task per user is queued at a time.
+"""
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from apps.agent.llm import estimate_tokens
+
+from .models import ChatMessage, ConversationSummary
+
+logger = logging.getLogger(__name__)
+
+# Longest a queued summary blocks the next one, should its task never finish
+SUMMARY_PENDING_SECONDS = 600
+
+
+def _window(user, before_id: Optional[int] = None) -> list[ChatMessage]:
+    """Newest-first chat messages inside the memory window."""
+    queryset = ChatMessage.objects.filter(user=user)
+    if before_id is not None:
+        queryset = queryset.filter(id__lt=before_id)
+    return list(queryset.order_by("-id")[: settings.AGENT_MEMORY_TURNS * 2])
+
+
+def _as_message(message: ChatMessage) -> BaseMessage:
+    if message.role == "user":
+        return HumanMessage(content=message.content)
+    return AIMessage(content=message.content)
+
+
+def _kept(window: list[ChatMessage]) -> list[ChatMessage]:
+    """The window's messages that go in the prompt, oldest first."""
+    budget = settings.AGENT_MEMORY_TOKENS
+    kept: list[ChatMessage] = []
+    for message in window:
+        budget -= estimate_tokens(message.content)
+        if budget < 0:
+            break
+        kept.append(message)
+    kept.reverse()
+
+    # The model expects history to open with the user speaking
+    while kept and kept[0].role != "user":
+        kept.pop(0)
+    return kept
+
+
+def load_history(user, before_id: Optional[int] = None) -> tuple[list[BaseMessage], str]:
+    """Recent history as LangChain messages, plus the summary of older turns.
+
+    before_id excludes the message being answered (and anything after it).
+    """
+    kept = _kept(_window(user, before_id))
+    summary = (
+        ConversationSummary.objects.filter(user=user)
+        .values_list("summary", flat=True)
+        .first()
+    )
+    return [_as_message(m) for m in kept], summary or ""
+
+
+def unsummarized(user) -> list[ChatMessage]:
+    """Messages older than the prompt's history that the summary doesn't cover yet."""
+    window = _window(user)
+    if not window:
+        return []
+    kept = _kept(window)
+    # Everything before the oldest message the prompt keeps, including
+    # window messages the token budget trimmed
+    cutoff = kept[0].id if kept else window[0].id + 1
+
+    queryset = ChatMessage.objects.filter(user=user, id__lt=cutoff)
+    through = (
+        ConversationSummary.objects.filter(user=user)
+        .values_list("summarized_through_id", flat=True)
+        .first()
+    )
+    if through is not None:
+        queryset = queryset.filter(id__gt=through)
+    return list(queryset.order_by("id"))
+
+
+def summary_pending_key(user_id: int) -> str:
+    return f"chat:summary-pending:{user_id}"
+
+
+def maybe_schedule_summary(user) -> bool:
+    """Queue a summary update once enough history has left the prompt,
+    unless one is already queued or running."""
+    pending = unsummarized(user)
+    if len(pending) < settings.AGENT_MEMORY_SUMMARY_BATCH:
+        return False
+    if not cache.add(summary_pending_key(user.id), 1, SUMMARY_PENDING_SECONDS):
+        return False
+
+    from .tasks import update_conversation_summary
+
+    try:
+        update_conversation_summary.delay(user.id)
+    except Exception as e:
+        # A missing broker shouldn't fail the chat turn; the next turn retries
+        logger.warning("Could not queue summary for %s: %s", user.email, e)
+        cache.delete(summary_pending_key(user.id))
+        return False
+    return True
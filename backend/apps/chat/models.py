@@ -6,10 +6,43 @@ class ChatMessage(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     role = models.CharField(max_length=20)
     content = models.TextField()
+    # Client-generated id of a user message; a resend with the same id
+    # resumes that turn instead of starting another
+    client_id = models.CharField(max_length=64, blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "client_id"],
+                condition=~models.Q(client_id=""),
+                name="chatmessage_unique_client_id",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.role}: {self.content[:50]}"
+
+
+class ConversationSummary(models.Model):
+    """Rolling summary of a user's chat history older than the memory window."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="conversation_summary",
+    )
+    summary = models.TextField(blank=True, default="")
+    # Last ChatMessage folded into the summary
+    summarized_through = models.ForeignKey(
+        ChatMessage,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Summary ({self.user})"
@@ -0,0 +1,110 @@
+"""
+Celery tasks for the chat app.
+
+- update_conversation_summary: folds chat history that has left the
+  agent's memory window into the user's rolling summary
+"""
+
+import logging
+import os
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from apps.agent import ratelimit
+from apps.agent.llm import usage_of
+from apps.agent.usage import record_usage
+from apps.users.models import User
+
+from .memory import summary_pending_key, unsummarized
+from .models import ConversationSummary
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on messages folded per run, so one call stays small
+MAX_MESSAGES_PER_RUN = 50
+
+# Longest a summary waits for rate-limit capacity before giving up; the
+# messages stay unsummarized and the next run picks them up
+MAX_RATE_LIMIT_WAIT_SECONDS = 120
+
+SUMMARY_PROMPT = """You maintain a running summary of a user's conversation \
+with WuWei, their journaling and mindfulness companion.
+
+Update the existing summary with the new messages. Keep what the companion \
+needs to stay consistent: ongoing situations, goals, feelings the user has \
+shared, commitments made, and preferences. Drop small talk and anything \
+already recorded as a todo or log entry. Write in the third person, as \
+short plain paragraphs. Stay under {max_words} words."""
+
+
+def _transcript(messages) -> str:
+    lines = []
+    for message in messages:
+        speaker = "User" if message.role == "user" else "WuWei"
+        lines.append(f"{speaker}: {message.content}")
+    return "\n".join(lines)
+
+
+def summarize(previous: str, messages, api_key: str | None, user_id: int | None = None) -> str:
+    """Ask the fast model to fold messages into the previous summary.
+
+    The call waits behind interactive chat for the API key's rate limit
+    and raises ratelimit.RateLimited if capacity doesn't come in time.
+    Its tokens count towards user_id's daily usage.
+    """
+    max_tokens = settings.AGENT_MEMORY_SUMMARY_TOKENS
+    model = ChatAnthropic(
+        model=settings.AGENT_MODEL_TIERS["fast"]["model"],
+        anthropic_api_key=api_key,
+        max_tokens=max_tokens,
+    )
+    prompt = [
+        SystemMessage(content=SUMMARY_PROMPT.format(max_words=max_tokens * 3 // 4)),
+        HumanMessage(content=(
+            f"Existing summary:\n{previous or '(none yet)'}\n\n"
+            f"New messages:\n{_transcript(messages)}"
+        )),
+    ]
+    estimated = ratelimit.estimate(prompt)
+    ratelimit.acquire(api_key, estimated, ratelimit.BACKGROUND, max_wait=MAX_RATE_LIMIT_WAIT_SECONDS)
+    response = model.invoke(prompt)
+    ratelimit.settle(api_key, estimated, response)
+    if user_id is not None:
+        record_usage(user_id, usage_of(response))
+    content = response.content
+    return content if isinstance(content, str) else "".join(
+        block.get("text", "") for block in content if isinstance(block, dict)
+    )
+
+
+@shared_task
+def update_conversation_summary(user_id: int):
+    """Fold history older than the memory window into the rolling summary."""
+    try:
+        _update_summary(user_id)
+    finally:
+        # Let the next turn queue another run
+        cache.delete(summary_pending_key(user_id))
+
+
+def _update_summary(user_id: int) -> None:
+    user = User.objects.get(pk=user_id)
+    pending = unsummarized(user)[:MAX_MESSAGES_PER_RUN]
+    if not pending:
+        return
+
+    record, _ = ConversationSummary.objects.get_or_create(user=user)
+    api_key = user.anthropic_api_key or os.environ.get("ANTHROPIC_API_KEY")
+    try:
+        record.summary = summarize(record.summary, pending, api_key, user.pk).strip()
+    except ratelimit.RateLimited as e:
+        logger.warning("Skipped summary for %s: %s", user.email, e)
+        return
+    record.summarized_through = pending[-1]
+    record.save()
+
+    logger.info("Summarized %s messages for %s", len(pending), user.email)
@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, router
+from django.db.models.signals import post_save
 
 
 class JournalEntry(models.Model):
@@ -19,6 +20,48 @@ class JournalEntry(models.Model):
         return f"Journal {self.date} ({self.user})"
 
 
+class DailyCheckinQuerySet(models.QuerySet):
+
+    def upsert(self, user, date, **changes) -> "DailyCheckin":
+        """Write the (user, date) checkin in one INSERT ... ON CONFLICT DO UPDATE.
+
+        A new row gets the model defaults plus changes; an existing row has
+        only the changed columns updated. Returns the full row. post_save is
+        sent with update_fields set to the changed fields (created is always
+        False: the statement doesn't tell an insert from an update).
+        """
+        model = self.model
+        db = self._db or router.db_for_write(model)
+        connection = connections[db]
+        quote = connection.ops.quote_name
+        checkin = model(user=user, date=date, **changes)
+        fields = [f for f in model._meta.concrete_fields if not f.primary_key]
+        # With nothing to change, a no-op update still returns the existing row
+        updated = [model._meta.get_field(name).column for name in changes] or ["user_id"]
+
+        sql = (
+            "INSERT INTO {table} ({columns}) VALUES ({values}) "
+            "ON CONFLICT ({user}, {date}) DO UPDATE SET {updates} "
+            "RETURNING {returning}"
+        ).format(
+            table=quote(model._meta.db_table),
+            columns=", ".join(quote(f.column) for f in fields),
+            values=", ".join(["%s"] * len(fields)),
+            user=quote("user_id"),
+            date=quote("date"),
+            updates=", ".join(f"{quote(column)} = EXCLUDED.{quote(column)}" for column in updated),
+            returning=", ".join(quote(f.column) for f in model._meta.concrete_fields),
+        )
+        params = [f.get_db_prep_save(f.pre_save(checkin, add=True), connection) for f in fields]
+        checkin = next(iter(self.raw(sql, params, using=db)))
+
+        post_save.send(
+            sender=model, instance=checkin, created=False,
+            update_fields=frozenset(changes) or None, raw=False, using=db,
+        )
+        return checkin
+
+
 class DailyCheckin(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     date = models.DateField()
@@ -36,6 +79,8 @@ class DailyCheckin(models.Model):
     journal_completed = models.BooleanField(default=False)
     journal_completed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = DailyCheckinQuerySet.as_manager()
+
     class Meta:
         unique_together = ["user", "date"]
 
@@ -66,15 +66,11 @@ class CheckinViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=["post"], url_path="meditation")
     def meditation(self, request):
-        checkin, _ = DailyCheckin.objects.get_or_create(
-            user=request.user, date=date.today()
-        )
-        checkin.meditation_completed = True
+        changes = {"meditation_completed": True, "meditation_completed_at": timezone.now()}
         duration = request.data.get("duration_minutes")
         if duration is not None:
-            checkin.meditation_duration = int(duration)
-        checkin.meditation_completed_at = timezone.now()
-        checkin.save()
+            changes["meditation_duration"] = int(duration)
+        checkin = DailyCheckin.objects.upsert(request.user, date.today(), **changes)
         serializer = self.get_serializer(checkin)
         return Response(serializer.data)
 
@@ -0,0 +1,194 @@
+"""
+Natural-language due dates.
+
+Resolves what users actually type or say ("next friday", "in 3 days",
+"end of month", "march 5") to a date locally, so neither the agent nor
+the model has to do date arithmetic or ask a clarifying question. Dates
+are relative to today in the user's timezone (User.timezone).
+
+Supported, case-insensitive, with an optional leading "on", "by" or "due":
+
+- YYYY-MM-DD
+- today, tonight, tomorrow (tmrw), day after tomorrow, yesterday
+- a weekday ("friday", "fri"): its next occurrence after today
+- "this friday": this week's Friday, today included
+- "next friday": Friday of next week (weeks start on Monday)
+- "in 3 days", "in a week", "in two months", "3 days from now"
+- "next week" (next Monday), "this weekend" / "weekend" (Saturday),
+  "end of week" (Friday), "next month" (its 1st), "end of month"
+- "march 5", "5 march", "mar 5th", "march 5 2027": the next such date
+  when the year is left out
+
+Anything else raises ValueError.
+"""
+
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+WEEKDAYS = {
+    name: index
+    for index, names in enumerate([
+        ("monday", "mon"),
+        ("tuesday", "tue", "tues"),
+        ("wednesday", "wed"),
+        ("thursday", "thu", "thur", "thurs"),
+        ("friday", "fri"),
+        ("saturday", "sat"),
+        ("sunday", "sun"),
+    ])
+    for name in names
+}
+
+MONTHS = {
+    name: index
+    for index, names in enumerate([
+        ("january", "jan"), ("february", "feb"), ("march", "mar"),
+        ("april", "apr"), ("may",), ("june", "jun"), ("july", "jul"),
+        ("august", "aug"), ("september", "sep", "sept"), ("october", "oct"),
+        ("november", "nov"), ("december", "dec"),
+    ], start=1)
+    for name in names
+}
+
+NUMBERS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11,
+    "twelve": 12, "couple": 2, "a couple of": 2, "a few": 3, "few": 3,
+}
+
+FIXED = {
+    "today": 0,
+    "tonight": 0,
+    "tomorrow": 1,
+    "tmrw": 1,
+    "tmr": 1,
+    "day after tomorrow": 2,
+    "the day after tomorrow": 2,
+    "yesterday": -1,
+}
+
+_PREFIX = re.compile(r"^(?:on|by|due)\s+")
+_ISO = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_WEEKDAY = re.compile(r"^(?:(this|next|coming|this coming)\s+)?([a-z]+)$")
+_AMOUNT = rf"(\d+|{'|'.join(sorted(map(re.escape, NUMBERS), key=len, reverse=True))})"
+_RELATIVE = re.compile(
+    rf"^(?:in\s+{_AMOUNT}\s+(day|week|month)s?|{_AMOUNT}\s+(day|week|month)s?\s+from\s+(?:now|today))$"
+)
+_MONTH_DAY = re.compile(r"^([a-z]+)\.?\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?$")
+_DAY_MONTH = re.compile(r"^(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?([a-z]+)\.?(?:,?\s+(\d{4}))?$")
+
+
+def today_in(tz_name: str | None) -> date:
+    """Today's date in a timezone, or the server's date if it is unknown."""
+    if tz_name:
+        try:
+            return datetime.now(ZoneInfo(tz_name)).date()
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return date.today()
+
+
+def add_months(day: date, months: int) -> date:
+    """The same day of month, months later, clamped to the month's end."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _amount(text: str) -> int:
+    return int(text) if text.isdigit() else NUMBERS[text]
+
+
+def _relative(amount: int, unit: str, today: date) -> date:
+    try:
+        if unit == "month":
+            return add_months(today, amount)
+        return today + timedelta(days=amount * (7 if unit == "week" else 1))
+    except OverflowError:
+        # Past date.max, e.g. "in 9999999 days"
+        raise ValueError(f"in {amount} {unit}s is past the last date") from None
+
+
+def _weekday(qualifier: str | None, weekday: int, today: date) -> date:
+    if qualifier == "next":
+        monday = today + timedelta(days=7 - today.weekday())
+        return monday + timedelta(days=weekday)
+    ahead = (weekday - today.weekday()) % 7
+    if qualifier == "this":
+        return today + timedelta(days=ahead)
+    return today + timedelta(days=ahead or 7)
+
+
+def _calendar_date(month_name: str, day_text: str, year_text: str | None, today: date) -> date | None:
+    month = MONTHS.get(month_name)
+    if month is None:
+        return None
+    day = int(day_text)
+    # 2000 is a leap year: only Feb 29 may need a later year, "april 31" never exists
+    if not 1 <= day <= calendar.monthrange(2000, month)[1]:
+        raise ValueError(f"{month_name} {day} is not a date")
+    if year_text:
+        return date(int(year_text), month, day)
+    candidate = date(today.year, month, day) if day <= calendar.monthrange(today.year, month)[1] else None
+    if candidate is None or candidate < today:
+        # Feb 29 and dates already past this year mean the next one
+        year = today.year + 1
+        while day > calendar.monthrange(year, month)[1]:
+            year += 1
+        return date(year, month, day)
+    return candidate
+
+
+def _named(text: str, today: date) -> date | None:
+    if text == "next week":
+        return today + timedelta(days=7 - today.weekday())
+    if text in ("weekend", "this weekend", "the weekend"):
+        return today + timedelta(days=(5 - today.weekday()) % 7)
+    if text in ("end of week", "end of the week", "the end of the week"):
+        return today + timedelta(days=(4 - today.weekday()) % 7)
+    if text == "next month":
+        return add_months(today.replace(day=1), 1)
+    if text in ("end of month", "end of the month", "the end of the month"):
+        return today.replace(day=calendar.monthrange(today.year, today.month)[1])
+    return None
+
+
+def resolve_date(text: str, tz_name: str | None = None, today: date | None = None) -> date:
+    """Resolve a due date expression to a date; raises ValueError if it can't."""
+    today = today or today_in(tz_name)
+    phrase = _PREFIX.sub("", " ".join(text.lower().split()))
+
+    if _ISO.match(phrase):
+        return date.fromisoformat(phrase)
+    if phrase in FIXED:
+        return today + timedelta(days=FIXED[phrase])
+
+    named = _named(phrase, today)
+    if named is not None:
+        return named
+
+    match = _WEEKDAY.match(phrase)
+    if match and match.group(2) in WEEKDAYS:
+        qualifier = match.group(1)
+        qualifier = "next" if qualifier == "next" else "this" if qualifier == "this" else None
+        return _weekday(qualifier, WEEKDAYS[match.group(2)], today)
+
+    match = _RELATIVE.match(phrase)
+    if match:
+        amount, unit = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+        return _relative(_amount(amount), unit, today)
+
+    match = _MONTH_DAY.match(phrase)
+    if match:
+        resolved = _calendar_date(match.group(1), match.group(2), match.group(3), today)
+        if resolved is not None:
+            return resolved
+    match = _DAY_MONTH.match(phrase)
+    if match:
+        resolved = _calendar_date(match.group(2), match.group(1), match.group(3), today)
+        if resolved is not None:
+            return resolved
+
+    raise ValueError(f"Can't understand the date {text!r}")
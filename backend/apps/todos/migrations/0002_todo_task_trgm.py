@@ -0,0 +1,35 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class AddIndexOnPostgres(migrations.AddIndex):
+    """AddIndex that only creates the index on PostgreSQL.
+
+    Other databases (e.g. SQLite in local setups) get the index in the
+    migration state only; search.py falls back to ranking in Python there.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("todos", "0001_initial"),
+    ]
+
+    operations = [
+        # A no-op on databases other than PostgreSQL
+        TrigramExtension(),
+        AddIndexOnPostgres(
+            model_name="todo",
+            index=GinIndex(fields=["task"], name="todo_task_trgm", opclasses=["gin_trgm_ops"]),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -12,6 +13,11 @@ class Todo(models.Model):
 
     class Meta:
         ordering = ["completed", "due_date", "-created_at"]
+        indexes = [
+            # Fuzzy task search on PostgreSQL (see search.py); migration 0002
+            # skips it on other databases
+            GinIndex(fields=["task"], name="todo_task_trgm", opclasses=["gin_trgm_ops"]),
+        ]
 
     def __str__(self) -> str:
         return self.task
@@ -0,0 +1,83 @@
+"""
+Ranked fuzzy search over todo tasks.
+
+A search ("call doctor", "grocries") is ranked against each task by
+trigram similarity: the average of pg_trgm's word_similarity (how well
+the search matches some run of words in the task) and similarity (how
+close the whole strings are, so "Call mom" beats "Call mom later").
+
+On PostgreSQL this is one indexed query: the word-similarity operator
+uses the GIN trigram index on Todo.task and only the top rows come back,
+so the cost stays flat as a user's list grows. Other databases rank the
+user's todos in Python with the same trigram rules.
+
+best_match() picks the top todo when it is clearly ahead of the rest;
+otherwise the caller gets the closest few to choose from.
+"""
+
+import re
+
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, FloatField, Value, When
+
+# pg_trgm.word_similarity_threshold's default, used by the index operator
+MIN_WORD_SIMILARITY = 0.6
+# Rank gap that makes the top match a clear winner
+CLEAR_LEAD = 0.15
+MAX_MATCHES = 5
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm's trigrams: each lowercased word padded with two spaces before, one after."""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(search: str, task: str) -> float:
+    a, b = trigrams(search), trigrams(task)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def word_similarity(search: str, task: str) -> float:
+    """Share of the search's trigrams found in the task (pg_trgm's is over the best run of words)."""
+    a = trigrams(search)
+    return len(a & trigrams(task)) / len(a) if a else 0.0
+
+
+def _uses_trigram_index(queryset) -> bool:
+    return connections[queryset.db].vendor == "postgresql"
+
+
+def ranked(queryset, search: str):
+    """Todos in queryset matching search, best first, each annotated with rank."""
+    if _uses_trigram_index(queryset):
+        return queryset.filter(task__trigram_word_similar=search).annotate(
+            rank=(TrigramWordSimilarity(search, "task") + TrigramSimilarity("task", search)) / 2,
+        ).order_by("-rank", "-created_at")
+
+    ranks = {}
+    for pk, task in queryset.values_list("pk", "task"):
+        word = word_similarity(search, task)
+        if word >= MIN_WORD_SIMILARITY:
+            ranks[pk] = (word + similarity(search, task)) / 2
+    return queryset.filter(pk__in=ranks).annotate(
+        rank=Case(
+            *(When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+    ).order_by("-rank", "-created_at")
+
+
+def best_match(queryset, search: str) -> tuple:
+    """(winner or None, top MAX_MATCHES candidates) for search."""
+    candidates = list(ranked(queryset, search)[:MAX_MATCHES])
+    if candidates and (len(candidates) == 1 or candidates[0].rank - candidates[1].rank >= CLEAR_LEAD):
+        return candidates[0], candidates
+    return None, candidates
@@ -1,9 +1,26 @@
 from rest_framework import serializers
 
+from .dates import resolve_date
 from .models import Todo
 
 
+class DueDateField(serializers.DateField):
+    """A date, or an expression like "next friday" resolved in the user's timezone."""
+
+    def to_internal_value(self, value):
+        if isinstance(value, str):
+            request = self.context.get("request")
+            tz_name = getattr(getattr(request, "user", None), "timezone", None)
+            try:
+                return resolve_date(value, tz_name)
+            except ValueError:
+                self.fail("invalid", format="YYYY-MM-DD, or e.g. \"tomorrow\", \"next friday\", \"in 3 days\"")
+        return super().to_internal_value(value)
+
+
 class TodoSerializer(serializers.ModelSerializer):
+    due_date = DueDateField(required=False, allow_null=True)
+
     class Meta:
         model = Todo
         fields = [
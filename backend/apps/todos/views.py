@@ -4,6 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 
 from .models import Todo
+from .search import ranked
 from .serializers import TodoSerializer
 
 
@@ -16,6 +17,10 @@ class TodoViewSet(viewsets.ModelViewSet):
         date_param = self.request.query_params.get("date")
         if date_param:
             qs = qs.filter(created_at__date=date_param)
+        # ?q= fuzzy-matches tasks, best match first
+        search = self.request.query_params.get("q", "").strip()
+        if search:
+            qs = ranked(qs, search)
         return qs
 
     @action(detail=True, methods=["post"])
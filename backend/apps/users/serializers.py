@@ -1,10 +1,15 @@
 from django.contrib.auth import authenticate, password_validation
 from rest_framework import serializers
 
+from apps.agent.usage import usage_summary
+
 from .models import User
 
 
 class UserSerializer(serializers.ModelSerializer):
+    # Today's model tokens and budgets (see apps.agent.usage)
+    token_usage = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = [
@@ -14,10 +19,14 @@ class UserSerializer(serializers.ModelSerializer):
             "daily_reminder_time",
             "reminder_enabled",
             "reflections_today",
+            "token_usage",
             "date_joined",
         ]
         read_only_fields = ["id", "email", "reflections_today", "date_joined"]
 
+    def get_token_usage(self, user) -> dict:
+        return usage_summary(user.pk)
+
 
 class RegisterSerializer(serializers.Serializer):
     email = serializers.EmailField()
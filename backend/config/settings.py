@@ -85,6 +85,9 @@ DATABASES = {
         conn_max_age=600,
     )
 }
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Trigram lookups for todo search (apps/todos/search.py)
+    INSTALLED_APPS.append("django.contrib.postgres")
 
 # Auth
 AUTH_USER_MODEL = "users.User"
@@ -171,6 +174,15 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache (shared by all workers; a separate Redis database from Channels/Celery)
+CACHE_URL = os.environ.get("CACHE_URL", "redis://redis:6379/1")
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_URL,
+    },
+}
+
 # Celery
 CELERY_BROKER_URL = os.environ.get("REDIS_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.environ.get("REDIS_URL", "redis://redis:6379/0")
@@ -188,7 +200,72 @@ CELERY_BEAT_SCHEDULE = {
         "task": "apps.journal.tasks.reset_rate_limits",
         "schedule": crontab(hour=0, minute=5),  # 00:05 UTC
     },
+    "prune-agent-checkpoints": {
+        "task": "apps.agent.tasks.prune_agent_checkpoints",
+        "schedule": crontab(minute=30),  # Hourly
+    },
+    "rollup-token-usage": {
+        "task": "apps.agent.tasks.rollup_token_usage",
+        "schedule": crontab(minute="*/15"),
+    },
+}
+
+# Agent
+AGENT_ASYNC = os.environ.get("AGENT_ASYNC", "True").lower() in ("true", "1")
+AGENT_MAX_ASYNC_RUNS = int(os.environ.get("AGENT_MAX_ASYNC_RUNS", "256"))  # in-flight async runs
+AGENT_MAX_WORKERS = int(os.environ.get("AGENT_MAX_WORKERS", "16"))  # concurrent runs per process
+AGENT_MAX_QUEUE = int(os.environ.get("AGENT_MAX_QUEUE", "32"))  # runs waiting for a worker
+AGENT_TOOL_THREADS = int(os.environ.get("AGENT_TOOL_THREADS", "8"))  # concurrent tool calls per process
+AGENT_MODEL_CACHE_SIZE = int(os.environ.get("AGENT_MODEL_CACHE_SIZE", "64"))  # bound models kept
+AGENT_MODEL_IDLE_SECONDS = int(os.environ.get("AGENT_MODEL_IDLE_SECONDS", "900"))
+AGENT_TIERING = os.environ.get("AGENT_TIERING", "True").lower() in ("true", "1")
+AGENT_MODEL_TIERS = {
+    # Commands and confirmations
+    "fast": {
+        "model": os.environ.get("AGENT_FAST_MODEL", "claude-haiku-4-5"),
+        "max_tokens": int(os.environ.get("AGENT_FAST_MAX_TOKENS", "512")),
+    },
+    # Journal reflections, emotional content, pattern questions
+    "deep": {
+        "model": os.environ.get("AGENT_DEEP_MODEL", "claude-sonnet-4-20250514"),
+        "max_tokens": int(os.environ.get("AGENT_DEEP_MAX_TOKENS", "1024")),
+    },
 }
+AGENT_TERMINAL_TOOLS = os.environ.get("AGENT_TERMINAL_TOOLS", "True").lower() in ("true", "1")
+AGENT_FAST_PATH = os.environ.get("AGENT_FAST_PATH", "True").lower() in ("true", "1")
+AGENT_PROMPT_CACHING = os.environ.get("AGENT_PROMPT_CACHING", "True").lower() in ("true", "1")
+AGENT_MEMORY_TURNS = int(os.environ.get("AGENT_MEMORY_TURNS", "10"))  # recent turns sent to the agent
+AGENT_MEMORY_TOKENS = int(os.environ.get("AGENT_MEMORY_TOKENS", "2000"))  # token budget for those turns
+AGENT_MEMORY_SUMMARY_BATCH = int(os.environ.get("AGENT_MEMORY_SUMMARY_BATCH", "10"))  # messages per summary update
+AGENT_MEMORY_SUMMARY_TOKENS = int(os.environ.get("AGENT_MEMORY_SUMMARY_TOKENS", "400"))  # max summary length
+AGENT_CHECKPOINTS = os.environ.get("AGENT_CHECKPOINTS", "True").lower() in ("true", "1")
+AGENT_CHECKPOINT_TTL_HOURS = int(os.environ.get("AGENT_CHECKPOINT_TTL_HOURS", "24"))  # abandoned turns
+AGENT_TOOL_RESULT_TOKENS = int(os.environ.get("AGENT_TOOL_RESULT_TOKENS", "800"))  # per tool result
+AGENT_TOOL_FIELD_CHARS = int(os.environ.get("AGENT_TOOL_FIELD_CHARS", "600"))  # longer text is elided
+AGENT_TURN_SECONDS = float(os.environ.get("AGENT_TURN_SECONDS", "90"))  # deadline for one turn
+AGENT_MAX_ITERATIONS = int(os.environ.get("AGENT_MAX_ITERATIONS", "6"))  # model calls per turn
+AGENT_MODEL_RETRIES = int(os.environ.get("AGENT_MODEL_RETRIES", "2"))  # after the first attempt
+AGENT_RETRY_BASE_SECONDS = float(os.environ.get("AGENT_RETRY_BASE_SECONDS", "0.5"))  # backoff base
+AGENT_HEDGE_SECONDS = float(os.environ.get("AGENT_HEDGE_SECONDS", "10"))  # latency SLO before a hedged request, 0 = off
+AGENT_FALLBACK_MODEL = os.environ.get("AGENT_FALLBACK_MODEL", AGENT_MODEL_TIERS["fast"]["model"])  # empty = none
+AGENT_BREAKER_FAILURES = int(os.environ.get("AGENT_BREAKER_FAILURES", "5"))  # failures that open the breaker
+AGENT_BREAKER_WINDOW_SECONDS = int(os.environ.get("AGENT_BREAKER_WINDOW_SECONDS", "60"))
+AGENT_BREAKER_COOLDOWN_SECONDS = int(os.environ.get("AGENT_BREAKER_COOLDOWN_SECONDS", "30"))
+# Anthropic rate limits per API key, shared by chat and Celery (0 = unlimited)
+AGENT_RATE_LIMIT_URL = os.environ.get("AGENT_RATE_LIMIT_URL", CACHE_URL)  # redis://... or memory://
+AGENT_RATE_LIMIT_RPM = int(os.environ.get("AGENT_RATE_LIMIT_RPM", "50"))  # requests per minute
+AGENT_RATE_LIMIT_TPM = int(os.environ.get("AGENT_RATE_LIMIT_TPM", "40000"))  # tokens per minute
+# Share of each bucket background jobs leave for interactive chat
+AGENT_RATE_LIMIT_BACKGROUND_RESERVE = float(os.environ.get("AGENT_RATE_LIMIT_BACKGROUND_RESERVE", "0.25"))
+# Daily tokens per user: past the soft budget calls use the fast tier, past the hard one they're refused (0 = none)
+AGENT_DAILY_TOKEN_SOFT_BUDGET = int(os.environ.get("AGENT_DAILY_TOKEN_SOFT_BUDGET", "200000"))
+AGENT_DAILY_TOKEN_HARD_BUDGET = int(os.environ.get("AGENT_DAILY_TOKEN_HARD_BUDGET", "500000"))
+AGENT_CONTEXT_SNAPSHOT = os.environ.get("AGENT_CONTEXT_SNAPSHOT", "True").lower() in ("true", "1")
+AGENT_SNAPSHOT_TOKENS = int(os.environ.get("AGENT_SNAPSHOT_TOKENS", "300"))  # cap on the prompt snapshot
+AGENT_SNAPSHOT_TTL_SECONDS = int(os.environ.get("AGENT_SNAPSHOT_TTL_SECONDS", "300"))
+# Share of agent runs recorded for replay (0 = off); recordings include message text
+AGENT_RECORD_RATE = float(os.environ.get("AGENT_RECORD_RATE", "0"))
+AGENT_RECORDINGS_DIR = os.environ.get("AGENT_RECORDINGS_DIR") or str(BASE_DIR / "agent_recordings")
 
 # Logging
 LOGGING = {
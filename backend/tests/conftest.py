@@ -1,6 +1,8 @@
 from datetime import date
 
 import pytest
+
+from apps.agent.fakes import ScriptedChatModel
 from apps.users.models import User
 
 
@@ -26,3 +28,38 @@ def other_user(db) -> User:
 def today() -> date:
     """Today's date for test consistency."""
     return date.today()
+
+
+@pytest.fixture
+def fake_chat_model(monkeypatch):
+    """Replace Claude with a fake that replays the given AIMessages in order."""
+
+    from apps.agent.llm import registry
+
+    def install(*responses):
+        model = ScriptedChatModel(messages=iter(responses))
+        monkeypatch.setattr(
+            "apps.agent.llm.ChatAnthropic", lambda **kwargs: model
+        )
+        registry.clear()
+        return model
+
+    yield install
+    registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Cached per-user data (e.g. context snapshots) must not leak between tests."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(settings):
+    """Tests don't share an API quota; test_agent_ratelimit turns the limiter on."""
+    settings.AGENT_RATE_LIMIT_RPM = 0
+    settings.AGENT_RATE_LIMIT_TPM = 0
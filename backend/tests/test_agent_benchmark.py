@@ -0,0 +1,122 @@
+"""
+TDD: Agent Benchmark Tests
+
+The offline benchmark swaps Claude for a ScriptedChatModel (per run, via
+configurable["chat_model"]) and reports latency percentiles, DB queries
+per turn and throughput for agent.invoke and ChatConsumer.
+"""
+
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+
+@pytest.mark.django_db
+def test_scripted_model_replays_responses_with_latency():
+    from apps.agent.fakes import ScriptedChatModel
+
+    model = ScriptedChatModel(
+        messages=iter([AIMessage(content="one"), AIMessage(content="two")]),
+        latency=0.05,
+    )
+
+    started = time.perf_counter()
+    first = model.invoke([HumanMessage(content="hi")])
+    assert time.perf_counter() - started >= 0.05
+    assert first.content == "one"
+    assert model.invoke([HumanMessage(content="hi")]).content == "two"
+
+
+def test_scripted_model_streams_tool_calls():
+    from apps.agent.fakes import ScriptedChatModel
+
+    call = {"name": "get_todos", "args": {}, "id": "call_1", "type": "tool_call"}
+    model = ScriptedChatModel(messages=iter([AIMessage(content="Let me look", tool_calls=[call])]))
+
+    chunks = list(model.bind_tools([]).stream([HumanMessage(content="todos?")]))
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        merged += chunk
+
+    assert merged.content == "Let me look"
+    assert merged.tool_calls[0]["name"] == "get_todos"
+
+
+@pytest.mark.django_db
+def test_graph_uses_chat_model_from_config(user):
+    from apps.agent.fakes import ScriptedChatModel
+    from apps.agent.graph import agent
+
+    model = ScriptedChatModel(messages=iter([AIMessage(content="Breathe.")]))
+    config = {"configurable": {"user": user, "chat_model": model}}
+
+    result = agent.invoke({"messages": [HumanMessage(content="Hello")]}, config)
+
+    assert result["messages"][-1].content == "Breathe."
+
+
+@pytest.mark.django_db
+def test_run_graph_reports_stats_and_cleans_up():
+    from apps.agent.benchmark import SCENARIOS, run_graph
+    from apps.users.models import User
+
+    scenario = next(s for s in SCENARIOS if s.name == "log_meditation")
+    stats = run_graph(scenario, turns=3, latency=0).as_dict()
+
+    assert stats["turns"] == 3
+    assert stats["p50_ms"] <= stats["p99_ms"]
+    assert stats["queries_per_turn"] > 0
+    assert stats["turns_per_second"] > 0
+    assert not User.objects.filter(email__startswith="benchmark-").exists()
+
+
+def test_query_counter_counts_queries(db):
+    from apps.agent.benchmark import QueryCounter
+    from apps.users.models import User
+
+    with QueryCounter() as queries:
+        User.objects.count()
+        User.objects.exists()
+    User.objects.count()
+
+    assert queries.count == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_run_consumer_reports_stats():
+    from apps.agent.benchmark import SCENARIOS, run_consumer
+
+    scenario = next(s for s in SCENARIOS if s.name == "chat")
+    stats = run_consumer(scenario, turns=4, latency=0, concurrency=2).as_dict()
+
+    assert stats["mode"] == "consumer"
+    assert stats["turns"] == 4
+    assert stats["queries_per_turn"] > 0
+
+
+@pytest.mark.django_db
+def test_benchmark_command_prints_json():
+    import json
+    from io import StringIO
+
+    from django.core.management import call_command
+
+    out = StringIO()
+    call_command(
+        "benchmark_agent", "--mode", "graph", "--scenario", "chat",
+        "--turns", "2", "--json", stdout=out,
+    )
+
+    (result,) = json.loads(out.getvalue())
+    assert result["scenario"] == "chat"
+    assert result["turns"] == 2
+
+
+@pytest.mark.django_db
+def test_benchmark_command_rejects_unknown_scenario():
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+
+    with pytest.raises(CommandError):
+        call_command("benchmark_agent", "--scenario", "nope")
@@ -0,0 +1,152 @@
+"""
+TDD: Turn Budget Tests
+
+A turn carries a deadline and a model-call budget in its config. When
+either runs out the graph stops (cancelling an in-flight model call) and
+answers with the best partial reply instead of an error.
+"""
+
+import asyncio
+import time
+
+import anthropic
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def config_for(user, **budget):
+    return {"configurable": {"user": user, "anthropic_api_key": "k", **budget}}
+
+
+class SlowModel:
+    """Stands in for a bound model whose calls hang."""
+
+    def __init__(self):
+        self.cancelled = False
+
+    def invoke(self, messages, timeout=None):
+        raise anthropic.APITimeoutError(request=httpx.Request("POST", "https://api.anthropic.com"))
+
+    async def ainvoke(self, messages, config=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+@pytest.fixture
+def slow_model(monkeypatch):
+    model = SlowModel()
+    monkeypatch.setattr("apps.agent.graph._bound_model", lambda *args: model)
+    return model
+
+
+class TestPartialAnswer:
+
+    def test_prefers_tool_confirmations(self):
+        from apps.agent.budget import partial_answer
+
+        messages = [
+            HumanMessage(content="meditated"),
+            AIMessage(content="On it.", tool_calls=[tool_call("log_meditation", {})]),
+            ToolMessage(
+                content="{}", artifact={"logged": True, "duration": 10},
+                tool_call_id="call_1", name="log_meditation",
+            ),
+        ]
+        assert partial_answer(messages) == "Logged your meditation — 10 minutes."
+
+    def test_falls_back_to_model_text(self):
+        from apps.agent.budget import partial_answer
+
+        messages = [HumanMessage(content="hi"), AIMessage(content="Let me think about that.")]
+        assert partial_answer(messages) == "Let me think about that."
+
+    def test_ignores_earlier_turns(self):
+        from apps.agent.budget import OUT_OF_TIME_MESSAGE, partial_answer
+
+        messages = [
+            HumanMessage(content="hi"), AIMessage(content="Hello!"),
+            HumanMessage(content="and now?"),
+        ]
+        assert partial_answer(messages) == OUT_OF_TIME_MESSAGE
+
+
+class TestIterationBudget:
+
+    def test_stops_looping_after_max_iterations(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        # The model would keep calling tools; the budget allows two calls
+        fake_chat_model(*[
+            AIMessage(content="", tool_calls=[tool_call("get_todos", {}, f"c{i}")])
+            for i in range(5)
+        ])
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="todos?")]},
+            config_for(user, max_iterations=2),
+        )
+
+        model_calls = [m for m in result["messages"] if isinstance(m, AIMessage) and m.tool_calls]
+        assert len(model_calls) == 2
+        assert result["messages"][-1].content == "Your todo list is clear."
+
+
+class TestDeadline:
+
+    def test_expired_deadline_skips_model(self, user, fake_chat_model):
+        from apps.agent.budget import OUT_OF_TIME_MESSAGE
+        from apps.agent.graph import agent
+
+        fake_chat_model()  # any model call would fail
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="hi")]},
+            config_for(user, deadline=time.monotonic() - 1),
+        )
+
+        assert result["messages"][-1].content == OUT_OF_TIME_MESSAGE
+
+    def test_sync_model_timeout_returns_partial(self, user, slow_model):
+        from apps.agent.budget import OUT_OF_TIME_MESSAGE
+        from apps.agent.graph import agent
+
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="hi")]},
+            config_for(user, deadline=time.monotonic() + 5),
+        )
+
+        assert result["messages"][-1].content == OUT_OF_TIME_MESSAGE
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_async_model_call_cancelled(self, user, slow_model):
+        from apps.agent.budget import OUT_OF_TIME_MESSAGE
+        from apps.agent.graph import async_agent
+
+        started = time.monotonic()
+        result = await async_agent.ainvoke(
+            {"messages": [HumanMessage(content="hi")]},
+            config_for(user, deadline=time.monotonic() + 0.2),
+        )
+
+        assert time.monotonic() - started < 5
+        assert slow_model.cancelled
+        assert result["messages"][-1].content == OUT_OF_TIME_MESSAGE
+
+    def test_consumer_sets_budget(self, user, settings):
+        from apps.chat.consumers import ChatConsumer
+
+        settings.AGENT_TURN_SECONDS = 30
+        settings.AGENT_MAX_ITERATIONS = 4
+        consumer = ChatConsumer()
+        consumer.user = user
+        configurable = consumer._agent_config()["configurable"]
+
+        assert 29 < configurable["deadline"] - time.monotonic() <= 30
+        assert configurable["max_iterations"] == 4
@@ -0,0 +1,277 @@
+"""
+TDD: Agent Checkpoint Tests
+
+Each agent turn checkpoints its graph state in the database, so a turn
+that dies part-way resumes after the last completed node instead of
+repeating model calls and tool writes.
+
+Note: Async tests need transaction=True because the saver's ORM calls run
+in a separate thread, so the standard test rollback doesn't apply.
+"""
+
+import asyncio
+import threading
+from datetime import timedelta
+from unittest.mock import AsyncMock, call
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.agent.models import AgentCheckpoint, AgentCheckpointWrite
+from apps.chat.models import ChatMessage
+from apps.journal.models import DailyCheckin
+from apps.mantras.models import Mantra
+
+pytestmark = [pytest.mark.asyncio, pytest.mark.django_db(transaction=True)]
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def config_for(user, thread_id="user-1:msg-1"):
+    return {
+        "configurable": {
+            "user": user,
+            "anthropic_api_key": "sk-secret-key",
+            "thread_id": thread_id,
+        }
+    }
+
+
+def consumer_for(user):
+    from apps.chat.consumers import ChatConsumer
+
+    consumer = ChatConsumer()
+    consumer.user = user
+    consumer.current_message_id = None
+    consumer.send_json = AsyncMock()
+    return consumer
+
+
+async def run_turn(config, inputs):
+    from apps.agent.graph import async_checkpointed_agent
+
+    return await async_checkpointed_agent.ainvoke(inputs, config)
+
+
+@pytest.fixture
+def flaky_meditation(monkeypatch):
+    """Make log_meditation fail once, like a worker dying mid-turn."""
+    from apps.agent import graph
+
+    real = graph.ASYNC_TOOL_FUNCTIONS["log_meditation"]
+    calls = []
+
+    async def flaky(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("worker restarted")
+        return await real(**kwargs)
+
+    monkeypatch.setitem(graph.ASYNC_TOOL_FUNCTIONS, "log_meditation", flaky)
+    return calls
+
+
+class TestCheckpointSaver:
+
+    async def test_state_saved_per_thread(self, user, fake_chat_model):
+        from apps.agent.graph import async_checkpointed_agent
+
+        fake_chat_model(AIMessage(content="Hello!"))
+        config = config_for(user)
+        await run_turn(config, {"messages": [HumanMessage(content="hi")]})
+
+        state = await async_checkpointed_agent.aget_state(config)
+        assert [m.content for m in state.values["messages"]] == ["hi", "Hello!"]
+        assert state.next == ()
+        assert await AgentCheckpoint.objects.filter(thread_id="user-1:msg-1").aexists()
+
+    async def test_api_key_not_stored(self, user, fake_chat_model):
+        from apps.agent.checkpoints import checkpointer
+
+        fake_chat_model(AIMessage(content="Hello!"))
+        config = config_for(user)
+        await run_turn(config, {"messages": [HumanMessage(content="hi")]})
+
+        async for checkpoint_tuple in checkpointer.alist(config):
+            assert "sk-secret-key" not in str(checkpoint_tuple.metadata)
+        async for row in AgentCheckpoint.objects.all():
+            assert b"sk-secret-key" not in bytes(row.metadata)
+
+    async def test_large_payloads_compressed(self, user, fake_chat_model):
+        from apps.agent.checkpoints import checkpointer
+
+        fake_chat_model(AIMessage(content="ok " * 2000))
+        config = config_for(user)
+        await run_turn(config, {"messages": [HumanMessage(content="hi")]})
+
+        latest = await AgentCheckpoint.objects.order_by("-checkpoint_id").afirst()
+        assert latest.type.endswith("+zlib")
+        checkpoint_tuple = await checkpointer.aget_tuple(config)
+        messages = checkpoint_tuple.checkpoint["channel_values"]["messages"]
+        assert messages[-1].content == "ok " * 2000
+
+    async def test_delete_thread(self, user, fake_chat_model):
+        from apps.agent.checkpoints import checkpointer
+
+        fake_chat_model(AIMessage(content="Hello!"))
+        await run_turn(config_for(user), {"messages": [HumanMessage(content="hi")]})
+        await checkpointer.adelete_thread("user-1:msg-1")
+
+        assert not await AgentCheckpoint.objects.aexists()
+        assert not await AgentCheckpointWrite.objects.aexists()
+
+    async def test_threads_do_not_queue_behind_each_other(self, user, monkeypatch):
+        from apps.agent.checkpoints import checkpointer
+
+        # Both reads must be in flight at once to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def get_tuple(config):
+            barrier.wait()
+
+        monkeypatch.setattr(checkpointer, "get_tuple", get_tuple)
+
+        assert await asyncio.gather(
+            checkpointer.aget_tuple(config_for(user, "a")),
+            checkpointer.aget_tuple(config_for(user, "b")),
+        ) == [None, None]
+
+
+class TestResume:
+
+    async def test_resumes_after_last_completed_node(self, user, fake_chat_model, flaky_meditation):
+        from apps.agent.graph import async_checkpointed_agent
+
+        # One scripted response: resuming must not call the model again
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("log_meditation", {"duration_minutes": 10}),
+            ]),
+        )
+        config = config_for(user)
+        with pytest.raises(RuntimeError):
+            await run_turn(config, {"messages": [HumanMessage(content="meditated 10 min")]})
+        assert (await async_checkpointed_agent.aget_state(config)).next == ("tools",)
+
+        result = await run_turn(config, None)
+
+        assert "10 minutes" in result["messages"][-1].content
+        checkin = await DailyCheckin.objects.aget(user=user)
+        assert checkin.meditation_duration == 10
+
+    async def test_consumer_retry_resumes_turn(self, user, fake_chat_model, flaky_meditation, settings):
+        from apps.chat.consumers import ChatConsumer
+
+        settings.AGENT_CHECKPOINTS = True
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("log_meditation", {"duration_minutes": 10}),
+            ]),
+        )
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.send_json = AsyncMock()
+        message = await consumer.save_user_message("meditated 10 min", "c-1")
+        consumer.current_message_id = message.id
+
+        with pytest.raises(RuntimeError):
+            await consumer._arun_agent("meditated 10 min")
+        reply = await consumer._arun_agent("meditated 10 min")
+
+        assert "10 minutes" in reply
+        assert len(flaky_meditation) == 2
+
+
+class TestReconnect:
+    """The client resends its unanswered message, with the same client_id,
+    on every reconnect. An answered turn must not run again."""
+
+    message = {"type": "message", "content": "Mantra: Breathe", "client_id": "c-1"}
+
+    @pytest.fixture(autouse=True)
+    def one_model_call(self, fake_chat_model, settings):
+        # One scripted response: running the turn again would fail
+        settings.AGENT_CHECKPOINTS = True
+        settings.AGENT_FAST_PATH = False
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[tool_call("add_mantra", {"content": "Breathe"})]),
+        )
+
+    async def test_saved_reply_is_resent(self, user):
+        first = consumer_for(user)
+        await first.receive_json(self.message)
+        complete = first.send_json.await_args_list[-1]
+
+        # The socket dropped before the complete frame arrived
+        second = consumer_for(user)
+        await second.receive_json(self.message)
+
+        assert second.send_json.await_args_list == [complete]
+        assert complete == call({"type": "complete", "content": "Added your mantra: “Breathe”"})
+        assert await Mantra.objects.acount() == 1
+        assert await ChatMessage.objects.acount() == 2
+        # Saved replies leave no checkpoints behind
+        assert not await AgentCheckpoint.objects.aexists()
+
+    async def test_finished_run_is_not_repeated(self, user):
+        consumer = consumer_for(user)
+        message = await consumer.save_user_message("Mantra: Breathe", "c-1")
+        consumer.current_message_id = message.id
+        # The run reached the end, but the worker died before saving the reply
+        reply = await consumer._arun_agent("Mantra: Breathe")
+
+        await consumer_for(user).receive_json(self.message)
+
+        assert await Mantra.objects.acount() == 1
+        saved = [m.content async for m in ChatMessage.objects.filter(role="assistant")]
+        assert saved == [reply]
+        assert not await AgentCheckpoint.objects.aexists()
+
+
+class TestRetryMessage:
+
+    async def test_resend_with_client_id_reuses_message(self, user):
+        from apps.chat.consumers import ChatConsumer
+
+        consumer = ChatConsumer()
+        consumer.user = user
+
+        first = await consumer.save_user_message("meditated 10 min", "c-1")
+        await consumer.save_message("assistant", "Logged.")
+        retry = await consumer.save_user_message("meditated 10 min", "c-1")
+
+        assert retry.id == first.id
+        assert await ChatMessage.objects.filter(role="user").acount() == 1
+
+    async def test_same_text_is_a_new_message(self, user):
+        from apps.chat.consumers import ChatConsumer
+
+        consumer = ChatConsumer()
+        consumer.user = user
+
+        first = await consumer.save_user_message("hi")
+        second = await consumer.save_user_message("hi")
+        third = await consumer.save_user_message("hi", "c-2")
+
+        assert len({first.id, second.id, third.id}) == 3
+
+
+class TestPruning:
+
+    async def test_prunes_abandoned_threads(self, user, fake_chat_model):
+        from apps.agent.checkpoints import prune_checkpoints
+
+        fake_chat_model(AIMessage(content="old"), AIMessage(content="new"))
+        await run_turn(config_for(user, "old-thread"), {"messages": [HumanMessage(content="hi")]})
+        await run_turn(config_for(user, "new-thread"), {"messages": [HumanMessage(content="hi")]})
+        await AgentCheckpoint.objects.filter(thread_id="old-thread").aupdate(
+            created_at=timezone.now() - timedelta(hours=48)
+        )
+
+        assert await sync_to_async(prune_checkpoints)(older_than_hours=24) == 1
+        threads = {row.thread_id async for row in AgentCheckpoint.objects.all()}
+        assert threads == {"new-thread"}
@@ -0,0 +1,311 @@
+"""
+TDD: Agent Graph Tests
+
+Drive the LangGraph agent end to end with a scripted fake chat model in
+place of Claude, so graph routing and tool execution are tested without
+network access.
+"""
+
+from datetime import date
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.journal.models import DailyCheckin, JournalEntry
+from apps.todos.models import Todo
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def config_for(user):
+    return {"configurable": {"user": user, "anthropic_api_key": "test-key"}}
+
+
+class TestSyncGraph:
+    """The sync graph runs tools between model calls."""
+
+    def test_tool_turn(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("get_todos", {}),
+            ]),
+            AIMessage(content="Your list is empty."),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="What's on my plate?")]},
+            config=config_for(user),
+        )
+
+        assert result["messages"][-1].content == "Your list is empty."
+
+
+class TestTerminalTools:
+    """Write-only tool turns end without a second model call."""
+
+    def test_write_turn_ends_with_confirmation(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        # Only one scripted response: a second model call would fail
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("create_todo", {"task": "Buy milk"}),
+            ]),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="I need to buy milk")]},
+            config=config_for(user),
+        )
+
+        assert result["messages"][-1].content == "Added “Buy milk” to your todos."
+        assert Todo.objects.filter(user=user, task="Buy milk").exists()
+
+    def test_multiple_writes_confirmed_together(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("log_meditation", {"duration_minutes": 10}, "c1"),
+                tool_call("create_todos", {"tasks": [{"task": "A"}, {"task": "B"}]}, "c2"),
+            ]),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="meditated and need to do A and B")]},
+            config=config_for(user),
+        )
+
+        reply = result["messages"][-1].content
+        assert reply.startswith("Logged your meditation — 10 minutes.")
+        assert "- A\n- B" in reply
+
+    def test_model_can_opt_in_to_follow_up(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("create_todo", {"task": "Rest", "follow_up": True}),
+            ]),
+            AIMessage(content="Rest is part of the practice."),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="remind me to rest")]},
+            config=config_for(user),
+        )
+
+        assert result["messages"][-1].content == "Rest is part of the practice."
+        assert Todo.objects.filter(user=user, task="Rest").exists()
+
+    def test_reads_and_journal_go_back_to_model(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("save_journal_entry", {"content": "Long day."}),
+            ]),
+            AIMessage(content="Thank you for sharing."),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="Journal: Long day.")]},
+            config=config_for(user),
+        )
+        assert result["messages"][-1].content == "Thank you for sharing."
+
+    def test_failed_write_goes_back_to_model(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("complete_todo", {"search": "nothing like this"}),
+            ]),
+            AIMessage(content="I couldn't find that todo."),
+        )
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="done with nothing like this")]},
+            config=config_for(user),
+        )
+        assert result["messages"][-1].content == "I couldn't find that todo."
+
+    def test_can_be_disabled_per_run(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("add_mantra", {"content": "Breathe"}),
+            ]),
+            AIMessage(content="Lovely."),
+        )
+        config = config_for(user)
+        config["configurable"]["terminal_tools"] = False
+        result = agent.invoke(
+            {"messages": [HumanMessage(content="new mantra: Breathe")]},
+            config=config,
+        )
+        assert result["messages"][-1].content == "Lovely."
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestAsyncGraph:
+    """The async graph awaits the model and runs tools on its pool."""
+
+    async def test_plain_reply(self, user, fake_chat_model):
+        from apps.agent.graph import async_agent
+
+        fake_chat_model(AIMessage(content="Hello there."))
+        result = await async_agent.ainvoke(
+            {"messages": [HumanMessage(content="Hi")]},
+            config=config_for(user),
+        )
+
+        assert result["messages"][-1].content == "Hello there."
+
+    async def test_tool_turn_uses_async_tools(self, user, fake_chat_model):
+        from apps.agent.graph import async_agent
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[
+                tool_call("log_meditation", {"duration_minutes": 20}),
+            ]),
+        )
+        result = await async_agent.ainvoke(
+            {"messages": [HumanMessage(content="Meditated 20 min")]},
+            config=config_for(user),
+        )
+
+        assert result["messages"][-1].content == "Logged your meditation — 20 minutes."
+        checkin = await DailyCheckin.objects.aget(user=user, date=date.today())
+        assert checkin.meditation_duration == 20
+
+    async def test_async_tool_map_covers_every_tool(self):
+        from apps.agent.graph import ASYNC_TOOL_FUNCTIONS, TOOL_FUNCTIONS, TOOLS
+
+        names = {t.name for t in TOOLS}
+        assert set(TOOL_FUNCTIONS) == names
+        assert set(ASYNC_TOOL_FUNCTIONS) == names
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentTools:
+    """Independent tool calls in one turn run concurrently."""
+
+    def state_with_calls(self, *calls):
+        return {"messages": [AIMessage(content="", tool_calls=list(calls))]}
+
+    async def aexecute_tools(self, state, config):
+        """Run the node inside a runnable, as the graph does."""
+        from langchain_core.runnables import RunnableLambda
+
+        from apps.agent.graph import aexecute_tools
+
+        return await RunnableLambda(aexecute_tools).ainvoke(state, config)
+
+    async def test_results_keep_call_order(self, user, monkeypatch):
+        import asyncio
+
+        from apps.agent.graph import ASYNC_TOOL_FUNCTIONS
+
+        async def slow_todo(user, task, due_date=None):
+            # Later calls finish first
+            await asyncio.sleep(0.03 if task == "first" else 0.0)
+            return {"task": task}
+
+        monkeypatch.setitem(ASYNC_TOOL_FUNCTIONS, "create_todo", slow_todo)
+        result = await self.aexecute_tools(
+            self.state_with_calls(
+                tool_call("create_todo", {"task": "first"}, "c1"),
+                tool_call("create_todo", {"task": "second"}, "c2"),
+            ),
+            config_for(user),
+        )
+
+        assert [m.tool_call_id for m in result["messages"]] == ["c1", "c2"]
+        assert "first" in result["messages"][0].content
+
+    async def test_real_tools_overlap(self, user, monkeypatch):
+        import threading
+
+        from apps.agent.graph import TOOL_FUNCTIONS
+
+        # Each call waits until all three are running: serialized calls
+        # would time out here instead of reaching the real tool
+        barrier = threading.Barrier(3, timeout=5)
+        threads = set()
+
+        def overlapping(real):
+            def call(**kwargs):
+                barrier.wait()
+                threads.add(threading.current_thread().name)
+                return real(**kwargs)
+            return call
+
+        for name in ("create_todo", "log_meditation", "get_mantras"):
+            monkeypatch.setitem(TOOL_FUNCTIONS, name, overlapping(TOOL_FUNCTIONS[name]))
+        result = await self.aexecute_tools(
+            self.state_with_calls(
+                tool_call("create_todo", {"task": "Water plants"}, "c1"),
+                tool_call("log_meditation", {"duration_minutes": 5}, "c2"),
+                tool_call("get_mantras", {}, "c3"),
+            ),
+            config_for(user),
+        )
+
+        assert len(threads) == 3
+        assert [m.status for m in result["messages"]] == ["success"] * 3
+        assert await Todo.objects.filter(user=user, task="Water plants").aexists()
+        assert await DailyCheckin.objects.filter(user=user, meditation_completed=True).aexists()
+
+    async def test_journal_appends_are_serialized(self, user, monkeypatch):
+        import threading
+        import time
+
+        from apps.agent.graph import TOOL_FUNCTIONS
+
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+        real = TOOL_FUNCTIONS["save_journal_entry"]
+
+        def tracked(**kwargs):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            try:
+                return real(**kwargs)
+            finally:
+                with lock:
+                    running -= 1
+
+        monkeypatch.setitem(TOOL_FUNCTIONS, "save_journal_entry", tracked)
+        await self.aexecute_tools(
+            self.state_with_calls(
+                tool_call("save_journal_entry", {"content": "First."}, "c1"),
+                tool_call("save_journal_entry", {"content": "Second."}, "c2"),
+            ),
+            config_for(user),
+        )
+
+        assert peak == 1
+        entry = await JournalEntry.objects.aget(user=user, date=date.today())
+        assert entry.content == "First.\n\nSecond."
+
+    async def test_mixed_turn_writes_everything(self, user):
+        await self.aexecute_tools(
+            self.state_with_calls(
+                tool_call("save_gratitude_list", {"items": ["sleep"]}, "c1"),
+                tool_call("log_meditation", {"duration_minutes": 5}, "c2"),
+                tool_call("create_todo", {"task": "A"}, "c3"),
+                tool_call("create_todo", {"task": "B"}, "c4"),
+            ),
+            config_for(user),
+        )
+
+        checkin = await DailyCheckin.objects.aget(user=user, date=date.today())
+        assert checkin.gratitude_completed is True
+        assert checkin.meditation_completed is True
+        assert await Todo.objects.filter(user=user).acount() == 2
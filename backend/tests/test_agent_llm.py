@@ -0,0 +1,138 @@
+"""
+TDD: Chat Model Registry Tests
+
+Bound chat models are built once per (model, API key, max_tokens) and
+reused across turns, with LRU eviction and idle expiry.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from apps.agent.llm import ModelRegistry
+
+
+@pytest.fixture
+def built():
+    """Record every ChatAnthropic construction."""
+    calls = []
+
+    class FakeAnthropic:
+        def __init__(self, **kwargs):
+            calls.append(kwargs)
+            self.kwargs = kwargs
+
+        def bind_tools(self, tools):
+            return ("bound", self.kwargs["model"], self.kwargs["anthropic_api_key"])
+
+    with patch("apps.agent.llm.ChatAnthropic", FakeAnthropic):
+        yield calls
+
+
+class TestModelRegistry:
+
+    def test_reuses_bound_model(self, built):
+        registry = ModelRegistry(max_size=4, idle_seconds=60)
+        first = registry.get("sonnet", "key-a", 1024, tools=[])
+        second = registry.get("sonnet", "key-a", 1024, tools=[])
+        assert first is second
+        assert len(built) == 1
+
+    def test_keyed_by_model_and_api_key(self, built):
+        registry = ModelRegistry(max_size=4, idle_seconds=60)
+        registry.get("sonnet", "key-a", 1024, tools=[])
+        registry.get("sonnet", "key-b", 1024, tools=[])
+        registry.get("haiku", "key-a", 1024, tools=[])
+        assert len(built) == 3
+        assert len(registry) == 3
+
+    def test_lru_eviction(self, built):
+        registry = ModelRegistry(max_size=2, idle_seconds=60)
+        registry.get("m", "a", 1024, tools=[])
+        registry.get("m", "b", 1024, tools=[])
+        registry.get("m", "a", 1024, tools=[])  # a is now most recent
+        registry.get("m", "c", 1024, tools=[])  # evicts b
+
+        assert len(registry) == 2
+        registry.get("m", "a", 1024, tools=[])
+        assert len(built) == 3
+        registry.get("m", "b", 1024, tools=[])
+        assert len(built) == 4
+
+    def test_idle_expiry(self, built):
+        registry = ModelRegistry(max_size=4, idle_seconds=60)
+        with patch("apps.agent.llm.time.monotonic", return_value=1000.0):
+            registry.get("m", "a", 1024, tools=[])
+        with patch("apps.agent.llm.time.monotonic", return_value=1030.0):
+            registry.get("m", "a", 1024, tools=[])
+        assert len(built) == 1
+        with patch("apps.agent.llm.time.monotonic", return_value=1100.0):
+            registry.get("m", "a", 1024, tools=[])
+        assert len(built) == 2
+
+
+class TestPromptCaching:
+    """The stable prefix (tools + system prompt) is marked cacheable."""
+
+    def test_last_tool_is_cache_breakpoint(self):
+        from apps.agent.graph import TOOLS
+        from apps.agent.llm import CACHE_CONTROL, cacheable_tools
+
+        schemas = cacheable_tools(TOOLS)
+        assert len(schemas) == len(TOOLS)
+        assert schemas[-1]["cache_control"] == CACHE_CONTROL
+        assert all("cache_control" not in s for s in schemas[:-1])
+        assert schemas[0]["name"] == "log_meditation"
+        assert "input_schema" in schemas[0]
+
+    def test_system_message_is_cacheable(self, settings):
+        from apps.agent.llm import CACHE_CONTROL, system_message
+
+        settings.AGENT_PROMPT_CACHING = True
+        message = system_message("Be kind.")
+        assert message.content == [
+            {"type": "text", "text": "Be kind.", "cache_control": CACHE_CONTROL},
+        ]
+
+    def test_caching_can_be_disabled(self, settings):
+        from apps.agent.llm import system_message
+
+        settings.AGENT_PROMPT_CACHING = False
+        assert system_message("Be kind.").content == "Be kind."
+
+    def test_registry_binds_cacheable_tools(self, settings):
+        from apps.agent.graph import TOOLS
+
+        settings.AGENT_PROMPT_CACHING = True
+        bound = []
+
+        class FakeAnthropic:
+            def __init__(self, **kwargs):
+                pass
+
+            def bind_tools(self, tools):
+                bound.append(tools)
+                return self
+
+        with patch("apps.agent.llm.ChatAnthropic", FakeAnthropic):
+            ModelRegistry(max_size=1, idle_seconds=60).get("m", "k", 1024, TOOLS)
+        assert bound[0][-1]["cache_control"] == {"type": "ephemeral"}
+
+    def test_usage_reports_cache_tokens(self):
+        from langchain_core.messages import AIMessage
+
+        from apps.agent.llm import usage_of
+
+        response = AIMessage(content="Hi", usage_metadata={
+            "input_tokens": 2100,
+            "output_tokens": 12,
+            "total_tokens": 2112,
+            "input_token_details": {"cache_read": 2000, "cache_creation": 0},
+        })
+        assert usage_of(response) == {
+            "input": 2100,
+            "output": 12,
+            "cache_read": 2000,
+            "cache_creation": 0,
+        }
+        assert usage_of(AIMessage(content="Hi"))["cache_read"] == 0
@@ -0,0 +1,116 @@
+"""
+TDD: Agent Worker Pool Tests
+
+Agent runs execute on a dedicated bounded pool rather than the single
+thread behind database_sync_to_async. These tests pin down concurrency,
+admission control, and the saturation response.
+"""
+
+import asyncio
+import threading
+import uuid
+from unittest.mock import patch
+
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+
+from apps.chat.consumers import SATURATED_MESSAGE, ChatConsumer
+from apps.chat.executor import AgentPool, AgentPoolSaturated
+
+User = get_user_model()
+
+
+@pytest.mark.asyncio
+class TestAgentPool:
+    """Bounded execution with queue-depth metrics."""
+
+    async def test_runs_function_and_returns_result(self):
+        pool = AgentPool(max_workers=2, max_queue=0)
+        result = await pool.run(lambda x: x * 2, 21)
+        assert result == 42
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    async def test_runs_concurrently_up_to_max_workers(self):
+        pool = AgentPool(max_workers=3, max_queue=0)
+        barrier = threading.Barrier(3, timeout=5)
+
+        # Deadlocks (and times out) unless all three run at the same time
+        results = await asyncio.gather(
+            *(pool.run(barrier.wait) for _ in range(3))
+        )
+        assert sorted(results) == [0, 1, 2]
+        pool.shutdown()
+
+    async def test_rejects_when_queue_full(self):
+        pool = AgentPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        first = asyncio.ensure_future(pool.run(release.wait, 5))
+        second = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+
+        stats = pool.stats()
+        assert stats["running"] == 1
+        assert stats["queued"] == 1
+
+        with pytest.raises(AgentPoolSaturated):
+            await pool.run(lambda: None)
+        assert pool.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(first, second)
+        assert pool.stats()["queued"] == 0
+        pool.shutdown()
+
+    async def test_slot_admission_for_async_runs(self):
+        pool = AgentPool(max_workers=1, max_queue=0)
+
+        async with pool.slot():
+            assert pool.stats()["running"] == 1
+            with pytest.raises(AgentPoolSaturated):
+                async with pool.slot():
+                    pass
+
+        assert pool.stats()["running"] == 0
+        assert pool.stats()["completed"] == 1
+
+    async def test_slot_released_after_error(self):
+        pool = AgentPool(max_workers=1, max_queue=0)
+
+        def boom():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await pool.run(boom)
+        assert await pool.run(lambda: "ok") == "ok"
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestSaturationResponse:
+    """A full pool produces an immediate, friendly reply."""
+
+    async def test_saturated_pool_sends_busy_message(self):
+        user = await database_sync_to_async(User.objects.create_user)(
+            email=f"busy-{uuid.uuid4().hex[:8]}@example.com",
+            password="testpass123",
+        )
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/")
+        communicator.scope["user"] = user
+        await communicator.connect()
+
+        with patch.object(
+            AgentPool, "_admit", side_effect=AgentPoolSaturated()
+        ):
+            await communicator.send_json_to({"type": "message", "content": "Hi"})
+            response = await communicator.receive_json_from(timeout=5)
+
+        assert response["type"] == "complete"
+        assert response["error"] == "saturated"
+        assert response["content"] == SATURATED_MESSAGE
+
+        await communicator.disconnect()
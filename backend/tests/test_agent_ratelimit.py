@@ -0,0 +1,228 @@
+"""
+TDD: Rate Limiter Tests
+
+Every model call takes a request and its estimated tokens from per-API-key
+token buckets shared by all workers. Background jobs leave a reserve for
+interactive chat, real usage is settled after the call, and the time
+spent waiting is recorded on the run.
+"""
+
+import time
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+KEY = "test-key"
+
+
+@pytest.fixture
+def limits(settings):
+    """Turn the limiter on with a fresh in-memory bucket store."""
+    settings.AGENT_RATE_LIMIT_URL = f"memory://{uuid.uuid4().hex}"
+    settings.AGENT_RATE_LIMIT_BACKGROUND_RESERVE = 0.5
+
+    def set_limits(rpm=0, tpm=0):
+        settings.AGENT_RATE_LIMIT_RPM = rpm
+        settings.AGENT_RATE_LIMIT_TPM = tpm
+
+    return set_limits
+
+
+def drain(count, tokens=1):
+    from apps.agent.ratelimit import acquire
+
+    for _ in range(count):
+        acquire(KEY, tokens, max_wait=0)
+
+
+class TestBuckets:
+
+    def test_disabled_when_limits_are_zero(self, limits):
+        from apps.agent.ratelimit import acquire
+
+        limits()
+        for _ in range(100):
+            assert acquire(KEY, 10_000, max_wait=0) == 0
+
+    def test_waits_for_a_request_to_refill(self, limits):
+        from apps.agent.ratelimit import acquire
+
+        limits(rpm=600)  # refills one request per 0.1s
+        drain(600)
+
+        waited = acquire(KEY, 1)
+
+        assert 0.05 < waited < 0.5
+
+    def test_raises_instead_of_waiting_past_max_wait(self, limits):
+        from apps.agent.ratelimit import RateLimited, acquire
+
+        limits(rpm=2)
+        drain(2)
+
+        started = time.monotonic()
+        with pytest.raises(RateLimited):
+            acquire(KEY, 1, max_wait=1)
+        assert time.monotonic() - started < 0.5
+
+    def test_keys_have_separate_buckets(self, limits):
+        from apps.agent.ratelimit import acquire
+
+        limits(rpm=2)
+        drain(2)
+
+        assert acquire("other-key", 1, max_wait=0) == 0
+
+    def test_background_leaves_a_reserve_for_chat(self, limits):
+        from apps.agent.ratelimit import BACKGROUND, RateLimited, acquire
+
+        limits(rpm=4)
+        acquire(KEY, 1, BACKGROUND, max_wait=0)
+        acquire(KEY, 1, BACKGROUND, max_wait=0)
+        with pytest.raises(RateLimited):
+            acquire(KEY, 1, BACKGROUND, max_wait=0)
+
+        # Interactive calls still get the reserved half
+        drain(2)
+
+    def test_token_bucket_limits_large_calls(self, limits):
+        from apps.agent.ratelimit import RateLimited, acquire
+
+        limits(tpm=6000)
+        acquire(KEY, 5000, max_wait=0)
+
+        with pytest.raises(RateLimited):
+            acquire(KEY, 2000, max_wait=0)
+        assert acquire(KEY, 500, max_wait=0) == 0
+
+    def test_settle_charges_usage_beyond_the_estimate(self, limits):
+        from apps.agent.ratelimit import RateLimited, acquire, settle
+
+        limits(tpm=6000)
+        acquire(KEY, 100, max_wait=0)
+        settle(KEY, 100, AIMessage(content="", usage_metadata={
+            "input_tokens": 4000, "output_tokens": 1100, "total_tokens": 5100,
+        }))
+
+        with pytest.raises(RateLimited):
+            acquire(KEY, 1000, max_wait=0)
+
+    def test_release_gives_tokens_back(self, limits):
+        from apps.agent.ratelimit import acquire, release
+
+        limits(tpm=1000)
+        acquire(KEY, 800, max_wait=0)
+        release(KEY, 800)
+
+        assert acquire(KEY, 800, max_wait=0) == 0
+
+    def test_estimate_counts_prompt_and_output(self):
+        from apps.agent.ratelimit import estimate
+
+        messages = [HumanMessage(content="x" * 400)]
+
+        assert estimate(messages) == 101
+        assert estimate(messages, max_tokens=50) == 151
+
+    def test_redis_down_fails_open(self, limits, settings):
+        from apps.agent.ratelimit import acquire
+
+        limits(rpm=1)
+        settings.AGENT_RATE_LIMIT_URL = "redis://127.0.0.1:1/0"
+
+        for _ in range(3):
+            assert acquire(KEY, 1, max_wait=0) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_acquire_waits(limits):
+    from apps.agent.ratelimit import aacquire
+
+    limits(rpm=600)
+    drain(600)
+
+    assert 0.05 < await aacquire(KEY, 1) < 0.5
+
+
+def test_redis_buckets_share_state(limits, settings):
+    """Runs against a real Redis when one is reachable (e.g. in docker compose)."""
+    import redis
+
+    from apps.agent.ratelimit import RateLimited, acquire
+
+    url = settings.CACHE_URL
+    try:
+        redis.Redis.from_url(url, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        pytest.skip("Redis is not reachable")
+
+    limits(rpm=3)
+    settings.AGENT_RATE_LIMIT_URL = url
+    key = f"test-{uuid.uuid4().hex}"
+    for _ in range(3):
+        assert acquire(key, 1, max_wait=0) == 0
+    with pytest.raises(RateLimited):
+        acquire(key, 1, max_wait=0)
+
+
+@pytest.mark.django_db
+class TestModelCalls:
+
+    def run_turn(self, user, **extra):
+        from apps.agent.graph import agent
+        from apps.agent.telemetry import RunTelemetry
+
+        telemetry = RunTelemetry()
+        config = {"configurable": {
+            "user": user, "anthropic_api_key": KEY, "telemetry": telemetry, **extra,
+        }}
+        result = agent.invoke({"messages": [HumanMessage(content="hi")]}, config)
+        return result["messages"][-1].content, telemetry
+
+    def test_wait_is_recorded_on_the_run(self, user, fake_chat_model, limits):
+        fake_chat_model(AIMessage(content="Here."))
+        limits(rpm=60)  # refills one request per second
+        drain(60)
+
+        reply, telemetry = self.run_turn(user)
+
+        assert reply == "Here."
+        assert telemetry.rate_limit_ms > 50
+
+    def test_limited_past_the_deadline_replies_unavailable(self, user, fake_chat_model, limits):
+        from apps.agent.resilience import UNAVAILABLE_MESSAGE
+
+        fake_chat_model(AIMessage(content="Never sent."))
+        limits(rpm=1)
+        drain(1)
+
+        started = time.monotonic()
+        reply, _ = self.run_turn(user, deadline=time.monotonic() + 5)
+
+        assert reply == UNAVAILABLE_MESSAGE
+        assert time.monotonic() - started < 1
+
+    def test_injected_chat_models_are_not_limited(self, user, limits):
+        from apps.agent.fakes import ScriptedChatModel
+
+        limits(rpm=1)
+        drain(1)
+
+        reply, telemetry = self.run_turn(
+            user, chat_model=ScriptedChatModel(messages=iter([AIMessage(content="Free.")]))
+        )
+
+        assert reply == "Free."
+        assert telemetry.rate_limit_ms == 0
+
+    def test_summaries_yield_to_chat(self, limits, monkeypatch):
+        from apps.agent.ratelimit import RateLimited
+        from apps.chat import tasks
+
+        monkeypatch.setattr(tasks, "MAX_RATE_LIMIT_WAIT_SECONDS", 0)
+        limits(rpm=4)
+        drain(2)  # half the bucket is left, all of it reserved for chat
+
+        with pytest.raises(RateLimited):
+            tasks.summarize("", [], KEY)
@@ -0,0 +1,193 @@
+"""
+TDD: Agent Recording Tests
+
+A sampled share of agent runs is recorded (inputs, model responses,
+tool results, timings) to local JSON files. Replaying a recording runs
+the current graph against the recorded model outputs, with no network,
+on a user seeded with the recorded user's data, and diffs tool calls,
+DB queries, time and tool results against the recording.
+"""
+
+import json
+from datetime import date, timedelta
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.chat.models import ChatMessage
+from apps.mantras.models import Mantra
+from apps.todos.models import Todo
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+TURN = [
+    AIMessage(
+        content="",
+        tool_calls=[tool_call("get_todos", {}), tool_call("get_mantras", {}, "call_2")],
+    ),
+    AIMessage(content="All clear."),
+]
+
+
+@pytest.fixture
+def recording(user):
+    """A recording of TURN made by the sync graph."""
+    from apps.agent.fakes import ScriptedChatModel
+    from apps.agent.graph import agent
+    from apps.agent.recording import RunRecorder, capture_user_data
+
+    Todo.objects.create(user=user, task="Call the doctor", due_date=date.today() + timedelta(days=1))
+    Mantra.objects.create(user=user, content="Breathe")
+    inputs = [HumanMessage(content="anything on?")]
+    recorder = RunRecorder(inputs, "Likes mornings.", "Nothing logged yet.", capture_user_data(user))
+    config = {"configurable": {
+        "user": user,
+        "chat_model": ScriptedChatModel(messages=iter(TURN)),
+        "recorder": recorder,
+    }}
+    agent.invoke({"messages": inputs}, config)
+    return json.loads(json.dumps(recorder.as_dict()))
+
+
+@pytest.mark.django_db
+class TestRecording:
+
+    def test_graph_records_model_and_tool_calls(self, recording):
+        assert recording["conversation_summary"] == "Likes mornings."
+        assert recording["inputs"][0]["data"]["content"] == "anything on?"
+        assert [c["message"]["data"]["content"] for c in recording["model_calls"]] == ["", "All clear."]
+        assert recording["model_calls"][0]["message"]["data"]["tool_calls"][0]["name"] == "get_todos"
+        assert [c["name"] for c in recording["tool_calls"]] == ["get_todos", "get_mantras"]
+        assert all(isinstance(c["result"], str) for c in recording["tool_calls"])
+        assert recording["total_ms"] >= sum(c["ms"] for c in recording["tool_calls"])
+
+    def test_records_what_the_turn_started_from(self, recording):
+        assert recording["user_context"] == "Nothing logged yet."
+        data = recording["user_data"]
+        assert data["today"] == str(date.today())
+        assert data["todos"] == [{"task": "Call the doctor", "due_date": 1, "completed": False}]
+        assert data["mantras"] == [{"content": "Breathe", "order": 0}]
+
+    def test_save_and_load(self, user, tmp_path):
+        from apps.agent.recording import RunRecorder, load_recording, recording_paths, save_recording
+
+        path = save_recording(RunRecorder([HumanMessage(content="hi")]), tmp_path)
+
+        assert recording_paths(tmp_path) == [path]
+        assert load_recording(path)["inputs"][0]["data"]["content"] == "hi"
+
+    def test_consumer_records_sampled_runs(self, user, fake_chat_model, settings, tmp_path):
+        from apps.chat.consumers import ChatConsumer
+
+        fake_chat_model(*TURN)
+        settings.AGENT_ASYNC = False
+        settings.AGENT_RECORD_RATE = 1.0
+        settings.AGENT_RECORDINGS_DIR = str(tmp_path)
+        message = ChatMessage.objects.create(user=user, role="user", content="anything on?")
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = message.id
+        consumer._run_agent("anything on?")
+
+        (path,) = tmp_path.glob("*.json")
+        saved = json.loads(path.read_text())
+        assert len(saved["tool_calls"]) == 2
+        assert saved["user_data"]["today"] == str(date.today())
+
+    def test_consumer_records_nothing_by_default(self, user, fake_chat_model, settings, tmp_path):
+        from apps.chat.consumers import ChatConsumer
+
+        fake_chat_model(*TURN)
+        settings.AGENT_ASYNC = False
+        settings.AGENT_RECORDINGS_DIR = str(tmp_path)
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = None
+        consumer._run_agent("anything on?")
+
+        assert not list(tmp_path.glob("*.json"))
+
+
+@pytest.mark.django_db
+class TestReplay:
+
+    def test_replay_matches_recording(self, recording):
+        from apps.agent.recording import diff, recorded_stats, replay
+
+        result = replay(recording)
+
+        assert result.error == ""
+        assert result.tool_calls == {"get_todos": 1, "get_mantras": 1}
+        assert result.model_calls == 2
+        assert result.queries > 0
+        # Seeded with the recorded todos and mantras, the tools answer the same
+        assert "Call the doctor" in recording["tool_calls"][0]["result"]
+        assert result.mismatched == []
+        delta = diff(recorded_stats(recording), result.stats())
+        assert delta["tool_calls"] == {}
+        assert delta["model_calls"] == 0
+        assert delta["queries"] is None  # no baseline yet
+
+    def test_replay_reports_divergence(self, recording):
+        from apps.agent.recording import replay
+
+        recording["model_calls"] = recording["model_calls"][:1]
+
+        result = replay(recording)
+
+        assert "more responses" in result.error
+        assert result.tool_calls == {"get_todos": 1, "get_mantras": 1}
+
+    def test_replay_moves_recorded_dates_to_today(self, recording):
+        from apps.agent.recording import replay
+
+        yesterday = date.today() - timedelta(days=1)
+        recording["user_data"]["today"] = str(yesterday)
+        recording["tool_calls"][0]["result"] = recording["tool_calls"][0]["result"].replace(
+            str(date.today() + timedelta(days=1)), str(date.today())
+        )
+
+        assert replay(recording).mismatched == []
+
+    def test_replay_reports_changed_results(self, recording):
+        from apps.agent.recording import replay
+
+        recording["user_data"]["todos"] = []
+
+        assert replay(recording).mismatched == ["get_todos"]
+
+    def test_replay_rejects_unknown_tools(self, recording):
+        from apps.agent.recording import replay
+
+        recording["tool_calls"][0]["name"] = "retired_tool"
+
+        assert replay(recording).error == "unknown tools: retired_tool"
+
+    def test_command_saves_baseline_and_diffs_against_it(self, recording, tmp_path):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        path = tmp_path / "run.json"
+        path.write_text(json.dumps(recording))
+
+        call_command("replay_agent_runs", str(path), "--save-baseline", stdout=StringIO())
+        baseline = json.loads(path.read_text())["baseline"]
+        assert baseline["queries"] > 0
+
+        out = StringIO()
+        call_command("replay_agent_runs", "--dir", str(tmp_path), "--json", stdout=out)
+        (row,) = json.loads(out.getvalue())
+        assert row["diff"]["queries"] == 0
+        assert row["diff"]["tool_calls"] == {}
+        assert row["mismatched_results"] == []
+
+    def test_command_without_recordings(self, tmp_path):
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            call_command("replay_agent_runs", "--dir", str(tmp_path))
@@ -0,0 +1,324 @@
+"""
+TDD: Model Resilience Tests
+
+Model calls retry overloads with jittered backoff, hedge slow requests,
+fall back to a secondary model and trip a shared circuit breaker that
+fails fast with a friendly reply. The real ChatAnthropic client is
+pointed at a local fake Messages API endpoint.
+"""
+
+import time
+
+import anthropic
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+
+from apps.agent.fakes import FakeReply
+
+PRIMARY = "claude-primary"
+FALLBACK = "claude-fallback"
+
+
+@pytest.fixture
+def anthropic_server(monkeypatch, settings):
+    from apps.agent.fakes import FakeAnthropicServer
+    from apps.agent.llm import registry
+
+    settings.AGENT_RETRY_BASE_SECONDS = 0
+    settings.AGENT_HEDGE_SECONDS = 0
+    settings.AGENT_FALLBACK_MODEL = FALLBACK
+    with FakeAnthropicServer() as server:
+        monkeypatch.setenv("ANTHROPIC_BASE_URL", server.url)
+        monkeypatch.delenv("ANTHROPIC_API_URL", raising=False)
+        registry.clear()
+        yield server
+    registry.clear()
+
+
+def config_for(user, **extra):
+    return {"configurable": {
+        "user": user, "anthropic_api_key": "test-key", "model": PRIMARY, **extra,
+    }}
+
+
+def ask(user, **extra) -> str:
+    from apps.agent.graph import agent
+
+    result = agent.invoke({"messages": [HumanMessage(content="hi")]}, config_for(user, **extra))
+    return result["messages"][-1].content
+
+
+def status_error(status, body=None):
+    response = httpx.Response(status, request=httpx.Request("POST", "https://api.anthropic.com"))
+    return anthropic.APIStatusError("error", response=response, body=body)
+
+
+class TestRetryPolicy:
+
+    def test_retryable_errors(self):
+        from apps.agent.resilience import is_retryable
+
+        assert is_retryable(status_error(529))
+        assert is_retryable(status_error(503))
+        assert is_retryable(status_error(429))
+        assert is_retryable(anthropic.APIConnectionError(request=httpx.Request("POST", "https://x")))
+        assert not is_retryable(status_error(400))
+        assert not is_retryable(ValueError("bug"))
+        # Error events partway through a stream arrive on a 200
+        assert is_retryable(status_error(200, {"error": {"type": "overloaded_error"}}))
+        assert not is_retryable(status_error(200, {"error": {"type": "invalid_request_error"}}))
+
+    def test_backoff_is_jittered_and_capped(self, settings):
+        from apps.agent.resilience import MAX_BACKOFF_SECONDS, backoff_seconds
+
+        settings.AGENT_RETRY_BASE_SECONDS = 0.5
+        delays = [backoff_seconds(2) for _ in range(50)]
+
+        assert all(0 <= d <= 2.0 for d in delays)
+        assert len(set(delays)) > 1
+        assert backoff_seconds(20) <= MAX_BACKOFF_SECONDS
+
+
+class TestCircuitBreaker:
+
+    @pytest.fixture(autouse=True)
+    def breaker_settings(self, settings):
+        settings.AGENT_BREAKER_FAILURES = 3
+        settings.AGENT_BREAKER_WINDOW_SECONDS = 60
+        settings.AGENT_BREAKER_COOLDOWN_SECONDS = 0.2
+
+    def test_opens_after_repeated_failures(self):
+        from apps.agent.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker("key", PRIMARY)
+        assert not breaker.record_failure()
+        assert not breaker.record_failure()
+        assert breaker.record_failure()
+
+        assert not breaker.allow()
+        # Another worker sees the same state
+        assert not CircuitBreaker("key", PRIMARY).allow()
+        # Other keys and models are unaffected
+        assert CircuitBreaker("other-key", PRIMARY).allow()
+        assert CircuitBreaker("key", FALLBACK).allow()
+
+    def test_success_resets_failures(self):
+        from apps.agent.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker("key", PRIMARY)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+
+        assert not breaker.record_failure()
+
+    def test_half_open_allows_one_trial(self):
+        from apps.agent.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker("key", PRIMARY)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.25)
+
+        assert breaker.allow()
+        assert not breaker.allow()  # trial in flight
+
+        breaker.record_success()
+        assert breaker.allow()
+        assert breaker.allow()
+
+    def test_failed_trial_reopens(self):
+        from apps.agent.resilience import CircuitBreaker
+
+        breaker = CircuitBreaker("key", PRIMARY)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.25)
+        assert breaker.allow()
+
+        assert breaker.record_failure()
+        assert not breaker.allow()
+
+
+@pytest.mark.django_db
+class TestResilientCalls:
+
+    def test_retries_overloaded_errors(self, user, anthropic_server):
+        anthropic_server.script(FakeReply(status=529), FakeReply("Breathe."))
+
+        assert ask(user) == "Breathe."
+        assert anthropic_server.models == [PRIMARY, PRIMARY]
+
+    def test_falls_back_to_secondary_model(self, user, anthropic_server, settings):
+        settings.AGENT_MODEL_RETRIES = 1
+        anthropic_server.script(FakeReply(status=529), FakeReply(status=500), FakeReply("From the fallback."))
+
+        assert ask(user) == "From the fallback."
+        assert anthropic_server.models == [PRIMARY, PRIMARY, FALLBACK]
+
+    def test_unavailable_reply_then_fail_fast(self, user, anthropic_server, settings):
+        from apps.agent.resilience import UNAVAILABLE_MESSAGE
+
+        settings.AGENT_MODEL_RETRIES = 1
+        settings.AGENT_BREAKER_FAILURES = 2
+        anthropic_server.script(*[FakeReply(status=529)] * 4)
+
+        assert ask(user) == UNAVAILABLE_MESSAGE
+        assert len(anthropic_server.models) == 4
+
+        # Both breakers are open: the next turn doesn't call out at all
+        started = time.monotonic()
+        assert ask(user) == UNAVAILABLE_MESSAGE
+        assert len(anthropic_server.models) == 4
+        assert time.monotonic() - started < 1
+
+    def test_client_errors_are_not_retried(self, user, anthropic_server):
+        anthropic_server.script(FakeReply("bad request", status=400))
+
+        with pytest.raises(anthropic.BadRequestError):
+            ask(user)
+        assert anthropic_server.models == [PRIMARY]
+
+    def test_hedges_slow_requests(self, user, anthropic_server, settings):
+        settings.AGENT_HEDGE_SECONDS = 0.2
+        anthropic_server.script(FakeReply("Slow.", delay=3), FakeReply("Fast."))
+
+        started = time.monotonic()
+        assert ask(user) == "Fast."
+        assert time.monotonic() - started < 2
+        assert anthropic_server.models == [PRIMARY, PRIMARY]
+
+    def test_hedge_loser_is_settled_when_it_answers(self, user, anthropic_server, settings, monkeypatch):
+        from apps.agent import ratelimit
+
+        settled = []
+        monkeypatch.setattr(ratelimit, "settle", lambda key, estimated, response: settled.append(response.content))
+        settings.AGENT_HEDGE_SECONDS = 0.2
+        anthropic_server.script(FakeReply("Slow.", delay=1), FakeReply("Fast."))
+
+        assert ask(user) == "Fast."
+        # The dropped first call still runs to the end and spends tokens
+        deadline = time.monotonic() + 5
+        while len(settled) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert sorted(settled) == ["Fast.", "Slow."]
+
+    def test_fast_requests_are_not_hedged(self, user, anthropic_server, settings):
+        settings.AGENT_HEDGE_SECONDS = 2
+        anthropic_server.script(FakeReply("Quick."))
+
+        assert ask(user) == "Quick."
+        assert anthropic_server.models == [PRIMARY]
+
+    def test_deadline_timeout_is_not_retried(self, user, anthropic_server):
+        from apps.agent.budget import OUT_OF_TIME_MESSAGE
+
+        anthropic_server.script(FakeReply("Too late.", delay=3))
+
+        assert ask(user, deadline=time.monotonic() + 0.3) == OUT_OF_TIME_MESSAGE
+        assert anthropic_server.models == [PRIMARY]
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestAsyncResilientCalls:
+
+    async def test_retries_and_falls_back(self, user, anthropic_server, settings):
+        from apps.agent.graph import async_agent
+
+        settings.AGENT_MODEL_RETRIES = 1
+        anthropic_server.script(FakeReply(status=529), FakeReply(status=529), FakeReply("Fallback here."))
+
+        result = await async_agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config_for(user))
+
+        assert result["messages"][-1].content == "Fallback here."
+        assert anthropic_server.models == [PRIMARY, PRIMARY, FALLBACK]
+
+    async def test_hedged_stream_sends_the_winner_once(self, user, anthropic_server, settings):
+        from apps.agent.graph import async_agent
+        from apps.agent.streaming import StreamedReply, stream_frames
+
+        settings.AGENT_HEDGE_SECONDS = 0.2
+        anthropic_server.script(FakeReply("Slow words.", delay=3), FakeReply("Fast words here."))
+
+        reply = StreamedReply()
+        started = time.monotonic()
+        frames = [
+            frame async for frame in stream_frames(
+                async_agent, {"messages": [HumanMessage(content="hi")]}, config_for(user), reply
+            )
+        ]
+
+        assert time.monotonic() - started < 2
+        assert reply.text == "Fast words here."
+        assert "".join(f["content"] for f in frames if f["type"] == "delta") == "Fast words here."
+
+    async def test_cancelled_hedge_loser_gives_its_tokens_back(self, user, anthropic_server, settings, monkeypatch):
+        from apps.agent import ratelimit
+        from apps.agent.graph import async_agent
+
+        settled, released = [], []
+        monkeypatch.setattr(ratelimit, "settle", lambda key, estimated, response: settled.append(estimated))
+        monkeypatch.setattr(ratelimit, "release", lambda key, tokens: released.append(tokens))
+        settings.AGENT_HEDGE_SECONDS = 0.2
+        anthropic_server.script(FakeReply("Slow words.", delay=3), FakeReply("Fast words."))
+
+        result = await async_agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config_for(user))
+
+        assert result["messages"][-1].content == "Fast words."
+        assert len(settled) == 1
+        assert released == settled
+
+    async def test_streaming_request_is_not_hedged(self, user, anthropic_server, settings):
+        from apps.agent.graph import async_agent
+        from apps.agent.streaming import StreamedReply, stream_frames
+
+        settings.AGENT_HEDGE_SECONDS = 5
+        anthropic_server.script(FakeReply("Steady words."))
+
+        reply = StreamedReply()
+        async for _ in stream_frames(
+            async_agent, {"messages": [HumanMessage(content="hi")]}, config_for(user), reply
+        ):
+            pass
+
+        assert reply.text == "Steady words."
+        assert anthropic_server.models == [PRIMARY]
+
+    async def test_failed_partial_stream_is_not_repeated(self, user, anthropic_server, settings):
+        from apps.agent.graph import async_agent
+        from apps.agent.streaming import StreamedReply, stream_frames
+
+        anthropic_server.script(
+            FakeReply("Here is half of my answer.", fail_after=3),
+            FakeReply("Here is all of my answer."),
+        )
+
+        reply = StreamedReply()
+        frames = [
+            frame async for frame in stream_frames(
+                async_agent, {"messages": [HumanMessage(content="hi")]}, config_for(user), reply
+            )
+        ]
+
+        assert anthropic_server.models == [PRIMARY, PRIMARY]
+        types = [f["type"] for f in frames]
+        reset = types.index("reset")
+        assert "".join(f["content"] for f in frames[:reset]) == "Here is half "
+        # The retry doesn't stream: its whole text arrives once, after the reset
+        assert frames[reset + 1:] == [{"type": "delta", "content": "Here is all of my answer."}]
+        assert reply.text == "Here is all of my answer."
+
+    async def test_breaker_open_fails_fast(self, user, anthropic_server, settings):
+        from apps.agent.graph import async_agent
+        from apps.agent.resilience import UNAVAILABLE_MESSAGE, CircuitBreaker
+
+        settings.AGENT_BREAKER_FAILURES = 1
+        CircuitBreaker("test-key", PRIMARY).record_failure()
+        CircuitBreaker("test-key", FALLBACK).record_failure()
+
+        result = await async_agent.ainvoke({"messages": [HumanMessage(content="hi")]}, config_for(user))
+
+        assert result["messages"][-1].content == UNAVAILABLE_MESSAGE
+        assert anthropic_server.models == []
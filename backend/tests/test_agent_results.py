@@ -0,0 +1,81 @@
+"""
+TDD: Tool Result Serialization Tests
+
+Tool results reach the model as compact JSON within a per-tool token
+budget, with long fields elided and a "more" marker when items are cut.
+"""
+
+import json
+
+from apps.agent.llm import estimate_tokens
+
+
+def _entries(count, length):
+    return {
+        "entries": [
+            {"date": f"2026-01-{i + 1:02d}", "content": "x" * length, "reflection": ""}
+            for i in range(count)
+        ]
+    }
+
+
+class TestSerializeResult:
+
+    def test_compact_json(self):
+        from apps.agent.results import serialize_result
+
+        text, tokens = serialize_result("log_meditation", {"logged": True, "duration": 20})
+
+        assert text == '{"logged":true,"duration":20}'
+        assert tokens == estimate_tokens(text)
+
+    def test_long_fields_elided(self, settings):
+        from apps.agent.results import serialize_result
+
+        settings.AGENT_TOOL_FIELD_CHARS = 10
+        text, _ = serialize_result("get_recent_entries", _entries(1, 50))
+        content = json.loads(text)["entries"][0]["content"]
+
+        assert content == "x" * 10 + "… [+40 chars]"
+
+    def test_over_budget_drops_items_with_marker(self, settings):
+        from apps.agent.results import TOOL_TOKEN_BUDGETS, serialize_result
+
+        settings.AGENT_TOOL_FIELD_CHARS = 600
+        text, tokens = serialize_result("get_recent_entries", _entries(30, 600), {"offset": 5})
+        result = json.loads(text)
+
+        assert tokens <= TOOL_TOKEN_BUDGETS["get_recent_entries"]
+        kept = len(result["entries"])
+        assert 0 < kept < 30
+        assert result["more"] == {"omitted": 30 - kept, "next_offset": 5 + kept}
+
+    def test_unpaged_tool_marker_has_no_offset(self, settings):
+        from apps.agent.results import serialize_result
+
+        settings.AGENT_TOOL_RESULT_TOKENS = 50
+        todos = {"todos": [{"id": i, "task": f"Task number {i}"} for i in range(40)]}
+        result = json.loads(serialize_result("get_todos", todos)[0])
+
+        assert result["more"] == {"omitted": 40 - len(result["todos"])}
+
+    def test_within_budget_untouched(self):
+        from apps.agent.results import serialize_result
+
+        result = json.loads(serialize_result("get_recent_entries", _entries(2, 100))[0])
+
+        assert len(result["entries"]) == 2
+        assert "more" not in result
+
+
+class TestToolMessages:
+
+    def test_tool_message_records_size(self):
+        from apps.agent.graph import _tool_message
+
+        call = {"name": "get_todos", "args": {}, "id": "call_1"}
+        message = _tool_message(call, {"todos": []})
+
+        assert message.content == '{"todos":[]}'
+        assert message.artifact == {"todos": []}
+        assert message.response_metadata["result_tokens"] == estimate_tokens('{"todos":[]}')
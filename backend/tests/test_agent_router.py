@@ -0,0 +1,102 @@
+"""
+TDD: Fast-Path Intent Router Tests
+
+Simple commands are matched locally and answered without calling the LLM.
+Anything the router isn't sure about falls through to the agent.
+"""
+
+from datetime import date
+
+import pytest
+from channels.testing import WebsocketCommunicator
+
+from apps.agent.router import Intent, aroute, match_intent
+from apps.journal.models import DailyCheckin
+from apps.todos.models import Todo
+
+
+class TestMatchIntent:
+
+    @pytest.mark.parametrize("text,expected", [
+        ("meditated 20 min", Intent("log_meditation", {"duration_minutes": 20})),
+        ("I meditated for 15 minutes.", Intent("log_meditation", {"duration_minutes": 15})),
+        ("did my meditation", Intent("log_meditation", {"duration_minutes": None})),
+        ("Just meditated!", Intent("log_meditation", {"duration_minutes": None})),
+        ("10 minutes of meditation", Intent("log_meditation", {"duration_minutes": 10})),
+        ("show my todos", Intent("get_todos", {})),
+        ("What are my tasks?", Intent("get_todos", {})),
+        ("list my mantras", Intent("get_mantras", {})),
+        ("todo: call the dentist", Intent("create_todo", {"task": "call the dentist"})),
+        ("done with groceries", Intent("complete_todo", {"search": "groceries"})),
+        ("Finished the report.", Intent("complete_todo", {"search": "report"})),
+    ])
+    def test_simple_commands_match(self, text, expected):
+        assert match_intent(text) == expected
+
+    @pytest.mark.parametrize("text", [
+        "Hello",
+        "I meditated 20 minutes and felt really calm afterwards",
+        "done with groceries and the laundry",
+        "todo: call mom, text dad",
+        "I'm grateful for coffee",
+        "Today was hard. I kept thinking about work.",
+        "show my todos from last week and tell me what I'm avoiding",
+    ])
+    def test_everything_else_falls_through(self, text):
+        assert match_intent(text) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestRoute:
+
+    async def test_logs_meditation(self, user):
+        reply = await aroute(user, "meditated 20 min")
+        assert reply == "Logged your meditation — 20 minutes."
+        checkin = await DailyCheckin.objects.aget(user=user, date=date.today())
+        assert checkin.meditation_duration == 20
+
+    async def test_completes_todo(self, user):
+        await Todo.objects.acreate(user=user, task="Pick up groceries")
+        reply = await aroute(user, "done with groceries")
+        assert reply == "Marked “Pick up groceries” complete."
+        assert await Todo.objects.filter(completed=True).acount() == 1
+
+    async def test_lists_todos(self, user):
+        await Todo.objects.acreate(user=user, task="Call the doctor")
+        reply = await aroute(user, "show my todos")
+        assert "- Call the doctor" in reply
+
+    async def test_unmatched_todo_falls_through(self, user):
+        assert await aroute(user, "done with groceries") is None
+
+    async def test_ambiguous_todo_falls_through(self, user):
+        await Todo.objects.acreate(user=user, task="Call mom")
+        await Todo.objects.acreate(user=user, task="Call the doctor")
+        assert await aroute(user, "finished call") is None
+        assert await Todo.objects.filter(completed=True).acount() == 0
+
+    async def test_conversation_falls_through(self, user):
+        assert await aroute(user, "How do I stop overthinking?") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestConsumerFastPath:
+
+    async def test_simple_command_skips_llm(self, user, fake_chat_model):
+        from apps.chat.consumers import ChatConsumer
+
+        fake_chat_model()  # no scripted responses: any model call would fail
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/")
+        communicator.scope["user"] = user
+        await communicator.connect()
+
+        await communicator.send_json_to({"type": "message", "content": "meditated 10 min"})
+        response = await communicator.receive_json_from(timeout=5)
+
+        assert response == {
+            "type": "complete",
+            "content": "Logged your meditation — 10 minutes.",
+        }
+        await communicator.disconnect()
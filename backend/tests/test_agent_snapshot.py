@@ -0,0 +1,174 @@
+"""
+TDD: Context Snapshot Tests
+
+Every agent run's system prompt carries a compact, cached snapshot of the
+user's day (check-in, open todos, mantras, last journal date) so the model
+doesn't need a tool round trip just to orient itself. Writes refresh it.
+"""
+
+from datetime import timedelta
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.journal.models import DailyCheckin, JournalEntry
+from apps.mantras.models import Mantra
+from apps.todos.models import Todo
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+@pytest.mark.django_db
+class TestBuildSnapshot:
+
+    def test_renders_the_users_day(self, user, today):
+        from apps.agent.snapshot import build_snapshot
+
+        DailyCheckin.objects.create(
+            user=user, date=today, meditation_completed=True, meditation_duration=15
+        )
+        Todo.objects.create(user=user, task="Buy milk", due_date=today)
+        Todo.objects.create(user=user, task="Old task", completed=True)
+        Mantra.objects.create(user=user, content="Be like water")
+        JournalEntry.objects.create(user=user, content="...", date=today - timedelta(days=2))
+
+        snapshot = build_snapshot(user)
+
+        assert snapshot.startswith("## Right Now")
+        assert f"Today ({today}): meditation done (15 min), gratitude not yet, journal not yet" in snapshot
+        assert f"Open todos (1): Buy milk (due {today})" in snapshot
+        assert "Old task" not in snapshot
+        assert "Mantras: Be like water" in snapshot
+        assert f"Last journal entry: {today - timedelta(days=2)}" in snapshot
+
+    def test_empty_user(self, user):
+        from apps.agent.snapshot import build_snapshot
+
+        snapshot = build_snapshot(user)
+
+        assert "meditation not yet" in snapshot
+        assert "Open todos (0): none" in snapshot
+        assert "Last journal entry: never" in snapshot
+        assert not DailyCheckin.objects.exists()  # reading doesn't create a check-in
+
+    def test_stays_under_token_cap(self, user, settings):
+        from apps.agent.llm import estimate_tokens
+        from apps.agent.snapshot import build_snapshot
+
+        settings.AGENT_SNAPSHOT_TOKENS = 150
+        for i in range(50):
+            Todo.objects.create(user=user, task=f"Task number {i} with some detail")
+            Mantra.objects.create(user=user, content=f"Mantra number {i}")
+
+        snapshot = build_snapshot(user)
+
+        assert estimate_tokens(snapshot) <= 150
+        assert "Open todos (50): Task number" in snapshot
+        assert "more" in snapshot
+
+
+@pytest.mark.django_db
+class TestSnapshotCache:
+
+    def test_cached_until_a_write(self, user, django_assert_num_queries):
+        from apps.agent.snapshot import get_snapshot
+
+        get_snapshot(user)
+        with django_assert_num_queries(0):
+            assert "Open todos (0)" in get_snapshot(user)
+
+        Todo.objects.create(user=user, task="Call mom")
+
+        assert "Call mom" in get_snapshot(user)
+
+    def test_deletes_refresh(self, user):
+        from apps.agent.snapshot import get_snapshot
+
+        mantra = Mantra.objects.create(user=user, content="Breathe")
+        assert "Breathe" in get_snapshot(user)
+
+        mantra.delete()
+
+        assert "Mantras: none" in get_snapshot(user)
+
+    def test_other_users_writes_keep_cache(self, user, other_user, django_assert_num_queries):
+        from apps.agent.snapshot import get_snapshot
+
+        get_snapshot(user)
+        Todo.objects.create(user=other_user, task="Not mine")
+
+        with django_assert_num_queries(0):
+            get_snapshot(user)
+
+    def test_graph_bulk_writes_refresh(self, user, fake_chat_model):
+        from apps.agent.graph import agent
+        from apps.agent.snapshot import get_snapshot
+
+        get_snapshot(user)
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[tool_call("create_todos", {"tasks": [
+                {"task": "Buy milk"}, {"task": "Call mom"},
+            ]})]),
+            AIMessage(content="Added both."),
+        )
+        config = {"configurable": {"user": user, "anthropic_api_key": "k", "terminal_tools": False}}
+
+        agent.invoke({"messages": [HumanMessage(content="buy milk, call mom")]}, config)
+
+        assert "Open todos (2)" in get_snapshot(user)
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_async_graph_bulk_writes_refresh(self, user, fake_chat_model):
+        from asgiref.sync import sync_to_async
+
+        from apps.agent.graph import async_agent
+        from apps.agent.snapshot import get_snapshot
+
+        await sync_to_async(get_snapshot)(user)
+        await Todo.objects.acreate(user=user, task="Buy milk")
+        await sync_to_async(get_snapshot)(user)
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[tool_call("complete_todos", {"searches": ["milk"]})]),
+            AIMessage(content="Done."),
+        )
+        config = {"configurable": {"user": user, "anthropic_api_key": "k", "terminal_tools": False}}
+
+        await async_agent.ainvoke({"messages": [HumanMessage(content="bought milk")]}, config)
+
+        assert "Open todos (0)" in await sync_to_async(get_snapshot)(user)
+
+
+@pytest.mark.django_db
+class TestSnapshotInPrompt:
+
+    def test_model_messages_include_snapshot(self, user):
+        from apps.agent.graph import _model_messages
+
+        state = {"messages": [HumanMessage(content="how am I doing?")]}
+        config = {"configurable": {"user": user, "user_context": "## Right Now\nall good"}}
+
+        system = _model_messages(state, config)[0]
+
+        assert system.content[-1]["text"] == "## Right Now\nall good"
+        assert "cache_control" not in system.content[-1]
+
+    def test_consumer_config_carries_snapshot(self, user):
+        from apps.chat.consumers import ChatConsumer
+
+        Todo.objects.create(user=user, task="Water plants")
+        consumer = ChatConsumer()
+        consumer.user = user
+
+        assert "Water plants" in consumer._agent_config()["configurable"]["user_context"]
+
+    def test_snapshot_can_be_disabled(self, user, settings):
+        from apps.chat.consumers import ChatConsumer
+
+        settings.AGENT_CONTEXT_SNAPSHOT = False
+        consumer = ChatConsumer()
+        consumer.user = user
+
+        assert consumer._agent_config()["configurable"]["user_context"] == ""
@@ -0,0 +1,168 @@
+"""
+TDD: Agent Telemetry Tests
+
+Every agent run records per-node wall time, token usage, tool durations
+and loop iterations, saved as an AgentRun and summarized as percentiles
+in the admin.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.agent.models import AgentRun
+from apps.chat.models import ChatMessage
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def usage(input_tokens, output_tokens, cache_read=0):
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "input_token_details": {"cache_read": cache_read},
+    }
+
+
+@pytest.fixture
+def two_step_turn(fake_chat_model):
+    return fake_chat_model(
+        AIMessage(
+            content="",
+            tool_calls=[tool_call("get_todos", {}), tool_call("get_mantras", {}, "call_2")],
+            usage_metadata=usage(100, 10, cache_read=80),
+        ),
+        AIMessage(content="All clear.", usage_metadata=usage(150, 20)),
+    )
+
+
+class TestRunTelemetry:
+
+    def test_graph_records_nodes(self, user, two_step_turn):
+        from apps.agent.graph import agent
+        from apps.agent.telemetry import RunTelemetry
+
+        telemetry = RunTelemetry()
+        config = {"configurable": {"user": user, "anthropic_api_key": "k", "telemetry": telemetry}}
+        agent.invoke({"messages": [HumanMessage(content="anything on?")]}, config)
+
+        assert telemetry.iterations == 2
+        assert telemetry.input_tokens == 250
+        assert telemetry.output_tokens == 30
+        assert telemetry.cache_read_tokens == 80
+        assert [name for name, _ in telemetry.tool_timings] == ["get_todos", "get_mantras"]
+        assert telemetry.tool_result_tokens > 0
+        assert telemetry.model_ms >= 0 and telemetry.tools_ms >= 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_async_graph_records_nodes(self, user, two_step_turn):
+        from apps.agent.graph import async_agent
+        from apps.agent.telemetry import RunTelemetry
+
+        telemetry = RunTelemetry()
+        config = {"configurable": {"user": user, "anthropic_api_key": "k", "telemetry": telemetry}}
+        await async_agent.ainvoke({"messages": [HumanMessage(content="anything on?")]}, config)
+
+        assert telemetry.iterations == 2
+        assert sorted(name for name, _ in telemetry.tool_timings) == ["get_mantras", "get_todos"]
+
+    def test_consumer_saves_run(self, user, two_step_turn, settings):
+        from apps.chat.consumers import ChatConsumer
+
+        settings.AGENT_ASYNC = False
+        message = ChatMessage.objects.create(user=user, role="user", content="anything on?")
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = message.id
+        consumer._run_agent("anything on?")
+
+        run = AgentRun.objects.get()
+        assert run.message == message
+        assert run.iterations == 2
+        assert run.input_tokens == 250
+        assert run.total_ms >= run.model_ms
+        assert [name for name, _ in run.tool_timings] == ["get_todos", "get_mantras"]
+        assert run.tool_result_tokens > 0
+        assert (run.tool_cache_hits, run.tool_cache_misses) == (0, 2)
+        assert run.outcome == "ok"
+
+    def test_consumer_saves_failed_run(self, user, settings, monkeypatch, tmp_path):
+        from apps.agent import graph
+        from apps.agent.recording import load_recording, recording_paths
+        from apps.chat.consumers import ChatConsumer
+
+        class Broken:
+            def invoke(self, inputs, config):
+                raise RuntimeError("boom")
+
+        settings.AGENT_ASYNC = False
+        settings.AGENT_RECORD_RATE = 1
+        settings.AGENT_RECORDINGS_DIR = str(tmp_path)
+        monkeypatch.setattr(graph, "agent", Broken())
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = None
+
+        with pytest.raises(RuntimeError):
+            consumer._run_agent("anything on?")
+
+        assert AgentRun.objects.get().outcome == "error"
+        assert load_recording(recording_paths(str(tmp_path))[0])["outcome"] == "error"
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_consumer_saves_timed_out_run(self, user, settings, monkeypatch):
+        import asyncio
+
+        from apps.agent import graph
+        from apps.chat.consumers import ChatConsumer
+
+        class Hanging:
+            async def astream_events(self, inputs, config, version):
+                await asyncio.sleep(10)
+                yield {}
+
+        settings.AGENT_CHECKPOINTS = False
+        settings.AGENT_CONTEXT_SNAPSHOT = False
+        monkeypatch.setattr(graph, "async_agent", Hanging())
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = None
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(consumer._arun_agent("anything on?"), timeout=0.2)
+
+        run = await AgentRun.objects.aget()
+        assert run.outcome == "timeout"
+
+
+class TestPercentiles:
+
+    def test_nearest_rank(self):
+        from apps.agent.telemetry import percentile
+
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 90) == 90
+        assert percentile(values, 99) == 99
+        assert percentile([7], 99) == 7
+        assert percentile([], 50) is None
+
+    def test_admin_shows_percentiles(self, admin_client, user):
+        for total, tool_ms in ((100, 5), (200, 10), (900, 40)):
+            AgentRun.objects.create(
+                user=user, total_ms=total, model_ms=total - 50, tools_ms=tool_ms,
+                iterations=2, tool_timings=[["get_todos", tool_ms]],
+            )
+
+        response = admin_client.get("/admin/agent/agentrun/")
+
+        assert response.status_code == 200
+        stats = response.context["run_stats"]
+        assert stats["runs"] == 3
+        assert dict(stats["fields"])["Total ms"] == [200, 900, 900]
+        assert stats["tools"] == [("get_todos", 3, [10, 40, 40])]
+        assert b"Percentiles over 3 runs" in response.content
@@ -0,0 +1,128 @@
+"""
+TDD: Model Tiering Tests
+
+Routine turns go to the fast model; reflective turns keep the deep model.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from apps.agent.tiering import DEEP, FAST, classify
+
+
+def after_tools(*names):
+    return [
+        HumanMessage(content="..."),
+        AIMessage(content="", tool_calls=[
+            {"name": n, "args": {}, "id": f"c{i}", "type": "tool_call"}
+            for i, n in enumerate(names)
+        ]),
+        *(
+            ToolMessage(content="{}", tool_call_id=f"c{i}", name=n)
+            for i, n in enumerate(names)
+        ),
+    ]
+
+
+class TestClassify:
+
+    @pytest.mark.parametrize("text", [
+        "add a todo to call mom",
+        "meditated 20 min",
+        "done with groceries",
+        "show my todos",
+        "I need to call the doctor and text Krystle",
+        "grateful for coffee, sun, and good sleep",
+    ])
+    def test_commands_are_fast(self, text):
+        assert classify([HumanMessage(content=text)]) == FAST
+
+    @pytest.mark.parametrize("text", [
+        "I felt really anxious at work today",
+        "Why do I keep avoiding my emails?",
+        "What patterns do you notice in my journal lately?",
+        "Hello",
+        "Today I walked by the river and thought about my father. " * 4,
+    ])
+    def test_reflective_and_unknown_are_deep(self, text):
+        assert classify([HumanMessage(content=text)]) == DEEP
+
+    def test_confirmation_after_writes_is_fast(self):
+        assert classify(after_tools("create_todos", "log_meditation")) == FAST
+
+    def test_follow_up_after_journal_is_deep(self):
+        assert classify(after_tools("save_journal_entry")) == DEEP
+        assert classify(after_tools("get_todos", "get_recent_entries")) == DEEP
+
+
+class TestGraphTiering:
+
+    def models_used(self, monkeypatch):
+        import apps.agent.graph as graph
+
+        used = []
+        real = graph.get_chat_model
+
+        def recording(model_name, api_key, max_tokens, tools):
+            used.append((model_name, max_tokens))
+            return real(model_name, api_key, max_tokens=max_tokens, tools=tools)
+
+        monkeypatch.setattr(graph, "get_chat_model", recording)
+        return used
+
+    def test_tool_turn_uses_fast_tier(self, user, fake_chat_model, monkeypatch, settings):
+        from apps.agent.graph import agent
+
+        used = self.models_used(monkeypatch)
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[{
+                "name": "create_todo",
+                "args": {"task": "Call mom", "follow_up": True},
+                "id": "c1",
+                "type": "tool_call",
+            }]),
+            AIMessage(content="Added."),
+        )
+        agent.invoke(
+            {"messages": [HumanMessage(content="add a todo to call mom")]},
+            config={"configurable": {"user": user}},
+        )
+
+        fast = settings.AGENT_MODEL_TIERS["fast"]
+        assert used == [(fast["model"], fast["max_tokens"])] * 2
+
+    def test_journal_uses_deep_tier(self, user, fake_chat_model, monkeypatch, settings):
+        from apps.agent.graph import agent
+
+        used = self.models_used(monkeypatch)
+        fake_chat_model(AIMessage(content="That sounds heavy."))
+        agent.invoke(
+            {"messages": [HumanMessage(content="I felt so lonely today")]},
+            config={"configurable": {"user": user}},
+        )
+
+        deep = settings.AGENT_MODEL_TIERS["deep"]
+        assert used == [(deep["model"], deep["max_tokens"])]
+
+    def test_explicit_model_overrides_tiering(self, user, fake_chat_model, monkeypatch):
+        from apps.agent.graph import agent
+
+        used = self.models_used(monkeypatch)
+        fake_chat_model(AIMessage(content="Done."))
+        agent.invoke(
+            {"messages": [HumanMessage(content="show my todos")]},
+            config={"configurable": {"user": user, "model": "claude-custom"}},
+        )
+        assert used[0][0] == "claude-custom"
+
+    def test_tiering_disabled_uses_deep(self, user, fake_chat_model, monkeypatch, settings):
+        from apps.agent.graph import agent
+
+        settings.AGENT_TIERING = False
+        used = self.models_used(monkeypatch)
+        fake_chat_model(AIMessage(content="Done."))
+        agent.invoke(
+            {"messages": [HumanMessage(content="show my todos")]},
+            config={"configurable": {"user": user}},
+        )
+        assert used[0][0] == settings.AGENT_MODEL_TIERS["deep"]["model"]
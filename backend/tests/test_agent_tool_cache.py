@@ -0,0 +1,119 @@
+"""
+TDD: Per-Run Tool Cache Tests
+
+Repeated reads within one agent run are served from memory, and writes
+invalidate only the reads they can change.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.todos.models import Todo
+
+
+def tool_call(name, args, call_id="call_1"):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+class TestToolCache:
+
+    def test_repeated_read_hits(self):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        hit, _, token = cache.lookup("get_todos", {})
+        assert not hit
+        cache.store("get_todos", {}, {"todos": []}, token)
+
+        hit, result, _ = cache.lookup("get_todos", {})
+        assert hit
+        assert result == {"todos": []}
+        assert cache.stats() == {"hits": 1, "misses": 1}
+
+    def test_arguments_are_part_of_key(self):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        _, _, token = cache.lookup("get_todos", {"include_completed": False})
+        cache.store("get_todos", {"include_completed": False}, {"todos": []}, token)
+
+        hit, _, _ = cache.lookup("get_todos", {"include_completed": True})
+        assert not hit
+
+    def test_write_invalidates_only_affected_reads(self):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        for name in ("get_todos", "get_mantras"):
+            _, _, token = cache.lookup(name, {})
+            cache.store(name, {}, {}, token)
+
+        cache.invalidate("create_todo")
+
+        assert not cache.lookup("get_todos", {})[0]
+        assert cache.lookup("get_mantras", {})[0]
+
+    def test_read_racing_a_write_is_not_stored(self):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        _, _, token = cache.lookup("get_todays_status", {})
+        cache.invalidate("log_meditation")  # finished while the read ran
+        cache.store("get_todays_status", {}, {"meditation": False}, token)
+
+        assert not cache.lookup("get_todays_status", {})[0]
+
+    def test_writes_are_never_cached(self):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        assert cache.lookup("create_todo", {"task": "x"}) == (False, None, None)
+        assert cache.stats() == {"hits": 0, "misses": 0}
+
+
+class TestGraphUsesCache:
+
+    @pytest.fixture
+    def script(self, fake_chat_model):
+        # Read, read again, write, read: the second read is a hit and the
+        # read after the write sees the new todo.
+        return fake_chat_model(
+            AIMessage(content="", tool_calls=[tool_call("get_todos", {}, "c1")]),
+            AIMessage(content="", tool_calls=[tool_call("get_todos", {}, "c2")]),
+            AIMessage(content="", tool_calls=[
+                tool_call("create_todo", {"task": "Call mom", "follow_up": True}, "c3"),
+            ]),
+            AIMessage(content="", tool_calls=[tool_call("get_todos", {}, "c4")]),
+            AIMessage(content="Done."),
+        )
+
+    def _config(self, user):
+        from apps.agent.tool_cache import ToolCache
+
+        cache = ToolCache()
+        config = {"configurable": {"user": user, "anthropic_api_key": "k", "tool_cache": cache}}
+        return config, cache
+
+    def test_sync_graph(self, user, script):
+        from apps.agent.graph import agent
+
+        Todo.objects.create(user=user, task="Buy milk")
+        config, cache = self._config(user)
+        result = agent.invoke({"messages": [HumanMessage(content="todos?")]}, config)
+
+        reads = [m for m in result["messages"] if getattr(m, "name", None) == "get_todos"]
+        assert [len(m.artifact["todos"]) for m in reads] == [1, 1, 2]
+        assert cache.stats() == {"hits": 1, "misses": 2}
+
+    @pytest.mark.asyncio
+    @pytest.mark.django_db(transaction=True)
+    async def test_async_graph(self, user, script):
+        from apps.agent.graph import async_agent
+
+        await Todo.objects.acreate(user=user, task="Buy milk")
+        config, cache = self._config(user)
+        result = await async_agent.ainvoke({"messages": [HumanMessage(content="todos?")]}, config)
+
+        reads = [m for m in result["messages"] if getattr(m, "name", None) == "get_todos"]
+        assert [len(m.artifact["todos"]) for m in reads] == [1, 1, 2]
+        assert cache.stats() == {"hits": 1, "misses": 2}
@@ -20,6 +20,7 @@ from apps.journal.models import (
     WeeklySummary,
 )
 from apps.mantras.models import Mantra
+from apps.todos.dates import today_in
 from apps.todos.models import Todo
 
 
@@ -158,14 +159,42 @@ class TestCreateTodo:
 
         result = create_todo(user=user, task="Do thing", due_date="tomorrow")
         todo = Todo.objects.get(user=user, task="Do thing")
-        assert todo.due_date == date.today() + timedelta(days=1)
+        assert todo.due_date == today_in(user.timezone) + timedelta(days=1)
 
     def test_create_todo_with_relative_date_today(self, user):
         from apps.agent.tools import create_todo
 
         result = create_todo(user=user, task="Do thing", due_date="today")
         todo = Todo.objects.get(user=user, task="Do thing")
-        assert todo.due_date == date.today()
+        assert todo.due_date == today_in(user.timezone)
+
+    def test_create_todo_with_weekday(self, user):
+        from apps.agent.tools import create_todo
+
+        result = create_todo(user=user, task="Do thing", due_date="next friday")
+
+        today = today_in(user.timezone)
+        due = Todo.objects.get(user=user, task="Do thing").due_date
+        assert result["due_date"] == str(due)
+        assert due.weekday() == 4
+        assert 3 <= (due - today).days <= 11
+
+    def test_create_todo_with_unknown_date(self, user):
+        from apps.agent.tools import create_todo
+
+        result = create_todo(user=user, task="Do thing", due_date="someday")
+
+        assert result["created"] is False
+        assert "someday" in result["message"]
+        assert not Todo.objects.filter(user=user).exists()
+
+    def test_create_todo_with_out_of_range_date(self, user):
+        from apps.agent.tools import create_todo
+
+        result = create_todo(user=user, task="Do thing", due_date="in 9999999 days")
+
+        assert result["created"] is False
+        assert not Todo.objects.filter(user=user).exists()
 
 
 class TestCompleteTodo:
@@ -215,6 +244,108 @@ class TestCompleteTodo:
         assert result["completed"] is False
 
 
+class TestCreateTodos:
+    """Tests for the create_todos batch tool."""
+
+    def test_create_todos_in_one_query(self, user, django_assert_num_queries):
+        from apps.agent.tools import create_todos
+
+        with django_assert_num_queries(1):
+            result = create_todos(user=user, tasks=[
+                {"task": "Call the doctor"},
+                {"task": "Pick up groceries", "due_date": "tomorrow"},
+                {"task": "Text Krystle", "due_date": None},
+            ])
+
+        assert result["created"] == 3
+        assert [t["task"] for t in result["todos"]] == [
+            "Call the doctor", "Pick up groceries", "Text Krystle",
+        ]
+        groceries = Todo.objects.get(user=user, task="Pick up groceries")
+        assert groceries.due_date == today_in(user.timezone) + timedelta(days=1)
+
+    def test_create_todos_empty(self, user):
+        from apps.agent.tools import create_todos
+
+        assert create_todos(user=user, tasks=[])["created"] == 0
+
+    def test_create_todos_with_out_of_range_date(self, user):
+        from apps.agent.tools import create_todos
+
+        result = create_todos(user=user, tasks=[
+            {"task": "Call the doctor"},
+            {"task": "Plant a tree", "due_date": "in 9999999 days"},
+        ])
+
+        assert result["created"] == 0
+        assert not Todo.objects.filter(user=user).exists()
+
+
+class TestCompleteTodos:
+    """Tests for the complete_todos batch tool."""
+
+    def test_complete_todos_ranked_searches_then_single_update(
+        self, user, django_assert_max_num_queries
+    ):
+        from apps.agent.tools import complete_todos
+
+        Todo.objects.create(user=user, task="Call the doctor")
+        Todo.objects.create(user=user, task="Pick up groceries")
+        Todo.objects.create(user=user, task="Text Krystle")
+
+        # One ranked search per term (two without the trigram index), one UPDATE
+        with django_assert_max_num_queries(5) as captured:
+            result = complete_todos(user=user, searches=["doctor", "groceries"])
+
+        updates = [q for q in captured.captured_queries if q["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+
+        assert sorted(result["completed"]) == ["Call the doctor", "Pick up groceries"]
+        assert list(
+            Todo.objects.filter(user=user, completed=False).values_list("task", flat=True)
+        ) == ["Text Krystle"]
+        assert Todo.objects.filter(completed=True, completed_at__isnull=True).count() == 0
+
+    def test_complete_todos_reports_misses_and_ambiguity(self, user):
+        from apps.agent.tools import complete_todos
+
+        Todo.objects.create(user=user, task="Call the doctor")
+        Todo.objects.create(user=user, task="Call mom")
+
+        result = complete_todos(user=user, searches=["call", "dentist"])
+        assert result["completed"] == []
+        assert result["ambiguous"][0]["search"] == "call"
+        assert len(result["ambiguous"][0]["matches"]) == 2
+        assert result["not_found"] == ["dentist"]
+
+    def test_complete_todos_exact_match_wins(self, user):
+        from apps.agent.tools import complete_todos
+
+        Todo.objects.create(user=user, task="Call mom")
+        Todo.objects.create(user=user, task="Call mom about dinner")
+
+        result = complete_todos(user=user, searches=["call mom"])
+        assert result["completed"] == ["Call mom"]
+
+    def test_complete_todos_matches_like_complete_todo(self, user):
+        from apps.agent.tools import complete_todo, complete_todos
+
+        Todo.objects.create(user=user, task="Buy groceries")
+        Todo.objects.create(user=user, task="Renew passport")
+        assert complete_todo(user=user, search="grocries")["completed"] is True
+
+        result = complete_todos(user=user, searches=["renew pasport"])
+        assert result["completed"] == ["Renew passport"]
+
+    def test_complete_todos_scoped_to_user(self, user, other_user):
+        from apps.agent.tools import complete_todos
+
+        Todo.objects.create(user=other_user, task="Secret task")
+        result = complete_todos(user=user, searches=["Secret task"])
+        assert result["not_found"] == ["Secret task"]
+        assert not Todo.objects.filter(completed=True).exists()
+
+
 class TestGetTodos:
     """Tests for the get_todos tool."""
 
@@ -283,6 +414,18 @@ class TestGetRecentEntries:
         result = get_recent_entries(user=user, days=7)
         assert len(result["entries"]) == 0
 
+    def test_get_recent_entries_offset(self, user):
+        from apps.agent.tools import get_recent_entries
+
+        for days_ago in range(3):
+            JournalEntry.objects.create(
+                user=user,
+                content=f"{days_ago} days ago",
+                date=date.today() - timedelta(days=days_ago),
+            )
+        result = get_recent_entries(user=user, days=7, offset=1)
+        assert [e["content"] for e in result["entries"]] == ["1 days ago", "2 days ago"]
+
 
 class TestGetMantras:
     """Tests for the get_mantras tool."""
@@ -0,0 +1,203 @@
+"""
+TDD: Token Usage Tests
+
+Every model call's tokens are added to the user's daily counters, rolled
+up into DailyTokenUsage rows and shown on /api/auth/me/. Past the soft
+daily budget calls move to the fast tier; past the hard budget Claude
+isn't called at all.
+"""
+
+from datetime import date
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from rest_framework.test import APIClient
+
+
+def usage(input=0, output=0, cache_read=0, cache_creation=0):
+    return {"input": input, "output": output, "cache_read": cache_read, "cache_creation": cache_creation}
+
+
+def reply(text, input_tokens=100, output_tokens=20):
+    return AIMessage(content=text, usage_metadata={
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+    })
+
+
+@pytest.mark.django_db
+class TestCounters:
+
+    def test_records_and_sums_usage(self, user):
+        from apps.agent.usage import record_usage, usage_for
+
+        record_usage(user.pk, usage(input=100, output=20, cache_read=80))
+        record_usage(user.pk, usage(input=50, output=5, cache_creation=40))
+
+        assert usage_for(user.pk) == {
+            "input_tokens": 150,
+            "output_tokens": 25,
+            "cache_read_tokens": 80,
+            "cache_creation_tokens": 40,
+            "total_tokens": 175,
+        }
+
+    def test_rollup_writes_daily_rows(self, user):
+        from apps.agent.models import DailyTokenUsage
+        from apps.agent.usage import record_usage, rollup
+
+        record_usage(user.pk, usage(input=100, output=20))
+
+        assert rollup() == 1
+        row = DailyTokenUsage.objects.get(user=user, date=date.today())
+        assert (row.input_tokens, row.output_tokens, row.total_tokens) == (100, 20, 120)
+        assert rollup() == 0  # nothing new
+
+    def test_lost_counters_resume_from_the_rollup(self, user):
+        from django.core.cache import cache
+
+        from apps.agent.usage import record_usage, rollup, usage_for
+
+        record_usage(user.pk, usage(input=100, output=20))
+        rollup()
+        cache.clear()
+
+        assert usage_for(user.pk)["total_tokens"] == 120
+        record_usage(user.pk, usage(input=10, output=2))
+        assert usage_for(user.pk)["total_tokens"] == 132
+
+    def test_recording_makes_no_db_writes_after_the_first(self, user, django_assert_num_queries):
+        from apps.agent.usage import record_usage
+
+        record_usage(user.pk, usage(input=1, output=1))
+        with django_assert_num_queries(0):
+            record_usage(user.pk, usage(input=1, output=1))
+
+    def test_budget_status(self, settings):
+        from apps.agent.usage import HARD, OK, SOFT, budget_status
+
+        settings.AGENT_DAILY_TOKEN_SOFT_BUDGET = 100
+        settings.AGENT_DAILY_TOKEN_HARD_BUDGET = 200
+
+        assert budget_status(99) == OK
+        assert budget_status(100) == SOFT
+        assert budget_status(200) == HARD
+
+        settings.AGENT_DAILY_TOKEN_HARD_BUDGET = 0
+        assert budget_status(10_000) == SOFT
+
+
+@pytest.mark.django_db
+class TestBudgets:
+
+    @pytest.fixture(autouse=True)
+    def budgets(self, settings):
+        settings.AGENT_DAILY_TOKEN_SOFT_BUDGET = 1000
+        settings.AGENT_DAILY_TOKEN_HARD_BUDGET = 2000
+
+    def ask(self, user, text="hi"):
+        from apps.agent.graph import agent
+
+        config = {"configurable": {"user": user}}
+        result = agent.invoke({"messages": [HumanMessage(content=text)]}, config)
+        return result["messages"][-1].content
+
+    def test_agent_calls_are_counted(self, user, fake_chat_model):
+        from apps.agent.usage import usage_for
+
+        fake_chat_model(reply("Hello.", 300, 12))
+
+        assert self.ask(user) == "Hello."
+        assert usage_for(user.pk)["total_tokens"] == 312
+
+    def test_soft_budget_uses_the_fast_tier(self, user, fake_chat_model, settings, monkeypatch):
+        from apps.agent import graph
+        from apps.agent.usage import record_usage
+
+        models = []
+        bound = graph._bound_model
+        monkeypatch.setattr(graph, "_bound_model", lambda config, name, max_tokens: (
+            models.append(name) or bound(config, name, max_tokens)
+        ))
+        fake_chat_model(reply("Deep."), reply("Fast."))
+        reflective = "I've been feeling anxious about work lately and I want to reflect on why"
+
+        self.ask(user, reflective)
+        record_usage(user.pk, usage(input=1000))
+        self.ask(user, reflective)
+
+        assert models == [
+            settings.AGENT_MODEL_TIERS["deep"]["model"],
+            settings.AGENT_MODEL_TIERS["fast"]["model"],
+        ]
+
+    def test_hard_budget_refuses_the_call(self, user, fake_chat_model):
+        from apps.agent.usage import OVER_BUDGET_MESSAGE, record_usage
+
+        model = fake_chat_model(reply("Not sent."))
+        record_usage(user.pk, usage(input=1900, output=100))
+
+        assert self.ask(user) == OVER_BUDGET_MESSAGE
+        assert next(model.messages).content == "Not sent."
+
+    def test_summaries_are_counted(self, user, monkeypatch):
+        from apps.agent.usage import usage_for
+        from apps.chat import tasks
+
+        class Model:
+            def __init__(self, **kwargs):
+                pass
+
+            def invoke(self, messages):
+                return reply("A summary.", 500, 40)
+
+        monkeypatch.setattr(tasks, "ChatAnthropic", Model)
+
+        assert tasks.summarize("", [], "key", user.pk) == "A summary."
+        assert usage_for(user.pk)["total_tokens"] == 540
+
+
+@pytest.mark.django_db
+def test_me_shows_todays_usage(user, settings):
+    from apps.agent.usage import record_usage
+
+    settings.AGENT_DAILY_TOKEN_SOFT_BUDGET = 100
+    settings.AGENT_DAILY_TOKEN_HARD_BUDGET = 0
+    record_usage(user.pk, usage(input=90, output=30, cache_read=60))
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get("/api/auth/me/")
+
+    assert response.status_code == 200
+    assert response.data["token_usage"] == {
+        "date": date.today(),
+        "input_tokens": 90,
+        "output_tokens": 30,
+        "cache_read_tokens": 60,
+        "cache_creation_tokens": 0,
+        "total_tokens": 120,
+        "soft_budget": 100,
+        "hard_budget": None,
+        "status": "soft",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_async_hard_budget_refuses_the_call(user, fake_chat_model, settings):
+    from asgiref.sync import sync_to_async
+
+    from apps.agent.graph import async_agent
+    from apps.agent.usage import OVER_BUDGET_MESSAGE, record_usage
+
+    settings.AGENT_DAILY_TOKEN_HARD_BUDGET = 100
+    fake_chat_model(reply("Not sent."))
+    await sync_to_async(record_usage)(user.pk, usage(input=100))
+
+    result = await async_agent.ainvoke(
+        {"messages": [HumanMessage(content="hi")]}, {"configurable": {"user": user}}
+    )
+
+    assert result["messages"][-1].content == OVER_BUDGET_MESSAGE
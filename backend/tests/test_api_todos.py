@@ -44,6 +44,32 @@ class TestTodoAPI:
         assert response.status_code == 201
         assert response.data["due_date"] == "2026-02-05"
 
+    def test_create_todo_with_natural_due_date(self, auth_client, user):
+        from apps.todos.dates import today_in
+
+        response = auth_client.post("/api/todos/", {
+            "task": "Buy groceries",
+            "due_date": "in 3 days",
+        })
+        assert response.status_code == 201
+        assert response.data["due_date"] == str(today_in(user.timezone) + timedelta(days=3))
+
+    def test_create_todo_with_unknown_due_date(self, auth_client):
+        response = auth_client.post("/api/todos/", {
+            "task": "Buy groceries",
+            "due_date": "someday",
+        })
+        assert response.status_code == 400
+        assert "due_date" in response.data
+
+    def test_create_todo_with_out_of_range_due_date(self, auth_client):
+        response = auth_client.post("/api/todos/", {
+            "task": "Buy groceries",
+            "due_date": "in 9999999 days",
+        })
+        assert response.status_code == 400
+        assert "due_date" in response.data
+
     def test_list_todos(self, auth_client, user):
         Todo.objects.create(user=user, task="Task 1")
         Todo.objects.create(user=user, task="Task 2")
@@ -0,0 +1,245 @@
+"""
+TDD: Conversation Memory Tests
+
+The agent sees the last few turns of chat history under a token budget,
+plus a rolling summary of older turns that a Celery task keeps up to date.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from apps.chat.models import ChatMessage, ConversationSummary
+
+pytestmark = pytest.mark.django_db
+
+
+def _chat(user, *contents):
+    """Save alternating user/assistant messages."""
+    return [
+        ChatMessage.objects.create(
+            user=user, role="user" if i % 2 == 0 else "assistant", content=text
+        )
+        for i, text in enumerate(contents)
+    ]
+
+
+class TestLoadHistory:
+
+    def test_returns_recent_turns_in_order(self, user):
+        from apps.chat.memory import load_history
+
+        _chat(user, "hi", "hello", "how are you", "well")
+        messages, summary = load_history(user)
+
+        assert [type(m) for m in messages] == [HumanMessage, AIMessage, HumanMessage, AIMessage]
+        assert [m.content for m in messages] == ["hi", "hello", "how are you", "well"]
+        assert summary == ""
+
+    def test_excludes_current_message(self, user):
+        from apps.chat.memory import load_history
+
+        saved = _chat(user, "hi", "hello", "new message")
+        messages, _ = load_history(user, before_id=saved[-1].id)
+
+        assert [m.content for m in messages] == ["hi", "hello"]
+
+    def test_limited_to_recent_turns(self, user, settings):
+        from apps.chat.memory import load_history
+
+        settings.AGENT_MEMORY_TURNS = 2
+        _chat(user, *[f"m{i}" for i in range(10)])
+        messages, _ = load_history(user)
+
+        assert [m.content for m in messages] == ["m6", "m7", "m8", "m9"]
+
+    def test_token_budget_drops_oldest(self, user, settings):
+        from apps.chat.memory import load_history
+
+        settings.AGENT_MEMORY_TOKENS = 60
+        _chat(user, "x" * 400, "old reply", "short", "reply")
+        messages, _ = load_history(user)
+
+        assert [m.content for m in messages] == ["short", "reply"]
+
+    def test_starts_with_user_message(self, user, settings):
+        from apps.chat.memory import load_history
+
+        settings.AGENT_MEMORY_TURNS = 1
+        _chat(user, "a", "b", "c")
+        messages, _ = load_history(user)
+
+        assert isinstance(messages[0], HumanMessage)
+        assert [m.content for m in messages] == ["c"]
+
+    def test_scoped_to_user(self, user, other_user):
+        from apps.chat.memory import load_history
+
+        _chat(other_user, "secret", "reply")
+        messages, _ = load_history(user)
+
+        assert messages == []
+
+    def test_includes_summary(self, user):
+        from apps.chat.memory import load_history
+
+        ConversationSummary.objects.create(user=user, summary="Started a new job.")
+        _, summary = load_history(user)
+
+        assert summary == "Started a new job."
+
+
+class TestSummaryScheduling:
+
+    def test_nothing_pending_inside_window(self, user, settings):
+        from apps.chat.memory import maybe_schedule_summary
+
+        settings.AGENT_MEMORY_TURNS = 5
+        _chat(user, *[f"m{i}" for i in range(10)])
+
+        with patch("apps.chat.tasks.update_conversation_summary.delay") as delay:
+            assert maybe_schedule_summary(user) is False
+        delay.assert_not_called()
+
+    def test_schedules_after_batch_leaves_window(self, user, settings):
+        from apps.chat.memory import maybe_schedule_summary, unsummarized
+
+        settings.AGENT_MEMORY_TURNS = 2
+        settings.AGENT_MEMORY_SUMMARY_BATCH = 4
+        _chat(user, *[f"m{i}" for i in range(8)])
+
+        assert [m.content for m in unsummarized(user)] == ["m0", "m1", "m2", "m3"]
+        with patch("apps.chat.tasks.update_conversation_summary.delay") as delay:
+            assert maybe_schedule_summary(user) is True
+        delay.assert_called_once_with(user.id)
+
+    def test_budget_trimmed_messages_are_summarized(self, user, settings):
+        from apps.chat.memory import load_history, unsummarized
+
+        settings.AGENT_MEMORY_TOKENS = 60
+        _chat(user, "x" * 400, "old reply", "short", "reply")
+
+        messages, _ = load_history(user)
+        assert [m.content for m in messages] == ["short", "reply"]
+        assert [m.content for m in unsummarized(user)] == ["x" * 400, "old reply"]
+
+    def test_queues_one_summary_at_a_time(self, user, settings):
+        from apps.chat.memory import maybe_schedule_summary
+        from apps.chat.tasks import update_conversation_summary
+
+        settings.AGENT_MEMORY_TURNS = 1
+        settings.AGENT_MEMORY_SUMMARY_BATCH = 1
+        _chat(user, "a", "b", "c", "d")
+
+        with patch("apps.chat.tasks.update_conversation_summary.delay") as delay:
+            assert maybe_schedule_summary(user) is True
+            assert maybe_schedule_summary(user) is False
+            patcher, _ = _summary_model("Summary.")
+            with patcher:
+                update_conversation_summary(user.id)
+            _chat(user, "e", "f")
+            assert maybe_schedule_summary(user) is True
+        assert delay.call_count == 2
+
+    def test_broker_failure_is_not_fatal(self, user, settings):
+        from apps.chat.memory import maybe_schedule_summary
+
+        settings.AGENT_MEMORY_TURNS = 1
+        settings.AGENT_MEMORY_SUMMARY_BATCH = 1
+        _chat(user, "a", "b", "c", "d")
+
+        with patch(
+            "apps.chat.tasks.update_conversation_summary.delay",
+            side_effect=ConnectionError("no broker"),
+        ):
+            assert maybe_schedule_summary(user) is False
+        with patch("apps.chat.tasks.update_conversation_summary.delay") as delay:
+            assert maybe_schedule_summary(user) is True
+        delay.assert_called_once_with(user.id)
+
+
+def _summary_model(text):
+    """Patch the summarizer's ChatAnthropic with a mock returning text."""
+    model = MagicMock()
+    model.invoke.return_value = AIMessage(content=text)
+    return patch("apps.chat.tasks.ChatAnthropic", return_value=model), model
+
+
+class TestUpdateSummary:
+
+    def test_folds_old_messages_into_summary(self, user, settings):
+        from apps.chat.memory import unsummarized
+        from apps.chat.tasks import update_conversation_summary
+
+        settings.AGENT_MEMORY_TURNS = 1
+        saved = _chat(user, "I got a dog", "Congrats!", "thanks", "anytime")
+        patcher, _ = _summary_model("The user recently got a dog.")
+
+        with patcher:
+            update_conversation_summary(user.id)
+
+        record = ConversationSummary.objects.get(user=user)
+        assert record.summary == "The user recently got a dog."
+        assert record.summarized_through_id == saved[1].id
+        assert unsummarized(user) == []
+
+    def test_prompt_includes_previous_summary(self, user, settings):
+        from apps.chat.tasks import update_conversation_summary
+
+        settings.AGENT_MEMORY_TURNS = 1
+        ConversationSummary.objects.create(user=user, summary="Likes running.")
+        _chat(user, "ran 5k", "nice", "thanks", "sure")
+        patcher, model = _summary_model("Likes running; ran a 5k.")
+
+        with patcher:
+            update_conversation_summary(user.id)
+
+        prompt = model.invoke.call_args.args[0][-1].content
+        assert "Likes running." in prompt
+        assert "User: ran 5k" in prompt
+
+
+class TestAgentSeesMemory:
+
+    def test_summary_added_to_system_prompt(self, settings):
+        from langchain_core.messages import HumanMessage
+
+        from apps.agent.graph import _model_messages
+
+        settings.AGENT_PROMPT_CACHING = True
+        state = {"messages": [HumanMessage(content="hi")]}
+        config = {"configurable": {"conversation_summary": "Got a dog."}}
+        system = _model_messages(state, config)[0]
+
+        # Summary sits after the cached prefix so the prefix stays shared
+        assert "cache_control" in system.content[0]
+        assert "Got a dog." in system.content[1]["text"]
+        assert "cache_control" not in system.content[1]
+
+    def test_no_summary_block_when_empty(self, settings):
+        from langchain_core.messages import HumanMessage
+
+        from apps.agent.graph import _model_messages
+
+        settings.AGENT_PROMPT_CACHING = True
+        state = {"messages": [HumanMessage(content="hi")]}
+        system = _model_messages(state, {"configurable": {}})[0]
+
+        assert len(system.content) == 1
+
+    def test_consumer_passes_history(self, user):
+        from apps.chat.consumers import ChatConsumer
+
+        saved = _chat(user, "I got a dog", "Congrats!", "what should I name it")
+        ConversationSummary.objects.create(user=user, summary="Lives in Denver.")
+
+        consumer = ChatConsumer()
+        consumer.user = user
+        consumer.current_message_id = saved[-1].id
+        inputs, config = consumer._agent_inputs("what should I name it")
+
+        assert [m.content for m in inputs["messages"]] == [
+            "I got a dog", "Congrats!", "what should I name it",
+        ]
+        assert config["configurable"]["conversation_summary"] == "Lives in Denver."
@@ -0,0 +1,104 @@
+"""
+TDD: Check-in Upsert Tests
+
+Daily check-ins are written with one INSERT ... ON CONFLICT (user, date)
+DO UPDATE that touches only the changed columns. Every tool and view
+path that marks a check-in does exactly one check-in query.
+"""
+
+from datetime import date
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.journal.models import DailyCheckin
+
+
+def checkin_queries(captured):
+    return [q["sql"] for q in captured.captured_queries if "journal_dailycheckin" in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestUpsert:
+
+    def test_creates_with_defaults(self, user):
+        checkin = DailyCheckin.objects.upsert(user, date.today(), journal_completed=True)
+
+        assert checkin.pk is not None
+        assert checkin.journal_completed is True
+        assert checkin.meditation_completed is False
+        assert DailyCheckin.objects.get(pk=checkin.pk).journal_completed is True
+
+    def test_updates_only_changed_columns(self, user):
+        DailyCheckin.objects.create(
+            user=user, date=date.today(), meditation_completed=True, meditation_duration=15,
+        )
+
+        checkin = DailyCheckin.objects.upsert(user, date.today(), gratitude_completed=True)
+
+        assert DailyCheckin.objects.count() == 1
+        assert (checkin.meditation_completed, checkin.meditation_duration) == (True, 15)
+        assert checkin.gratitude_completed is True
+
+    def test_one_statement(self, user, django_assert_num_queries):
+        DailyCheckin.objects.create(user=user, date=date.today())
+
+        with django_assert_num_queries(1) as captured:
+            DailyCheckin.objects.upsert(user, date.today(), journal_completed=True)
+
+        sql = captured.captured_queries[0]["sql"]
+        assert "ON CONFLICT" in sql
+        assert '"journal_completed" = EXCLUDED."journal_completed"' in sql
+        assert 'EXCLUDED."meditation_completed"' not in sql
+
+    def test_keeps_users_apart(self, user, other_user):
+        DailyCheckin.objects.upsert(user, date.today(), meditation_completed=True)
+
+        other = DailyCheckin.objects.upsert(other_user, date.today(), journal_completed=True)
+
+        assert other.meditation_completed is False
+        assert DailyCheckin.objects.count() == 2
+
+    def test_drops_the_agent_snapshot(self, user):
+        from apps.agent.snapshot import get_snapshot
+
+        get_snapshot(user)
+        DailyCheckin.objects.upsert(user, date.today(), meditation_completed=True)
+
+        assert "meditation done" in get_snapshot(user)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("tool, kwargs", [
+    ("log_meditation", {"duration_minutes": 10}),
+    ("save_gratitude_list", {"items": ["tea"]}),
+    ("save_journal_entry", {"content": "A good day."}),
+])
+@pytest.mark.parametrize("existing", [False, True])
+def test_tools_write_the_checkin_once(user, tool, kwargs, existing):
+    from apps.agent import tools
+
+    if existing:
+        DailyCheckin.objects.create(user=user, date=date.today())
+
+    with CaptureQueriesContext(connection) as captured:
+        getattr(tools, tool)(user=user, **kwargs)
+
+    assert len(checkin_queries(captured)) == 1
+    assert DailyCheckin.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_meditation_view_is_one_query(user, django_assert_num_queries):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    DailyCheckin.objects.create(user=user, date=date.today(), meditation_duration=20)
+
+    with django_assert_num_queries(1):
+        response = client.post("/api/checkins/meditation/", {})
+
+    assert response.status_code == 200
+    assert response.data["meditation_completed"] is True
+    assert response.data["meditation_duration"] == 20
@@ -0,0 +1,105 @@
+"""
+TDD: Due Date Resolution Tests
+
+Natural-language due dates ("next friday", "in 3 days") are resolved
+locally in the user's timezone, without asking the model.
+"""
+
+import time
+from datetime import date, datetime, timezone
+
+import pytest
+
+# A Wednesday
+TODAY = date(2026, 10, 14)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2026-11-02", date(2026, 11, 2)),
+    ("today", TODAY),
+    ("Tonight", TODAY),
+    ("tomorrow", date(2026, 10, 15)),
+    ("by tomorrow", date(2026, 10, 15)),
+    ("day after tomorrow", date(2026, 10, 16)),
+    ("yesterday", date(2026, 10, 13)),
+    ("friday", date(2026, 10, 16)),
+    ("on Fri", date(2026, 10, 16)),
+    ("wednesday", date(2026, 10, 21)),  # never today
+    ("monday", date(2026, 10, 19)),
+    ("this wednesday", TODAY),
+    ("this friday", date(2026, 10, 16)),
+    ("next friday", date(2026, 10, 23)),
+    ("next monday", date(2026, 10, 19)),
+    ("in 3 days", date(2026, 10, 17)),
+    ("in a week", date(2026, 10, 21)),
+    ("in two weeks", date(2026, 10, 28)),
+    ("in a couple of days", date(2026, 10, 16)),
+    ("5 days from now", date(2026, 10, 19)),
+    ("in 1 month", date(2026, 11, 14)),
+    ("next week", date(2026, 10, 19)),
+    ("this weekend", date(2026, 10, 17)),
+    ("end of week", date(2026, 10, 16)),
+    ("next month", date(2026, 11, 1)),
+    ("end of month", date(2026, 10, 31)),
+    ("march 5", date(2027, 3, 5)),  # already past this year
+    ("Nov 3rd", date(2026, 11, 3)),
+    ("3 november", date(2026, 11, 3)),
+    ("3rd of november", date(2026, 11, 3)),
+    ("march 5, 2028", date(2028, 3, 5)),
+    ("  In   3   Days ", date(2026, 10, 17)),
+])
+def test_resolves_expressions(text, expected):
+    from apps.todos.dates import resolve_date
+
+    assert resolve_date(text, today=TODAY) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "someday", "next blursday", "in many days", "feb 30 2027", "",
+    "march 32", "april 31", "feb 30", "31st of june", "march 0",
+    "in 9999999 days", "in 9999999 weeks", "in 99999999 months", "99999999999 days from now",
+])
+def test_rejects_what_it_cant_resolve(text):
+    from apps.todos.dates import resolve_date
+
+    with pytest.raises(ValueError):
+        resolve_date(text, today=TODAY)
+
+
+def test_month_arithmetic_clamps_to_month_end():
+    from apps.todos.dates import resolve_date
+
+    assert resolve_date("in a month", today=date(2027, 1, 31)) == date(2027, 2, 28)
+
+
+def test_feb_29_means_the_next_leap_year():
+    from apps.todos.dates import resolve_date
+
+    assert resolve_date("feb 29", today=TODAY) == date(2028, 2, 29)
+
+
+def test_uses_the_users_timezone():
+    from apps.todos.dates import today_in
+
+    now = datetime.now(timezone.utc)
+    tokyo = today_in("Asia/Tokyo")
+    honolulu = today_in("Pacific/Honolulu")
+
+    assert (tokyo - honolulu).days in (0, 1)
+    assert honolulu <= now.date() <= tokyo
+    assert today_in("Not/AZone") == date.today()
+
+
+def test_resolution_is_fast():
+    """Resolving stays far below a model round trip (~1s): 50µs budget each."""
+    from apps.todos.dates import resolve_date
+
+    phrases = ["tomorrow", "next friday", "in 3 days", "march 5", "end of month", "2026-11-02"]
+    runs = 2000
+    started = time.perf_counter()
+    for _ in range(runs):
+        for phrase in phrases:
+            resolve_date(phrase, "America/New_York")
+    per_call = (time.perf_counter() - started) / (runs * len(phrases))
+
+    assert per_call < 50e-6
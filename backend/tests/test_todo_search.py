@@ -0,0 +1,139 @@
+"""
+TDD: Todo Search Tests
+
+Todo searches are ranked by trigram similarity. complete_todo completes
+the best match when it is clearly ahead and otherwise offers a short
+ranked list; the same search is exposed as ?q= on /api/todos/.
+"""
+
+import pytest
+from rest_framework.test import APIClient
+
+from apps.todos.models import Todo
+
+
+def add(user, *tasks):
+    return [Todo.objects.create(user=user, task=task) for task in tasks]
+
+
+class TestTrigrams:
+
+    def test_trigrams_follow_pg_trgm(self):
+        from apps.todos.search import trigrams
+
+        assert trigrams("Cat!") == {"  c", " ca", "cat", "at "}
+        assert trigrams("a b") == {"  a", " a ", "  b", " b "}
+        assert trigrams("") == set()
+
+    def test_similarities(self):
+        from apps.todos.search import similarity, word_similarity
+
+        assert similarity("call mom", "Call mom") == 1.0
+        assert word_similarity("doctor", "Call the doctor tomorrow") == 1.0
+        assert similarity("doctor", "Call the doctor tomorrow") < 0.5
+        assert word_similarity("grocries", "Buy groceries") > 0.6
+        assert word_similarity("taxes", "Buy groceries") < 0.3
+
+
+@pytest.mark.django_db
+class TestBestMatch:
+
+    def best(self, user, search):
+        from apps.todos.search import best_match
+
+        best, matches = best_match(Todo.objects.filter(user=user), search)
+        return (best.task if best else None), [t.task for t in matches]
+
+    def test_typo_still_matches(self, user):
+        add(user, "Buy groceries", "Call the doctor")
+
+        assert self.best(user, "grocries") == ("Buy groceries", ["Buy groceries"])
+
+    def test_exact_task_beats_longer_ones(self, user):
+        add(user, "Call mom later", "Call mom")
+
+        best, matches = self.best(user, "call mom")
+
+        assert best == "Call mom"
+        assert matches == ["Call mom", "Call mom later"]
+
+    def test_close_matches_are_ranked_not_guessed(self, user):
+        add(user, "Call the doctor", "Call mom", "Water the plants")
+
+        assert self.best(user, "call") == (None, ["Call mom", "Call the doctor"])
+
+    def test_ranked_list_is_short(self, user):
+        add(user, *(f"Email client {i}" for i in range(10)))
+
+        best, matches = self.best(user, "email client")
+
+        assert best is None
+        assert len(matches) == 5
+
+    def test_no_match(self, user):
+        add(user, "Buy groceries")
+
+        assert self.best(user, "file taxes") == (None, [])
+
+
+@pytest.mark.django_db
+class TestCompleteTodo:
+
+    def test_completes_clear_winner(self, user):
+        from apps.agent.tools import complete_todo
+
+        add(user, "Call the doctor about results", "Call mom")
+
+        assert complete_todo(user=user, search="doctor") == {
+            "completed": True, "task": "Call the doctor about results",
+        }
+
+    def test_query_count_is_flat(self, user, django_assert_max_num_queries):
+        from apps.agent.tools import complete_todo
+
+        add(user, *(f"Old task number {i}" for i in range(60)), "Renew passport")
+
+        with django_assert_max_num_queries(3):
+            result = complete_todo(user=user, search="renew pasport")
+        assert result == {"completed": True, "task": "Renew passport"}
+
+
+@pytest.mark.django_db
+class TestSearchAPI:
+
+    @pytest.fixture
+    def client(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_q_returns_ranked_matches(self, client, user, other_user):
+        add(user, "Call mom later", "Buy groceries", "Call mom")
+        add(other_user, "Call mom")
+
+        response = client.get("/api/todos/", {"q": "call mom"})
+
+        assert response.status_code == 200
+        assert [t["task"] for t in response.data["results"]] == ["Call mom", "Call mom later"]
+
+    def test_blank_q_lists_everything(self, client, user):
+        add(user, "Call mom", "Buy groceries")
+
+        response = client.get("/api/todos/", {"q": " "})
+
+        assert len(response.data["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_postgres_search_uses_the_trigram_index(user):
+    from django.db import connection
+
+    from apps.todos.search import ranked
+
+    if connection.vendor != "postgresql":
+        pytest.skip("trigram index is PostgreSQL-only")
+
+    sql = str(ranked(Todo.objects.filter(user=user), "call mom").query)
+
+    assert "%>" in sql
+    assert "LIMIT" in str(ranked(Todo.objects.filter(user=user), "call mom")[:5].query)
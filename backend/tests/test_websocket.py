@@ -167,3 +167,78 @@ class TestWebSocketScoping:
 
         a_count = await get_message_count(user_a)
         assert a_count == 2
+
+
+@pytest.mark.asyncio
+class TestWebSocketStreaming:
+    """Model tokens and tool progress stream before the complete frame."""
+
+    async def receive_until_complete(self, communicator):
+        frames = []
+        while True:
+            frame = await communicator.receive_json_from(timeout=5)
+            frames.append(frame)
+            if frame["type"] == "complete":
+                return frames
+
+    async def test_deltas_then_complete(self, fake_chat_model):
+        from langchain_core.messages import AIMessage
+
+        fake_chat_model(AIMessage(content="Be here now."))
+        user = await create_user()
+        communicator = make_communicator(user)
+        await communicator.connect()
+
+        await communicator.send_json_to({"type": "message", "content": "Hi"})
+        frames = await self.receive_until_complete(communicator)
+
+        deltas = [f["content"] for f in frames if f["type"] == "delta"]
+        assert len(deltas) > 1
+        assert "".join(deltas) == "Be here now."
+        assert frames[-1] == {"type": "complete", "content": "Be here now."}
+
+        await communicator.disconnect()
+
+    async def test_tool_progress_frames(self, fake_chat_model):
+        from langchain_core.messages import AIMessage
+
+        fake_chat_model(
+            AIMessage(content="", tool_calls=[{
+                "name": "add_mantra",
+                "args": {"content": "Breathe"},
+                "id": "call_1",
+                "type": "tool_call",
+            }]),
+        )
+        user = await create_user()
+        communicator = make_communicator(user)
+        await communicator.connect()
+
+        await communicator.send_json_to({"type": "message", "content": "Mantra: Breathe"})
+        frames = await self.receive_until_complete(communicator)
+
+        types = [f["type"] for f in frames]
+        assert types.index("tool_start") < types.index("tool_end")
+        assert types.index("tool_end") < types.index("delta")
+        tool_start = frames[types.index("tool_start")]
+        assert tool_start["name"] == "add_mantra"
+        assert frames[-1]["content"] == "Added your mantra: “Breathe”"
+
+        await communicator.disconnect()
+
+    async def test_persisted_reply_matches_stream(self, fake_chat_model):
+        from langchain_core.messages import AIMessage
+
+        fake_chat_model(AIMessage(content="Noted with care."))
+        user = await create_user()
+        communicator = make_communicator(user)
+        await communicator.connect()
+
+        await communicator.send_json_to({"type": "message", "content": "Hello"})
+        await self.receive_until_complete(communicator)
+        await communicator.disconnect()
+
+        saved = await database_sync_to_async(
+            lambda: ChatMessage.objects.get(user=user, role="assistant").content
+        )()
+        assert saved == "Noted with care."
@@ -0,0 +1,23 @@
+// What the agent is doing while a tool call runs
+const TOOL_LABELS: Record<string, string> = {
+  log_meditation: "Logging your meditation",
+  save_gratitude_list: "Saving your gratitude list",
+  save_journal_entry: "Saving your journal entry",
+  create_todo: "Adding your todo",
+  create_todos: "Adding your todos",
+  complete_todo: "Checking off your todo",
+  complete_todos: "Checking off your todos",
+  get_todos: "Looking at your todos",
+  get_recent_entries: "Reading your recent entries",
+  get_mantras: "Looking at your mantras",
+  add_mantra: "Adding your mantra",
+  get_todays_status: "Checking today's progress",
+};
+
+export function ToolStatus({ tool }: { tool: string }) {
+  return (
+    <p className="px-1 text-xs text-text-muted animate-pulse">
+      {TOOL_LABELS[tool] ?? "Working on it"}…
+    </p>
+  );
+}
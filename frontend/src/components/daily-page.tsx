@@ -4,14 +4,22 @@ import { useEffect, useRef } from "react";
 
 import { ChatInput } from "@/components/chat/chat-input";
 import { ChatMessageBubble } from "@/components/chat/chat-message";
+import { ToolStatus } from "@/components/chat/tool-status";
 import { DaySection } from "@/components/daily/day-section";
 import { RecentDaysFeed } from "@/components/daily/recent-days-feed";
 import { useChat } from "@/hooks/use-chat";
 import { useTodaySummary } from "@/hooks/use-daily-summary";
 
 export function DailyPage() {
-  const { messages, sendMessage, isConnected, isWaiting, historyLoaded } =
-    useChat();
+  const {
+    messages,
+    sendMessage,
+    isConnected,
+    isWaiting,
+    historyLoaded,
+    streamingContent,
+    activeTool,
+  } = useChat();
   const { data: todaySummary, isLoading: summaryLoading } = useTodaySummary();
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
@@ -80,7 +88,12 @@ export function DailyPage() {
                 {messages.map((msg, i) => (
                   <ChatMessageBubble key={i} message={msg} />
                 ))}
-                {isWaiting && (
+                {isWaiting && streamingContent && (
+                  <ChatMessageBubble
+                    message={{ role: "assistant", content: streamingContent }}
+                  />
+                )}
+                {isWaiting && !streamingContent && (
                   <div className="flex justify-start">
                     <div className="rounded-2xl rounded-bl-md bg-bg-secondary px-4 py-2.5">
                       <div className="flex gap-1">
@@ -91,6 +104,7 @@ export function DailyPage() {
                     </div>
                   </div>
                 )}
+                {isWaiting && activeTool && <ToolStatus tool={activeTool} />}
                 <div ref={messagesEndRef} />
               </div>
             </div>
@@ -20,8 +20,16 @@ export function useChat() {
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [isConnected, setIsConnected] = useState(false);
   const [isWaiting, setIsWaiting] = useState(false);
+  // Assistant text streamed so far for the in-progress reply
+  const [streamingContent, setStreamingContent] = useState("");
+  const [activeTool, setActiveTool] = useState<string | null>(null);
+  // Where the current model call's text starts in streamingContent
+  const segmentStartRef = useRef(0);
   const [historyLoaded, setHistoryLoaded] = useState(false);
   const wsRef = useRef<WebSocket | null>(null);
+  // The unanswered message; resent with the same client_id after a
+  // reconnect so the server resumes that turn instead of starting another
+  const pendingRef = useRef<{ type: "message"; content: string; client_id: string } | null>(null);
   const queryClient = useQueryClient();
 
   // Load persisted messages for today on mount
@@ -60,16 +68,41 @@ export function useChat() {
         if (wsRef.current !== ws) return;
         setIsConnected(true);
         retries = 0;
+        if (pendingRef.current) {
+          // The resumed turn streams its reply from the start
+          setStreamingContent("");
+          segmentStartRef.current = 0;
+          ws.send(JSON.stringify(pendingRef.current));
+        }
       };
 
       ws.onmessage = (event) => {
         if (wsRef.current !== ws) return;
         const data = JSON.parse(event.data);
-        if (data.type === "complete") {
+        if (data.type === "delta") {
+          setStreamingContent((prev) => prev + data.content);
+        } else if (data.type === "tool_start") {
+          // Tool calls separate the text of one model call from the next
+          setStreamingContent((prev) => {
+            const next = prev ? prev + "\n\n" : prev;
+            segmentStartRef.current = next.length;
+            return next;
+          });
+          setActiveTool(data.name);
+        } else if (data.type === "reset") {
+          // A model call failed partway; its retry streams the text again
+          setStreamingContent((prev) => prev.slice(0, segmentStartRef.current));
+        } else if (data.type === "tool_end") {
+          setActiveTool(null);
+        } else if (data.type === "complete") {
+          pendingRef.current = null;
           setMessages((prev) => [
             ...prev,
             { role: "assistant", content: data.content },
           ]);
+          setStreamingContent("");
+          segmentStartRef.current = 0;
+          setActiveTool(null);
           setIsWaiting(false);
 
           queryClient.invalidateQueries({ queryKey: ["checkin"] });
@@ -114,8 +147,17 @@ export function useChat() {
     setMessages((prev) => [...prev, { role: "user", content }]);
     setIsWaiting(true);
 
-    wsRef.current.send(JSON.stringify({ type: "message", content }));
+    pendingRef.current = { type: "message", content, client_id: crypto.randomUUID() };
+    wsRef.current.send(JSON.stringify(pendingRef.current));
   }, []);
 
-  return { messages, sendMessage, isConnected, isWaiting, historyLoaded };
+  return {
+    messages,
+    sendMessage,
+    isConnected,
+    isWaiting,
+    historyLoaded,
+    streamingContent,
+    activeTool,
+  };
 }